@@ -95,12 +95,11 @@ update_request_status() {
     fi
 }
 
-# Get comma-separated PIDs from tracking table
+# Get comma-separated PIDs from process tracking table (indexed on request_id)
 PIDS=$($CONNECTION_STRING -qtAX -c "
-    SELECT process_ids
-    FROM $TRACKING_TABLE
+    SELECT string_agg(DISTINCT pid::text, ',')
+    FROM $PROCESS_TRACKING_TABLE
     WHERE request_id = $REQUEST_ID
-    AND status = 'Running'
 " 2>/dev/null)
 
 # Clean up the result (remove whitespace)
@@ -130,6 +130,22 @@ class ConfigLoader:
     def tracking_table(self) -> str:
         return self._get_tables_config().get('tracking', '')
 
+    @property
+    def process_tracking_table(self) -> str:
+        return self._get_tables_config().get('process_tracking', '')
+
+    @property
+    def rltp_metrics_table(self) -> str:
+        return self._get_tables_config().get('rltp_metrics', '')
+
+    @property
+    def supp_list_cache_table(self) -> str:
+        return self._get_tables_config().get('supp_list_cache', '')
+
+    @property
+    def module_step_metrics_table(self) -> str:
+        return self._get_tables_config().get('module_step_metrics', '')
+
     @property
     def hards_table(self) -> str:
         return self._get_tables_config().get('hards', '')
@@ -149,6 +165,25 @@ class ConfigLoader:
             week=week.lower()
         )
 
+    def get_trt_checkpoint_table(self, request_id: str, client_name: str, week: str) -> str:
+        """Generate TRT checkpoint table name from template."""
+        tables = self._get_tables_config()
+        template = tables.get('trt_checkpoint_table', 'apt_custom_{request_id}_{client_name}_{week}_trt_checkpoint')
+        return template.format(
+            request_id=request_id,
+            client_name=client_name.lower(),
+            week=week.lower()
+        )
+
+    def get_supp_list_table(self, client_id, match_column: str) -> str:
+        """Generate cached client suppression list table name from template."""
+        tables = self._get_tables_config()
+        template = tables.get('supp_list_table', 'apt_custom_supp_list_{client_id}_{match_column}_dnd')
+        return template.format(
+            client_id=client_id,
+            match_column=match_column.lower()
+        )
+
     def get_src_table(self, request_id: str, client_name: str, week: str) -> str:
         """Generate SRC table name from template."""
         tables = self._get_tables_config()
@@ -199,6 +234,77 @@ class ConfigLoader:
         """Check if client is an audit client."""
         return client_id in self.audit_client_ids
 
+    def _get_index_build_config(self) -> Dict[str, Any]:
+        return self._config['processing'].get('index_build', {})
+
+    @property
+    def index_max_concurrent(self) -> int:
+        return self._get_index_build_config().get('max_concurrent', 3)
+
+    @property
+    def index_mem_min_mb(self) -> int:
+        return self._get_index_build_config().get('maintenance_work_mem_min_mb', 64)
+
+    @property
+    def index_mem_max_mb(self) -> int:
+        return self._get_index_build_config().get('maintenance_work_mem_max_mb', 1024)
+
+    @property
+    def index_max_parallel_workers(self) -> int:
+        return self._get_index_build_config().get('max_parallel_workers', 2)
+
+    @property
+    def index_bytes_per_parallel_worker(self) -> int:
+        return self._get_index_build_config().get('bytes_per_parallel_worker', 1_073_741_824)
+
+    def _get_suppression_config(self) -> Dict[str, Any]:
+        return self._config['processing'].get('suppression', {})
+
+    @property
+    def suppression_strategy(self) -> str:
+        return self._get_suppression_config().get('strategy', 'delete')
+
+    @property
+    def suppression_rebuild_fraction(self) -> float:
+        return self._get_suppression_config().get('rebuild_fraction', 0.2)
+
+    @property
+    def suppression_rebuild_min_rows(self) -> int:
+        return self._get_suppression_config().get('rebuild_min_rows', 1_000_000)
+
+    @property
+    def suppression_max_processes(self) -> int:
+        return self._get_suppression_config().get('max_processes', 5)
+
+    def _get_responders_config(self) -> Dict[str, Any]:
+        return self._config['processing'].get('responders', {})
+
+    @property
+    def responders_snowflake_dedup(self) -> bool:
+        return self._get_responders_config().get('snowflake_dedup', False)
+
+    def _get_responder_cache_config(self) -> Dict[str, Any]:
+        return self._get_responders_config().get('cache', {})
+
+    @property
+    def responder_cache_enabled(self) -> bool:
+        return self._get_responder_cache_config().get('enabled', False)
+
+    @property
+    def responder_cache_path(self) -> str:
+        path = self._get_responder_cache_config().get('path', 'RESPONDER_CACHE')
+        if not path.startswith('/'):
+            return os.path.join(self.base_path, path)
+        return path
+
+    @property
+    def responder_cache_settle_days(self) -> int:
+        return self._get_responder_cache_config().get('settle_days', 3)
+
+    @property
+    def responder_cache_retention_days(self) -> int:
+        return self._get_responder_cache_config().get('retention_days', 120)
+
     # ==================== Staging ====================
 
     @property
@@ -217,6 +323,39 @@ class ConfigLoader:
     def stage_compression(self) -> str:
         return self._config['staging']['compression']
 
+    @property
+    def stage_load_mode(self) -> str:
+        """'stream' (gz parts piped into COPY) or 'merge' (single decile CSV on disk)."""
+        return self._config['staging'].get('load_mode', 'merge')
+
+    @property
+    def stage_get_parallel(self) -> int:
+        return self._config['staging'].get('get_parallel', 4)
+
+    @property
+    def stage_load_connections(self) -> int:
+        return self._config['staging'].get('load_connections', 1)
+
+    @property
+    def stage_target_parts(self) -> int:
+        return self._config['staging'].get('target_parts', 1)
+
+    @property
+    def stage_min_file_size(self) -> int:
+        return self._config['staging'].get('min_file_size', 16_000_000)
+
+    @property
+    def stage_bytes_per_row(self) -> int:
+        return self._config['staging'].get('bytes_per_row', 150)
+
+    @property
+    def stage_preflight_count(self) -> bool:
+        return self._config['staging'].get('preflight_count', False)
+
+    @property
+    def stage_partitioned_unload(self) -> bool:
+        return self._config['staging'].get('partitioned_unload', False)
+
     # ==================== Paths ====================
 
     @property
@@ -1,4 +1,5 @@
 source /u1/techteam/PFM_CUSTOM_SCRIPTS/Campaign-Attribution-Management/REQUEST_PROCESSING/$1/ETC/config.properties
+source $TRACKING_HELPER
 
 echo "MODULE5 Consumer Start Time: `date`"
 
@@ -108,6 +109,9 @@ fi
 
 
 
+		# Rows of this segment/creative/subject/del_date/offerid in PART_PB_TABLE, counted from the inserts
+		pb_group="$seg_var1|$creative|$subj|$del_date|$offerid"
+
 		#days=$($CONNECTION_STRING -qtAX  -c"select date_part('day',age('$res_date', '$del_date'))" )
 		days=$($CONNECTION_STRING -qtAX  -c" select '$res_date'::date - '$del_date'::date ")
 
@@ -190,7 +194,7 @@ fi
 				if [ $unsub_count -gt 0 ]
 				then
 
-					$CONNECTION_STRING -vv -c"insert into  $PART_PB_TABLE ($src_header ,campaign,subject,creative,open_date,unsub_date,offerid) select a.* ,'$CAMPAIGN','$subj','$creative','$open_date','$open_date','$offerid' from $PARTITION_SRC  a left join $PART_PB_TABLE b on a.id=b.id where b.id is null and $seg_var and a.status=2 and a.unsub=1 and a.del_date='$del_date' and a.flag is null limit $unsub_count "
+					inserted_rows=`$CONNECTION_STRING -qtAX -c"with rows as ( insert into  $PART_PB_TABLE ($src_header ,campaign,subject,creative,open_date,unsub_date,offerid) select a.* ,'$CAMPAIGN','$subj','$creative','$open_date','$open_date','$offerid' from $PARTITION_SRC  a left join $PART_PB_TABLE b on a.id=b.id where b.id is null and $seg_var and a.status=2 and a.unsub=1 and a.del_date='$del_date' and a.flag is null limit $unsub_count returning email ) select count(email) from rows "`
 					
 					
 					if [[ $? -ne 0 ]]
@@ -202,6 +206,8 @@ fi
 					
 					fi
 
+					add_group_count "pb_dels|$pb_group" $inserted_rows
+
 
 
 				fi
@@ -214,7 +220,7 @@ fi
 				if [ $click_count -gt 0 ]
 				then
 
-					$CONNECTION_STRING -vv -c"insert into  $PART_PB_TABLE ($src_header ,campaign,subject,creative,open_date,click_date,offerid) select a.* ,'$CAMPAIGN','$subj','$creative','$open_date','$open_date','$offerid' from $PARTITION_SRC  a left join $PART_PB_TABLE b on a.id=b.id where b.id is null and $seg_var and a.unsub=0 and a.del_date='$del_date' and a.flag is null order by a.status desc,random()  limit $click_count "
+					inserted_rows=`$CONNECTION_STRING -qtAX -c"with rows as ( insert into  $PART_PB_TABLE ($src_header ,campaign,subject,creative,open_date,click_date,offerid) select a.* ,'$CAMPAIGN','$subj','$creative','$open_date','$open_date','$offerid' from $PARTITION_SRC  a left join $PART_PB_TABLE b on a.id=b.id where b.id is null and $seg_var and a.unsub=0 and a.del_date='$del_date' and a.flag is null order by a.status desc,random()  limit $click_count returning email ) select count(email) from rows "`
 					
 					if [[ $? -ne 0 ]]
 					then
@@ -224,6 +230,8 @@ fi
 							exit
 					
 					fi					
+
+					add_group_count "pb_dels|$pb_group" $inserted_rows
 					
 				fi
 
@@ -235,7 +243,7 @@ fi
 				if [ $op_cnt -gt 0 ]
 				then
 
-					$CONNECTION_STRING  -c"insert  into  $PART_PB_TABLE ($src_header ,campaign,subject,creative,open_date,offerid) select a.* ,'$CAMPAIGN','$subj','$creative','$open_date','$offerid' from $PARTITION_SRC  a left join $PART_PB_TABLE b on a.id=b.id where b.id is null and $seg_var and a.status in (2,1,0)  and a.unsub=0 and a.del_date='$del_date' and a.flag is null order by a.status desc,random()  limit $op_cnt "
+					inserted_rows=`$CONNECTION_STRING -qtAX -c"with rows as ( insert  into  $PART_PB_TABLE ($src_header ,campaign,subject,creative,open_date,offerid) select a.* ,'$CAMPAIGN','$subj','$creative','$open_date','$offerid' from $PARTITION_SRC  a left join $PART_PB_TABLE b on a.id=b.id where b.id is null and $seg_var and a.status in (2,1,0)  and a.unsub=0 and a.del_date='$del_date' and a.flag is null order by a.status desc,random()  limit $op_cnt returning email ) select count(email) from rows "`
 
 					if [[ $? -ne 0 ]]
 					then
@@ -245,6 +253,8 @@ fi
 							exit
 					
 					fi					
+
+					add_group_count "pb_dels|$pb_group" $inserted_rows
 					
 					
 				fi
@@ -256,7 +266,7 @@ fi
 		
 		#=== INSERT BOUNCES ===#
 
-		$CONNECTION_STRING -vv -c"insert into  $PART_PB_TABLE ($src_header ,campaign,subject,creative,offerid) select a.* ,'$CAMPAIGN','$subj','$creative','$offerid' from $PARTITION_SRC  a left join $PART_PB_TABLE b on a.id=b.id where b.id is null and $seg_var and a.flag='S' and a.del_date='$del_date' limit $soft_cnt "
+		inserted_rows=`$CONNECTION_STRING -qtAX -c"with rows as ( insert into  $PART_PB_TABLE ($src_header ,campaign,subject,creative,offerid) select a.* ,'$CAMPAIGN','$subj','$creative','$offerid' from $PARTITION_SRC  a left join $PART_PB_TABLE b on a.id=b.id where b.id is null and $seg_var and a.flag='S' and a.del_date='$del_date' limit $soft_cnt returning email ) select count(email) from rows "`
 		
 		if [[ $? -ne 0 ]]
 		then
@@ -267,8 +277,10 @@ fi
 					
 		fi
 
+		add_group_count "pb_dels|$pb_group" $inserted_rows
 
-		$CONNECTION_STRING -vv -c"insert into  $PART_PB_TABLE ($src_header ,campaign,subject,creative,offerid) select a.* ,'$CAMPAIGN','$subj','$creative','$offerid' from $PARTITION_SRC  a left join $PART_PB_TABLE b on a.id=b.id where b.id is null and $seg_var and a.flag='B' and a.del_date='$del_date' limit $hard_cnt "
+
+		inserted_rows=`$CONNECTION_STRING -qtAX -c"with rows as ( insert into  $PART_PB_TABLE ($src_header ,campaign,subject,creative,offerid) select a.* ,'$CAMPAIGN','$subj','$creative','$offerid' from $PARTITION_SRC  a left join $PART_PB_TABLE b on a.id=b.id where b.id is null and $seg_var and a.flag='B' and a.del_date='$del_date' limit $hard_cnt returning email ) select count(email) from rows "`
 		
 		if [[ $? -ne 0 ]]
 		then
@@ -278,19 +290,12 @@ fi
 			exit
 					
 		fi		
+
+		add_group_count "pb_dels|$pb_group" $inserted_rows
 		#=== INSERT DELIVERED COUNT ===#
 		
 
-		inserted_cnt=$($CONNECTION_STRING -qtAX  -c"select count(email) from $PART_PB_TABLE where $seg_var1 and creative='$creative' and subject='$subj' and del_date='$del_date' and offerid='$offerid'")
-		
-		if [[ $? -ne 0 ]]
-		then
-					
-			error_fun "5" "Unable to get total available delivered count from delivered table in consumer script"
-			$CONNECTION_STRING -vv -c" drop table $PART_PB_TABLE"
-			exit
-					
-		fi		
+		inserted_cnt=`group_count "pb_dels|$pb_group"`
 
 		d_cnt=`expr $del_cnt - $inserted_cnt | bc`
 
@@ -298,7 +303,7 @@ fi
         if [ $d_cnt -gt 0 ]
         then
 
-			$CONNECTION_STRING  -c"insert  into  $PART_PB_TABLE ($src_header ,campaign,subject,creative,offerid) select a.* ,'$CAMPAIGN','$subj','$creative','$offerid' from $PARTITION_SRC  a left join $PART_PB_TABLE b on a.id=b.id where b.id is null and $seg_var and a.status in (1,0) and a.unsub=0 and a.del_date='$del_date' and a.flag is null order by random() limit $d_cnt "
+			inserted_rows=`$CONNECTION_STRING -qtAX -c"with rows as ( insert  into  $PART_PB_TABLE ($src_header ,campaign,subject,creative,offerid) select a.* ,'$CAMPAIGN','$subj','$creative','$offerid' from $PARTITION_SRC  a left join $PART_PB_TABLE b on a.id=b.id where b.id is null and $seg_var and a.status in (1,0) and a.unsub=0 and a.del_date='$del_date' and a.flag is null order by random() limit $d_cnt returning email ) select count(email) from rows "`
 			
 			if [[ $? -ne 0 ]]
 			then
@@ -309,6 +314,8 @@ fi
 						
 			fi				
 
+			add_group_count "pb_dels|$pb_group" $inserted_rows
+
 		fi
 
 		$CONNECTION_STRING  -c"with cte as ( select id,del_date from  $PART_PB_TABLE ) delete from $PARTITION_SRC a using cte b where a.id=b.id and a.del_date='$del_date'"
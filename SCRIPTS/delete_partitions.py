@@ -1,10 +1,30 @@
+"""
+Partition-wise suppression for partitioned TRT tables.
+
+Usage: python3 delete_partitions.py "<delete query>" <request_id>
+
+The query has the form "delete from <table> a using <supp> b where <cond>"
+and is applied to every partition of <table>, several at a time. Each
+partition is handled with one of two strategies:
+
+- DELETE: the query itself, run against the partition.
+- Rebuild: CREATE TABLE ... AS SELECT the surviving rows (NOT EXISTS anti
+  join), recreate the partition's indexes, then detach the old partition and
+  attach the new one in a single transaction. No dead tuples are left behind.
+
+With strategy "auto" (processing.suppression in app.yaml) a partition is
+rebuilt when the planner estimates that at least rebuild_fraction of its rows
+are suppressed. Either way the total suppressed count is printed on stdout.
+"""
+
+import hashlib
+import json
 import psycopg2
 from psycopg2 import sql
 from multiprocessing import Pool, cpu_count
 import re
 import sys
 import logging
-import subprocess
 import os
 
 # Import configuration loader
@@ -18,47 +38,219 @@ import sys
 sys.path.append(cfg.python_modules_path)
 from DbConns import *
 
+import process_tracking
+
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
 
 
-def execute_query(query_and_request_id):
-    query, request_id = query_and_request_id
+DELETE_QUERY_PATTERN = re.compile(
+    r"delete\s+from\s+(\w+)\s+(?:as\s+)?(\w+)\s+using\s+(.+?)\s+where\s+(.+)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Prefix of the table / indexes built by a rebuild before the swap
+REBUILD_PREFIX = "rb_"
+
+
+def parse_delete_query(query):
+    """
+    Split "delete from <table> <alias> using <from list> where <cond>".
+
+    Returns:
+        dict with table, alias, using and condition, or None for other shapes
+        (those can only be run as DELETE)
+    """
+    match = DELETE_QUERY_PATTERN.search(query.strip().rstrip(";"))
+    if not match:
+        return None
+    table, alias, using, condition = match.groups()
+    return {
+        "table": table,
+        "alias": alias,
+        "using": using.strip(),
+        "condition": condition.strip(),
+    }
+
+
+def rebuild_name(partition_name, part):
+    """
+    Name of a rebuild's temporary table or index. It is short and derived
+    from a hash of the partition name, so a long partition / index name is
+    never truncated by PostgreSQL (63 characters) back onto the original one.
+    """
+    digest = hashlib.md5(partition_name.encode()).hexdigest()[:16]
+    return f"{REBUILD_PREFIX}{digest}_{part}"
+
+
+def anti_join_filter(parsed):
+    """EXISTS clause matching the rows the DELETE would remove."""
+    return f"EXISTS (SELECT 1 FROM {parsed['using']} WHERE {parsed['condition']})"
+
+
+def choose_strategy(cur, partition_name, alias, suppress_filter):
+    """
+    Pick 'delete' or 'rebuild' for one partition.
+
+    In auto mode the suppressed fraction is the planner's row estimate for
+    suppress_filter divided by the partition's reltuples, so no scan is needed.
+    suppress_filter is None when only a DELETE is possible.
+    """
+    strategy = cfg.suppression_strategy
+    if suppress_filter is None or strategy == "delete":
+        return "delete"
+    if strategy == "rebuild":
+        return "rebuild"
+
+    cur.execute(
+        f"SELECT reltuples::bigint FROM pg_class WHERE oid = '{partition_name}'::regclass"
+    )
+    total_rows = cur.fetchone()[0]
+    if total_rows < cfg.suppression_rebuild_min_rows:
+        return "delete"
+
+    cur.execute(
+        f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {partition_name} {alias} "
+        f"WHERE {suppress_filter}"
+    )
+    plan = cur.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimated_rows = plan[0]["Plan"]["Plan Rows"]
+
+    fraction = estimated_rows / total_rows
+    logger.info(
+        f"{partition_name}: ~{estimated_rows:,.0f} of ~{total_rows:,} rows suppressed "
+        f"({fraction:.1%})"
+    )
+    return "rebuild" if fraction >= cfg.suppression_rebuild_fraction else "delete"
+
+
+def rebuild_partition(conn, cur, partition_name, parent, alias, keep_filter, count_removed=None):
+    """
+    Replace a partition by a copy holding only the rows matching keep_filter.
+
+    Heavy work (CTAS, index builds, validating the partition CHECK constraint)
+    happens before the parent table is locked; the detach / drop / rename /
+    attach swap at the end only holds the parent lock briefly. Everything runs
+    in one transaction, so a failure leaves the partition untouched.
+
+    count_removed(cur), when given, counts the rows the copy leaves out, as
+    {key: rows}, under the partition lock. Its total stands in for the row
+    count of the partition, so the partition is scanned once for the counts
+    and once for the copy.
+
+    Returns:
+        Number of suppressed rows (same as the DELETE's rowcount), or the
+        count_removed result
+    """
+    new_table = rebuild_name(partition_name, "t")
+    bound_constraint = f"{new_table}_bound"
+
+    conn.autocommit = False
     try:
-        # Track this worker process
-        if request_id:
-            track_command = f"""
-            track_process() {{
-                source {cfg.get_config_properties_path(request_id)}
-                source {cfg.tracking_helper_path}
-                append_process_id $1 "DELETE_PARTITION_WORKER"
-            }}
-            track_process {request_id}
-            """
-            subprocess.run(
-                ["bash", "-c", track_command],
-                check=False,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
+        # Block writers (readers are fine) while the copy is taken
+        cur.execute(f"LOCK TABLE {partition_name} IN EXCLUSIVE MODE")
 
-        # Use DbConns for connection
-        conn, cur = getPgConnection()
+        cur.execute(
+            "SELECT pg_get_expr(relpartbound, oid), pg_get_partition_constraintdef(oid) "
+            f"FROM pg_class WHERE oid = '{partition_name}'::regclass"
+        )
+        partition_bound, partition_constraint = cur.fetchone()
+        cur.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s",
+            (partition_name,),
+        )
+        indexes = cur.fetchall()
+
+        if count_removed:
+            removed = count_removed(cur)
+        else:
+            cur.execute(f"SELECT count(*) FROM {partition_name}")
+            total_rows = cur.fetchone()[0]
+
+        cur.execute(f"DROP TABLE IF EXISTS {new_table}")
+        cur.execute(
+            f"CREATE TABLE {new_table} AS SELECT {alias}.* "
+            f"FROM {partition_name} {alias} WHERE {keep_filter}"
+        )
+        if not count_removed:
+            removed = total_rows - cur.rowcount
+
+        for n, (index_name, index_def) in enumerate(indexes):
+            cur.execute(re.sub(
+                r"INDEX \S+ ON (ONLY )?\S+",
+                f"INDEX {rebuild_name(partition_name, f'i{n}')} ON {new_table}",
+                index_def,
+                count=1,
+            ))
+
+        # Lets ATTACH PARTITION skip its validation scan
+        cur.execute(
+            f"ALTER TABLE {new_table} ADD CONSTRAINT {bound_constraint} "
+            f"CHECK ({partition_constraint})"
+        )
+
+        # Swap
+        cur.execute(f"ALTER TABLE {parent} DETACH PARTITION {partition_name}")
+        cur.execute(f"DROP TABLE {partition_name}")
+        cur.execute(f"ALTER TABLE {new_table} RENAME TO {partition_name}")
+        for n, (index_name, _) in enumerate(indexes):
+            cur.execute(f"ALTER INDEX {rebuild_name(partition_name, f'i{n}')} RENAME TO {index_name}")
+        cur.execute(
+            f"ALTER TABLE {parent} ATTACH PARTITION {partition_name} {partition_bound}"
+        )
+        cur.execute(f"ALTER TABLE {partition_name} DROP CONSTRAINT {bound_constraint}")
+        conn.commit()
+
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
         conn.autocommit = True
 
-        cur.execute(query)
+    cur.execute(f"ANALYZE {partition_name}")
+    return removed
 
-        affected_rows = cur.rowcount
 
-        cur.close()
-        conn.close()
+def suppress_partition(task):
+    """
+    Pool worker: apply the suppression to one partition.
 
-        return affected_rows
+    A failed rebuild is rolled back and retried as a plain DELETE.
+    """
+    partition_name, partition_query, parsed, request_id = task
+    try:
+        # Track this worker process
+        if request_id:
+            process_tracking.track_process(request_id, "DELETE_PARTITION_WORKER", worker=True)
+
+        conn, cur = getPgConnection()
+        conn.autocommit = True
+        try:
+            suppress_filter = anti_join_filter(parsed) if parsed else None
+            alias = parsed["alias"] if parsed else None
+            if choose_strategy(cur, partition_name, alias, suppress_filter) == "rebuild":
+                try:
+                    suppressed = rebuild_partition(
+                        conn, cur, partition_name, parsed["table"], alias,
+                        f"NOT {suppress_filter}",
+                    )
+                    logger.info(f"{partition_name}: rebuilt, {suppressed} rows suppressed")
+                    return suppressed
+                except psycopg2.Error as e:
+                    logger.warning(f"Rebuild of {partition_name} failed, using DELETE: {e}")
+
+            cur.execute(partition_query)
+            return cur.rowcount
+        finally:
+            cur.close()
+            conn.close()
 
     except psycopg2.Error as e:
-        logger.error(f"Error executing query: {e}")
+        logger.error(f"Error suppressing {partition_name}: {e}")
         return None
 
 
@@ -116,21 +308,8 @@ if __name__ == "__main__":
         delete_query = sys.argv[1]
         request_id = sys.argv[2]
 
-        # Track main process - create bash function to handle positional parameters
-        track_command = f"""
-        track_process() {{
-            source {cfg.get_config_properties_path(request_id)}
-            source {cfg.tracking_helper_path}
-            append_process_id $1 "DELETE_PARTITION_MAIN"
-        }}
-        track_process {request_id}
-        """
-        subprocess.run(
-            ["bash", "-c", track_command],
-            check=False,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
+        # Track main process
+        process_tracking.track_process(request_id, "DELETE_PARTITION_MAIN")
 
         table_name = parse_query_and_get_table(delete_query)
         if not table_name:
@@ -139,16 +318,20 @@ if __name__ == "__main__":
         partition_names = get_partition_names(table_name)
         logger.info(f"Found partitions: {partition_names}")
 
-        partition_queries = []
+        parsed = parse_delete_query(delete_query)
+        if parsed is None:
+            logger.info("Query is not of the form DELETE ... USING ... WHERE; using DELETE only")
+
+        partition_tasks = []
         for partition_name in partition_names:
             partition_query = delete_query.replace(table_name, partition_name)
-            partition_queries.append((partition_query, request_id))
+            partition_tasks.append((partition_name, partition_query, parsed, request_id))
 
-        max_processes = 5
+        max_processes = cfg.suppression_max_processes
         pool = Pool(processes=min(max_processes, cpu_count()))
 
         try:
-            results = pool.map(execute_query, partition_queries)
+            results = pool.map(suppress_partition, partition_tasks)
             total_deleted_count = sum(results)
             logger.info(
                 f"Total deleted count across all partitions: {total_deleted_count}"
@@ -59,6 +59,9 @@ then
 
 fi
 
+# SRC's rnd pick key is not delivered: dropping it drops the src_rnd_idx* copies too
+$CONNECTION_STRING  -vv -c "alter table $PB_TABLE drop column if exists rnd"
+
 p_key=`echo $PB_TABLE | tr '[:upper:]' '[:lower:]' | sed 's/$/_pkey/g'`
 email_key=`echo $PB_TABLE | tr '[:upper:]' '[:lower:]' | sed 's/$/_email_key/g'`
 
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Green responder loader for respondersPulling.sh / responderPullingNonUnique.sh.
+
+Pulls the Green delivered, opens, clicks and unsub data of a request from
+Snowflake and loads each result straight into its GREEN_*_TEMP table. Every
+pull runs in its own thread with its own Snowflake and PostgreSQL
+connections, and reuses the RLTP machinery of rltpDataPulling.py: COPY INTO
+a temporary stage, parallel GET, and the .gz parts streamed into
+COPY ... FROM STDIN (direct Arrow fetch as fallback). Fields are CSV quoted
+end to end, so values containing commas or quotes load unchanged.
+
+A failed pull leaves its table empty (the COPY is rolled back) and is
+retried with exponential backoff: retry_delay_seconds, then twice that, ...
+up to max_retries attempts.
+
+With processing.responders.snowflake_dedup set, the delivered, opens, clicks
+and unsubs are not downloaded: one Snowflake query joins them on
+(email, subid), ranks the events like the final merge of the module does and
+keeps the winner per email (per email and delivered date with --non-unique).
+Only those rows are loaded, into the --final-table. The tables of the mode
+not in use are dropped, so the module can tell which one ran.
+
+Otherwise, with processing.responders.cache.enabled set, the delivered, opens
+and clicks are read from the on-disk responder cache and only the
+(offerid, date) partitions it lacks are pulled (see responder_cache.py).
+
+Usage:
+    python3 green_responders.py <request_id> <offers> <min_date> <max_date> \
+        --delivered-table <t> --opens-table <t> --clicks-table <t> \
+        --total-unsubs-table <t> --unsubs-table <t> --final-table <t> [--non-unique] \
+        [--only green_total_unsubs]
+
+<offers> is the quoted offer id list of the report ('1','2',...); <max_date>
+is the day after the last delivered date.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from config_loader import get_config
+
+cfg = get_config()
+
+# Add python modules path and import DbConns
+sys.path.append(cfg.python_modules_path)
+from DbConns import *
+
+import process_tracking
+import responder_cache
+from rltpDataPulling import (
+    MAX_RETRY_ATTEMPTS,
+    RETRY_DELAY_SECONDS,
+    USE_SNOWFLAKE_STAGING,
+    pull_data_direct_fetch,
+    pull_data_with_staging,
+)
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(threadName)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+# Columns of the pulls joined by the Snowflake-side dedup
+GREEN_SOURCE_COLUMNS = {
+    "delivered": "EMAIL,DEL_DATE,SUBID,BOUNCECAT",
+    "opens": "EMAIL,OPEN_DATE,SUBID",
+    "clicks": "EMAIL,CLICK_DATE,SUBID",
+    "unsubs": "EMAIL,UNSUB_DATE,SUBID",
+}
+
+
+def green_queries(args):
+    """The Snowflake queries of the Green pulls (same as the former SnowSQL calls)."""
+    offers, min_date, max_date = args.offers, args.min_date, args.max_date
+    formatted_min_date = min_date.replace("-", "")
+    formatted_max_date = max_date.replace("-", "")
+
+    return {
+        "delivered": (
+            "SELECT DISTINCT TOADDRESS,TO_CHAR(TO_DATE(TIMELOGGED_DATE, 'YYYYMMDD'), 'YYYY-MM-DD') DEL_DATE,"
+            "SUBID,BOUNCECAT FROM GREEN.LIST_PROCESSING.PMTA_LOG_SUMMARY_ACTIVE_HISTORICAL "
+            f"WHERE OFFERID IN ({offers}) AND TIMELOGGED_DATE BETWEEN '{formatted_min_date}' and "
+            f"'{formatted_max_date}' and (BOUNCECAT='success' or DELIVEREDSTATUS='Hard Bounce') "
+            "and REGEXP_LIKE(listId, '^[0-9]+$') and type in ('d','b')"
+        ),
+        "opens": (
+            "select distinct EMAILID,OPENDATE,SUBID from GREEN.GREEN_LPT.RAW_OPENS_FOLLOWUP "
+            f"where OPENDATE>='{min_date}' and OFFERID in ({offers})"
+        ),
+        "clicks": (
+            "select distinct EMAILID,CLICKDATE,SUBID from GREEN.LIST_PROCESSING.RAW_CLICKS_FOLLOWUP_SF "
+            f"where CLICKDATE>='{min_date}' and OFFERID in ({offers})"
+        ),
+        "total_unsubs": (
+            "select distinct email from GREEN.LIST_PROCESSING.APT_UNSUB_DETAILS_SF "
+            f"where offerid in ({offers}) and to_date(LASTUNSUBDATE)<'{min_date}'"
+        ),
+        "unsubs": (
+            "select email,to_date(LASTUNSUBDATE),subid from GREEN.LIST_PROCESSING.APT_UNSUB_DETAILS_SF "
+            f"where offerid in ({offers}) and to_date(LASTUNSUBDATE)>='{min_date}'"
+        ),
+    }
+
+
+def green_final_query(queries, non_unique):
+    """
+    One Snowflake query returning the Green rows that survive the final merge.
+
+    The responder pulls are joined to the delivered rows on (email, subid) and
+    ranked in the merge's insert order: bounce, unsub, click, open, delivered
+    (no bounces in the non-unique module). The best ranked event is kept per
+    email, or per (email, del_date) with non_unique.
+    """
+    # (selected columns, source) of each event, in rank order
+    bounces = ("EMAIL,DEL_DATE,NULL,NULL,NULL,-1,NULL,0", "delivered WHERE BOUNCECAT <> 'success'")
+    responders = [
+        ("u.EMAIL,d.DEL_DATE,u.UNSUB_DATE,NULL,u.UNSUB_DATE,2,u.SUBID,1",
+         "unsubs u JOIN delivered d ON u.EMAIL=d.EMAIL AND u.SUBID=d.SUBID"),
+        ("c.EMAIL,d.DEL_DATE,c.CLICK_DATE,c.CLICK_DATE,NULL,3,c.SUBID,0",
+         "clicks c JOIN delivered d ON c.EMAIL=d.EMAIL AND c.SUBID=d.SUBID"),
+        ("o.EMAIL,d.DEL_DATE,o.OPEN_DATE,NULL,NULL,2,o.SUBID,0",
+         "opens o JOIN delivered d ON o.EMAIL=d.EMAIL AND o.SUBID=d.SUBID"),
+        ("EMAIL,DEL_DATE,NULL,NULL,NULL,1,SUBID,0", "delivered"),
+    ]
+    if non_unique:
+        partition = "EMAIL,DEL_DATE"
+    else:
+        partition = "EMAIL"
+        responders.insert(0, bounces)
+    events = " UNION ALL ".join(
+        f"SELECT {columns},{rank} FROM {source}" for rank, (columns, source) in enumerate(responders, start=1)
+    )
+
+    # Every column as VARCHAR, as in the GREEN_*_TEMP tables the merge joins otherwise
+    sources = []
+    for name, columns in GREEN_SOURCE_COLUMNS.items():
+        typed = ",".join(f"{column}::VARCHAR {column}" for column in columns.split(","))
+        sources.append(f"{name}_raw ({columns}) AS ({queries[name]}), {name} AS (SELECT {typed} FROM {name}_raw)")
+
+    return (
+        f"WITH {', '.join(sources)}, "
+        "events (EMAIL,DEL_DATE,OPEN_DATE,CLICK_DATE,UNSUB_DATE,STATUS,SUBID,UNSUB,EVENT_RANK) AS "
+        f"({events}) "
+        "SELECT EMAIL,DEL_DATE,OPEN_DATE,CLICK_DATE,UNSUB_DATE,STATUS,SUBID,UNSUB,EVENT_RANK FROM events "
+        f"QUALIFY ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY EVENT_RANK) = 1"
+    )
+
+
+def green_pulls(args):
+    """
+    The Green pulls of a request: target table, its DDL, the loaded columns
+    and the Snowflake query.
+
+    Returns:
+        (pulls, tables of the other mode to drop)
+    """
+    queries = green_queries(args)
+
+    total_unsubs = {
+        "name": "green_total_unsubs",
+        "table": args.total_unsubs_table,
+        "ddl": "email varchar unique",
+        "columns": "email",
+        "query": queries["total_unsubs"],
+    }
+
+    if cfg.responders_snowflake_dedup:
+        final = {
+            "name": "green_final",
+            "table": args.final_table,
+            "ddl": "email varchar,del_date varchar,open_date varchar,click_date varchar,unsub_date varchar,"
+                   "status int,subid varchar,unsub int,event_rank int",
+            "columns": "email,del_date,open_date,click_date,unsub_date,status,subid,unsub,event_rank",
+            "query": green_final_query(queries, args.non_unique),
+        }
+        raw_tables = [args.delivered_table, args.opens_table, args.clicks_table, args.unsubs_table]
+        return [final, total_unsubs], raw_tables
+
+    # Responder cache partitions of the pulls (delivered dates end at max_date, responders are open ended)
+    offers = responder_cache.parse_offers(args.offers)
+    min_date, max_date = date.fromisoformat(args.min_date), date.fromisoformat(args.max_date)
+
+    return [
+        {
+            "name": "green_delivered",
+            "table": args.delivered_table,
+            "ddl": "ID SERIAL,email varchar,del_date varchar,subid varchar,bouncecat varchar",
+            "columns": "email,del_date,subid,bouncecat",
+            "query": queries["delivered"],
+            "cache": ("pmta_delivered", offers, min_date, max_date),
+        },
+        {
+            "name": "green_opens",
+            "table": args.opens_table,
+            "ddl": "id SERIAL,email varchar,OPEN_DATE varchar,subid varchar",
+            "columns": "email,OPEN_DATE,subid",
+            "query": queries["opens"],
+            "cache": ("green_opens", offers, min_date, None),
+        },
+        {
+            "name": "green_clicks",
+            "table": args.clicks_table,
+            "ddl": "id SERIAL,email varchar,CLICK_DATE varchar,subid varchar",
+            "columns": "email,CLICK_DATE,subid",
+            "query": queries["clicks"],
+            "cache": ("green_clicks", offers, min_date, None),
+        },
+        total_unsubs,
+        {
+            "name": "green_unsubs",
+            "table": args.unsubs_table,
+            "ddl": "id SERIAL,email varchar,UNSUB_DATE varchar,subid varchar",
+            "columns": "email,UNSUB_DATE,subid",
+            "query": queries["unsubs"],
+        },
+    ], [args.final_table]
+
+
+def drop_tables(tables):
+    """Drop the tables of the mode not in use."""
+    pg_conn, cursor = getPgConnection()
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS {', '.join(tables)}")
+        pg_conn.commit()
+    finally:
+        cursor.close()
+        pg_conn.close()
+
+
+def recreate_table(pg_conn, table, ddl):
+    """Drop and create one GREEN_*_TEMP table."""
+    with pg_conn.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.execute(f"CREATE TABLE {table} ({ddl})")
+    pg_conn.commit()
+
+
+def load_pull(pull, spool_dir):
+    """
+    Create the pull's table and load its Snowflake result into it.
+
+    Returns:
+        (name, True) on success, (name, False) once every attempt failed
+    """
+    name = pull["name"]
+    copy_target = f"{pull['table']}({pull['columns']})"
+    # Only the directory is used: stage parts are downloaded there and streamed
+    spool_file = os.path.join(spool_dir, f"{name}.csv")
+
+    sf_conn = None
+    pg_conn = None
+    try:
+        sf_conn, sf_cursor = getSnowflake()
+        pg_conn, pg_cursor = getPgConnection()
+        pg_cursor.close()
+
+        recreate_table(pg_conn, pull["table"], pull["ddl"])
+
+        for attempt in range(1, MAX_RETRY_ATTEMPTS + 1):
+            logger.info(f"Attempt {attempt}/{MAX_RETRY_ATTEMPTS} for {name} into {pull['table']}")
+            success = False
+            if cfg.responder_cache_enabled and pull.get("cache"):
+                try:
+                    responder_cache.load_cached_pull(sf_cursor, pg_conn, *pull["cache"], copy_target)
+                    success = True
+                except Exception as e:
+                    logger.error(f"Responder cache load failed for {name}: {e}", exc_info=True)
+                    logger.info(f"Pulling {name} from Snowflake instead")
+            if not success and USE_SNOWFLAKE_STAGING:
+                success = pull_data_with_staging(
+                    sf_cursor, pull["query"], spool_file, name, logger,
+                    stream_target=(pg_conn, copy_target),
+                )
+                if not success:
+                    logger.info(f"Staging failed for {name}, using direct fetch fallback")
+            if not success:
+                success = pull_data_direct_fetch(
+                    sf_cursor, pull["query"], pg_conn, copy_target, logger
+                )
+
+            if success:
+                logger.info(f"✅ {name} loaded into {pull['table']}")
+                return name, True
+
+            if attempt < MAX_RETRY_ATTEMPTS:
+                delay = RETRY_DELAY_SECONDS * 2 ** (attempt - 1)
+                logger.info(f"Retrying {name} in {delay} seconds...")
+                time.sleep(delay)
+
+        logger.error(f"Unable to pull {name} after {MAX_RETRY_ATTEMPTS} attempts")
+        return name, False
+
+    except Exception as e:
+        logger.error(f"Unable to pull {name}: {e}", exc_info=True)
+        return name, False
+
+    finally:
+        if sf_conn:
+            sf_conn.close()
+        if pg_conn:
+            pg_conn.close()
+
+
+def load_green_responders(args):
+    """Run every Green pull concurrently; returns the names of the failed ones."""
+    pulls, unused_tables = green_pulls(args)
+    spool_dir = cfg.get_files_path(args.request_id)
+
+    if args.only:
+        # Rebuild of single tables: the other tables are left as they are
+        pulls = [pull for pull in pulls if pull["name"] in args.only]
+    else:
+        logger.info(f"Green dedup in Snowflake: {'ENABLED' if cfg.responders_snowflake_dedup else 'DISABLED'}")
+        drop_tables(unused_tables)
+
+    with ThreadPoolExecutor(max_workers=len(pulls), thread_name_prefix="green") as executor:
+        results = list(executor.map(lambda pull: load_pull(pull, spool_dir), pulls))
+
+    return [name for name, ok in results if not ok]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Load Green responder data from Snowflake")
+    parser.add_argument("request_id")
+    parser.add_argument("offers", help="Quoted offer id list, e.g. '1','2'")
+    parser.add_argument("min_date", help="First delivered date (YYYY-MM-DD)")
+    parser.add_argument("max_date", help="Day after the last delivered date (YYYY-MM-DD)")
+    parser.add_argument("--delivered-table", required=True)
+    parser.add_argument("--opens-table", required=True)
+    parser.add_argument("--clicks-table", required=True)
+    parser.add_argument("--total-unsubs-table", required=True)
+    parser.add_argument("--unsubs-table", required=True)
+    parser.add_argument("--final-table", required=True,
+                        help="Per-email Green rows when the dedup runs in Snowflake")
+    parser.add_argument("--non-unique", action="store_true",
+                        help="Keep one Green row per email and delivered date (responderPullingNonUnique.sh)")
+    parser.add_argument("--only", action="append", choices=["green_total_unsubs"],
+                        help="Load only this pull (suppressionList.sh rebuilds the total unsubs table)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+
+    # Track this process
+    process_tracking.track_process(args.request_id, "GREEN_RESPONDERS")
+
+    failed = load_green_responders(args)
+    if failed:
+        logger.error(f"Green responder pulls failed: {', '.join(failed)}")
+        sys.exit(1)
@@ -80,7 +80,9 @@ then
 	if [[ $new_ip_cnt -gt $req_ip_count ]]
 	then
 	
-		$CONNECTION_STRING -qtAX -c "select ip from $NEW_IP_TABLE order by random() limit $req_ip_count " > $SPOOLPATH/RequiredIps
+		#=== RANDOM IPS: a fresh bernoulli sample of the pool with headroom, shuffled; the whole pool if it came up short ===#
+
+		$CONNECTION_STRING -qtAX -c "select ip from $NEW_IP_TABLE tablesample bernoulli (least(100, 100.0*($req_ip_count*1.2+1000)/$new_ip_cnt)) order by random() limit $req_ip_count " > $SPOOLPATH/RequiredIps
 	
 	
 		if [[ $? -ne 0 ]]
@@ -90,6 +92,23 @@ then
 				exit
 		
 		fi
+
+		sampled_ip_count=`wc -l $SPOOLPATH/RequiredIps | awk -F' ' '{ print $1 }'`
+
+		if [[ $sampled_ip_count -lt $req_ip_count ]]
+		then
+
+			$CONNECTION_STRING -qtAX -c "select ip from $NEW_IP_TABLE order by random() limit $req_ip_count " > $SPOOLPATH/RequiredIps
+
+			if [[ $? -ne 0 ]]
+			then
+		
+					error_fun "7" "Unable to write ips from new_ip table"
+					exit
+		
+			fi
+
+		fi
 		
 		paste -d'|' $SPOOLPATH/RequiredIpEmails $SPOOLPATH/RequiredIps > $SPOOLPATH/Final_Ips
 		
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Module Runner
+Runs a pipeline module's SQL steps over one pre-configured PostgreSQL session.
+
+Each `$CONNECTION_STRING -c` of a bash module forks psql, opens a connection
+and has to repeat $PG_SESSION_SETTINGS. A module can instead hand a block of
+steps to this runner: one connection, the session settings applied once,
+autocommit per step (as with psql -c), and the time of every step recorded
+in the module step metrics table.
+
+Steps file (bash heredoc or file), one step per marker line:
+
+    -- step: <name> | <error message>
+    <SQL, one or more statements>
+
+A step with an error message is fatal: on failure the runner stops and
+writes "<error code>|<error message>" to --error-file, for the module's
+error_fun (see run_module_steps in trackingHelper.sh). A step without a
+message is logged and skipped over on failure, like an unchecked psql -c.
+Rows returned by a step are printed pipe-separated on stdout (psql -qtAX).
+
+Usage:
+    python3 module_runner.py <request_id> <module> <steps_file|-> --error-code <code> \
+        [--error-file <path>] [--session-settings "<SET ...; SET ...>"]
+"""
+
+import argparse
+import logging
+import re
+import sys
+import time
+from datetime import datetime
+
+import psycopg2
+
+from config_loader import get_config
+
+cfg = get_config()
+
+# Add python modules path and import DbConns
+sys.path.append(cfg.python_modules_path)
+from DbConns import *
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+STEP_MARKER = re.compile(r"^\s*--\s*step:\s*(?P<name>[^|]+?)\s*(?:\|\s*(?P<message>.*?)\s*)?$")
+
+DONE = "DONE"
+FAILED = "FAILED"
+
+
+class StepError(Exception):
+    """A fatal step failed."""
+
+    def __init__(self, step, error):
+        super().__init__(f"Step {step['name']} failed: {error}")
+        self.step = step
+
+
+def parse_steps(text):
+    """
+    Split a steps file on its marker lines.
+
+    Returns:
+        List of {"name", "message", "sql"}; message is None for non-fatal steps
+    """
+    steps = []
+    for line in text.splitlines():
+        marker = STEP_MARKER.match(line)
+        if marker:
+            steps.append({
+                "name": marker.group("name"),
+                "message": marker.group("message") or None,
+                "sql": [],
+            })
+        elif steps:
+            steps[-1]["sql"].append(line)
+        elif line.strip() and not line.strip().startswith("--"):
+            raise ValueError("SQL found before the first '-- step:' marker")
+
+    for step in steps:
+        step["sql"] = "\n".join(step["sql"]).strip()
+    return [step for step in steps if step["sql"]]
+
+
+def ensure_step_metrics_table(cursor, table: str) -> None:
+    """Create the step metrics table if needed."""
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            request_id   int,
+            module       varchar,
+            step_no      int,
+            step_name    varchar,
+            status       varchar,
+            row_count    bigint,
+            seconds      numeric,
+            error        varchar,
+            started_at   timestamp,
+            PRIMARY KEY (request_id, module, step_no)
+        )
+    """)
+
+
+def clear_module_metrics(cursor, table: str, request_id, module: str) -> None:
+    """Forget the step timings of an earlier run of the module."""
+    cursor.execute(
+        f"DELETE FROM {table} WHERE request_id = %s AND module = %s",
+        (int(request_id), module),
+    )
+
+
+def save_step_metrics(cursor, table, request_id, module, step_no, step, status,
+                      row_count, seconds, started_at, error=None) -> None:
+    cursor.execute(
+        f"INSERT INTO {table} (request_id, module, step_no, step_name, status, row_count, "
+        f"seconds, error, started_at) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) "
+        f"ON CONFLICT (request_id, module, step_no) DO UPDATE SET step_name = EXCLUDED.step_name, "
+        f"status = EXCLUDED.status, row_count = EXCLUDED.row_count, seconds = EXCLUDED.seconds, "
+        f"error = EXCLUDED.error, started_at = EXCLUDED.started_at",
+        (int(request_id), module, step_no, step["name"], status, row_count,
+         round(seconds, 3), error, started_at),
+    )
+
+
+def _print_rows(cursor):
+    for row in cursor.fetchall():
+        print("|".join("" if value is None else str(value) for value in row))
+    sys.stdout.flush()
+
+
+def run_steps(cur, request_id, module, steps):
+    """
+    Execute the steps in order on one autocommit session.
+
+    Raises:
+        StepError: a fatal step failed (its timing is recorded first)
+    """
+    table = cfg.module_step_metrics_table
+    ensure_step_metrics_table(cur, table)
+    clear_module_metrics(cur, table, request_id, module)
+
+    for step_no, step in enumerate(steps, start=1):
+        started_at = datetime.now()
+        started = time.monotonic()
+        try:
+            cur.execute(step["sql"])
+            row_count = cur.rowcount
+            if cur.description:
+                _print_rows(cur)
+        except psycopg2.Error as e:
+            seconds = time.monotonic() - started
+            error = str(e).strip()
+            save_step_metrics(cur, table, request_id, module, step_no, step, FAILED,
+                              None, seconds, started_at, error)
+            if step["message"]:
+                raise StepError(step, error)
+            logger.warning(f"[{module}] {step['name']} failed after {seconds:.2f}s, continuing: {error}")
+            continue
+
+        seconds = time.monotonic() - started
+        save_step_metrics(cur, table, request_id, module, step_no, step, DONE,
+                          row_count, seconds, started_at)
+        logger.info(f"[{module}] {step['name']}: {row_count} rows in {seconds:.2f}s")
+
+
+def write_error(path, code, message):
+    if not path:
+        return
+    with open(path, "w") as handle:
+        handle.write(f"{code}|{message}\n")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Run a module's SQL steps in one session")
+    parser.add_argument("request_id")
+    parser.add_argument("module")
+    parser.add_argument("steps_file", help="Steps file, or - for stdin")
+    parser.add_argument("--error-code", required=True,
+                        help="Module error code reported for a failed fatal step")
+    parser.add_argument("--error-file",
+                        help="Where to write '<code>|<message>' when a fatal step fails")
+    parser.add_argument("--session-settings", default="",
+                        help="SET statements applied to the session first")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+
+    if args.steps_file == "-":
+        steps = parse_steps(sys.stdin.read())
+    else:
+        with open(args.steps_file) as handle:
+            steps = parse_steps(handle.read())
+
+    conn, cur = getPgConnection()
+    conn.autocommit = True
+    try:
+        cur.execute("SELECT set_config('application_name', %s, false)", (f"{args.module}_{args.request_id}",))
+        if args.session_settings:
+            cur.execute(args.session_settings)
+        run_steps(cur, args.request_id, args.module, steps)
+    except StepError as e:
+        logger.error(f"[{args.module}] {e}")
+        write_error(args.error_file, args.error_code, e.step["message"])
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"[{args.module}] Module runner failed: {e}")
+        write_error(args.error_file, args.error_code, f"Module runner failed in {args.module}")
+        sys.exit(1)
+    finally:
+        cur.close()
+        conn.close()
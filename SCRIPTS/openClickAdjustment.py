@@ -2,7 +2,6 @@ import pandas as pd
 from sqlalchemy import *
 import psycopg2
 import sys
-import subprocess
 import os
 
 # Import configuration loader
@@ -15,6 +14,8 @@ cfg = get_config()
 sys.path.append(cfg.python_modules_path)
 from DbConns import *
 
+import process_tracking
+
 # Global connection and cursor (will be initialized in main)
 conn = None
 cursor = None
@@ -92,15 +93,7 @@ if __name__ == "__main__":
     request_id = sys.argv[1]
 
     # Track this process
-    track_command = f"""
-    track_process() {{
-        source {cfg.get_config_properties_path(request_id)}
-        source {cfg.tracking_helper_path}
-        append_process_id $1 "OPEN_CLICK_ADJUSTMENT"
-    }}
-    track_process {request_id}
-    """
-    subprocess.run(["bash", "-c", track_command], check=False)
+    process_tracking.track_process(request_id, "OPEN_CLICK_ADJUSTMENT")
 
     # Initialize global connection
     conn, cursor = getPgConnection()
@@ -82,6 +82,7 @@ fi
 
                   
 
+                  trt_header=`$CONNECTION_STRING  --pset footer  -qAX -c "select * from $TRT_TABLE limit 1" | head -1 | sed 's/|/,/g'`
                   trt_header_1=`$CONNECTION_STRING  --pset footer  -qAX -c "select * from $TRT_TABLE limit 1" | head -1 | sed 's/|/ varchar,/g'`
 
 
@@ -94,6 +95,8 @@ fi
                           exit
                   fi
 
+                  # Partitions are unlogged: PARTITION_SRC is a scratch copy that the delivered consumers
+                  # delete from, rebuilt from SRC_TABLE on a code 5 retry, so its rows and indexes skip WAL
                   $CONNECTION_STRING -qtAX -c "select distinct del_date from $REPORT_TABLE "  > $SPOOLPATH/uniq_deldates
 
 
@@ -103,7 +106,7 @@ fi
 
                           part_src_table=$PARTITION_SRC\_$date1
 
-                          $CONNECTION_STRING -vv -c "create table $part_src_table PARTITION OF $PARTITION_SRC FOR VALUES IN ('$date_')"
+                          $CONNECTION_STRING -vv -c "create unlogged table $part_src_table PARTITION OF $PARTITION_SRC FOR VALUES IN ('$date_')"
 
                           if [[ $? -ne 0 ]]
                           then
@@ -118,7 +121,8 @@ fi
 
 		                  #+== INSERT SRC INTO PARTITION SOURCE TABLE ===#
 
-                  $CONNECTION_STRING -vv -c "insert into $PARTITION_SRC select * from $SRC_TABLE "
+                  # SRC's rnd pick key stays behind: the postback tables do not carry it
+                  $CONNECTION_STRING -vv -c "insert into $PARTITION_SRC($trt_header,status,unsub,freq,flag,del_date,id,touch) select $trt_header,status,unsub,freq,flag,del_date,id,touch from $SRC_TABLE "
 
                   if [[ $? -ne 0 ]]
                   then
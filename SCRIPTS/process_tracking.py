@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Process Tracking Module
+Native replacement for append_process_id in trackingHelper.sh.
+
+Every tracked process gets one row (request_id, pid, module_name) in the
+process tracking table, indexed on request_id, written with a single INSERT
+over a per-process connection. cancelRequest.sh reads the PIDs of a request
+from there instead of parsing the comma-separated process_ids column.
+
+Module-level entries (RLTP_MAIN, SUPP, SRC, ...) also refresh current_module
+and status on the request's row in the tracking table. Pool workers skip that
+so they never queue on the same row lock.
+
+CLI (used by trackingHelper.sh):
+    python3 process_tracking.py <request_id> <module_name> [pid] [--worker]
+"""
+
+import os
+import socket
+import sys
+
+import psycopg2
+
+from config_loader import get_config
+
+cfg = get_config()
+
+# Per-process connection, reopened after fork
+_conn = None
+_conn_pid = None
+_table_ready = False
+
+
+def _get_connection():
+    """Return this process's tracking connection, opening it on first use."""
+    global _conn, _conn_pid, _table_ready
+    if _conn is None or _conn.closed or _conn_pid != os.getpid():
+        _conn = psycopg2.connect(
+            host=cfg.db_host,
+            port=cfg.db_port,
+            dbname=cfg.db_name,
+            user=cfg.db_user,
+            password=cfg.db_password or None,
+        )
+        _conn_pid = os.getpid()
+        _table_ready = False
+    return _conn
+
+
+def ensure_process_table(cursor, table: str) -> None:
+    """Create the process tracking table and its request_id index if missing."""
+    cursor.execute(f"SELECT to_regclass('{table}') IS NOT NULL")
+    if cursor.fetchone()[0]:
+        return
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            request_id   int,
+            pid          int,
+            module_name  varchar,
+            host_server  varchar,
+            created_by   varchar,
+            started_at   timestamp DEFAULT now(),
+            PRIMARY KEY (request_id, pid, module_name)
+        )
+    """)
+    cursor.execute(
+        f"CREATE INDEX IF NOT EXISTS {table}_request_idx ON {table} (request_id)"
+    )
+
+
+def track_process(request_id, module_name: str, pid: int = None, worker: bool = False) -> bool:
+    """
+    Record a running process for a request. Failures are reported on stderr
+    and never raised: tracking must not stop a module.
+
+    Args:
+        request_id: Request being processed
+        module_name: Module label, e.g. "RLTP_MAIN" or "RLTP_WORKER_3"
+        pid: Process id to record (defaults to the calling process)
+        worker: Pool worker entry; only the process row is written
+
+    Returns:
+        True if the process was recorded
+    """
+    global _table_ready
+    try:
+        conn = _get_connection()
+    except Exception as e:
+        print(f"Process tracking failed: {e}", file=sys.stderr)
+        return False
+
+    cursor = conn.cursor()
+    try:
+        table = cfg.process_tracking_table
+        if not _table_ready:
+            ensure_process_table(cursor, table)
+            _table_ready = True
+
+        cursor.execute(
+            f"INSERT INTO {table} (request_id, pid, module_name, host_server, created_by) "
+            f"VALUES (%s, %s, %s, %s, %s) ON CONFLICT DO NOTHING",
+            (int(request_id), pid or os.getpid(), module_name,
+             socket.gethostname(), os.environ.get("USER", "")),
+        )
+
+        if not worker:
+            cursor.execute(
+                f"UPDATE {cfg.tracking_table} "
+                f"SET current_module = %s, last_updated = NOW(), status = 'RUNNING' "
+                f"WHERE request_id = %s",
+                (module_name, int(request_id)),
+            )
+            if cursor.rowcount == 0:
+                cursor.execute(
+                    f"INSERT INTO {cfg.tracking_table} "
+                    f"(request_id, module_sequence, current_module, start_time, last_updated, status, created_by) "
+                    f"VALUES (%s, %s, %s, NOW(), NOW(), 'RUNNING', %s)",
+                    (int(request_id), module_name, module_name, os.environ.get("USER", "")),
+                )
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"Process tracking failed: {e}", file=sys.stderr)
+        return False
+    finally:
+        cursor.close()
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--worker"]
+    if len(args) < 2:
+        print("Usage: python3 process_tracking.py <request_id> <module_name> [pid] [--worker]")
+        sys.exit(1)
+
+    # Default to the calling shell's PID, like $$ in append_process_id
+    track_process(
+        args[0],
+        args[1],
+        int(args[2]) if len(args) > 2 else os.getppid(),
+        worker="--worker" in sys.argv,
+    )
+    sys.exit(0)
@@ -104,7 +104,7 @@ then
 
         rm -rf "$HOMEPATH"
 
-        $CONNECTION_STRING -vv -c "drop table if exists $TRT_TABLE , $ARCA_GENUINE_DEL_TEMP , $GREEN_DELIVERED_TEMP, $GREEN_OPENS_TEMP , $GREEN_CLICKS_TEMP , $GREEN_UNSUBS_TEMP , $GREEN_FINAL_TEMP , $ORANGE_GENUNIE_DELIVERED ,$ORANGE_DEPLOY_IDS_TABLE , $ORANGE_GENUINE_DEL_TEMP , $GREEN_TOTAL_UNSUBS_TEMP , $SUPP_TABLE,$PARTITION_SRC ,  $SRC_TABLE, $UNIQ_SRC_TABLE , $PB_TABLE , $REPORT_TABLE , $DECILE_TABLE , $UNIQ_GEN_TABLE , $REPLACE_IP_TABLE , $REPLACE_TIMESTAMP_TABLE"
+        $CONNECTION_STRING -vv -c "drop table if exists $TRT_TABLE , $TRT_CHECKPOINT_TABLE , $ARCA_GENUINE_DEL_TEMP , $GREEN_DELIVERED_TEMP, $GREEN_OPENS_TEMP , $GREEN_CLICKS_TEMP , $GREEN_UNSUBS_TEMP , $GREEN_FINAL_TEMP , $ORANGE_GENUNIE_DELIVERED ,$ORANGE_DEPLOY_IDS_TABLE , $ORANGE_GENUINE_DEL_TEMP , $GREEN_TOTAL_UNSUBS_TEMP , $SUPP_TABLE,$PARTITION_SRC ,  $SRC_TABLE, $UNIQ_SRC_TABLE , $PB_TABLE , $REPORT_TABLE , $DECILE_TABLE , $UNIQ_GEN_TABLE , $REPLACE_IP_TABLE , $REPLACE_TIMESTAMP_TABLE"
 
         $PGDB2_CONN_STRING -vv -c "drop table if exists $ARCA_GENUINE_DEL_TEMP"
 
@@ -145,7 +145,10 @@ then
 
     if [[ $request_error_code == '1' ]]
     then
-        $CONNECTION_STRING -vv -c "drop table if exists $TRT_TABLE , $ARCA_GENUINE_DEL_TEMP , $GREEN_DELIVERED_TEMP, $GREEN_OPENS_TEMP , $GREEN_CLICKS_TEMP , $GREEN_UNSUBS_TEMP , $GREEN_FINAL_TEMP , $ORANGE_GENUNIE_DELIVERED ,$ORANGE_DEPLOY_IDS_TABLE , $ORANGE_GENUINE_DEL_TEMP , $GREEN_TOTAL_UNSUBS_TEMP , $SUPP_TABLE,$PARTITION_SRC ,  $SRC_TABLE, $UNIQ_SRC_TABLE , $PB_TABLE , $REPORT_TABLE , $DECILE_TABLE , $UNIQ_GEN_TABLE , $REPLACE_IP_TABLE , $REPLACE_TIMESTAMP_TABLE"
+        # TRT_TABLE and TRT_CHECKPOINT_TABLE are kept: rltpDataPulling.py resumes
+        # from the checkpoint and only re-pulls the unfinished (query, decile) slices
+        # (rebuilt in full once suppression has run or the query/deciles changed)
+        $CONNECTION_STRING -vv -c "drop table if exists $ARCA_GENUINE_DEL_TEMP , $GREEN_DELIVERED_TEMP, $GREEN_OPENS_TEMP , $GREEN_CLICKS_TEMP , $GREEN_UNSUBS_TEMP , $GREEN_FINAL_TEMP , $ORANGE_GENUNIE_DELIVERED ,$ORANGE_DEPLOY_IDS_TABLE , $ORANGE_GENUINE_DEL_TEMP , $GREEN_TOTAL_UNSUBS_TEMP , $SUPP_TABLE,$PARTITION_SRC ,  $SRC_TABLE, $UNIQ_SRC_TABLE , $PB_TABLE , $REPORT_TABLE , $DECILE_TABLE , $UNIQ_GEN_TABLE , $REPLACE_IP_TABLE , $REPLACE_TIMESTAMP_TABLE"
 
         $PGDB2_CONN_STRING -vv -c "drop table if exists $ARCA_GENUINE_DEL_TEMP"
 
@@ -54,9 +54,6 @@ IFS=$',' read -r max_date_1 min_date <<< "$RANGE"
 
 max_date=`date -d "$max_date_1 1 days" +%Y-%m-%d`
 
-formatted_max_date=$(echo "$max_date" | sed 's/-//g')
-formatted_min_date=$(echo "$min_date" | sed 's/-//g')
-
 
 creatives=`echo $CREATIVE_ID | sed "s/\b\([0-9]\+\)\b/'\1'/g"|tr ' ' ','`
 
@@ -66,358 +63,19 @@ orange_cake_offids=`$CONNECTION_STRING -qtAX -c "select DISTINCT trim(OFFERID)
 
 
 
-#=== Green Delivered ===#
-
-
-$SF_STRING -q "SELECT DISTINCT TOADDRESS,TO_CHAR(TO_DATE(TIMELOGGED_DATE, 'YYYYMMDD'), 'YYYY-MM-DD') DEL_DATE,SUBID,BOUNCECAT FROM GREEN.LIST_PROCESSING.PMTA_LOG_SUMMARY_ACTIVE_HISTORICAL WHERE OFFERID IN ($offers) AND TIMELOGGED_DATE BETWEEN '$formatted_min_date' and '$formatted_max_date' and (BOUNCECAT='success' or DELIVEREDSTATUS='Hard Bounce') and  REGEXP_LIKE(listId, '^[0-9]+$') and type in ('d','b')  ;" -o output_format=csv -o header=true -o timing=false -o friendly=false -o variable_substitution=false  | tr ',' '|' | sed 's/"//g'   >$SPOOLPATH/delivered
-
-
-if [[ $? -ne 0 ]]
-then
-
-        sleep 5s
-
-        $SF_STRING -q "SELECT DISTINCT TOADDRESS,TO_CHAR(TO_DATE(TIMELOGGED_DATE, 'YYYYMMDD'), 'YYYY-MM-DD') DEL_DATE,SUBID,BOUNCECAT FROM GREEN.LIST_PROCESSING.PMTA_LOG_SUMMARY_ACTIVE_HISTORICAL WHERE OFFERID IN ($offers) AND TIMELOGGED_DATE BETWEEN '$formatted_min_date' and '$formatted_max_date' and (BOUNCECAT='success' or DELIVEREDSTATUS='Hard Bounce') and  REGEXP_LIKE(listId, '^[0-9]+$') and type in ('d','b') ;" -o output_format=csv -o header=true -o timing=false -o friendly=false -o variable_substitution=false  | tr ',' '|' | sed 's/"//g'   >$SPOOLPATH/delivered
-
-
-        if [[ $? -ne 0 ]]
-        then
+#=== Green Delivered, Opens, Clicks & Unsubs ===#
+# Pulled concurrently from Snowflake and loaded straight into the GREEN_*_TEMP tables (see green_responders.py)
 
-                error_fun "2" "Unable to fetch delivered data from impala table."
-                exit
-
-        fi
-fi
-
-
-
-$CONNECTION_STRING -vv -c "DROP table IF EXISTS  $GREEN_DELIVERED_TEMP "
-$CONNECTION_STRING -vv -c "create table $GREEN_DELIVERED_TEMP (ID SERIAL,email  varchar ,del_date varchar,subid varchar,bouncecat varchar) "
+python3 $SCRIPTPATH/green_responders.py "$REQUEST_ID" "$offers" "$min_date" "$max_date" --delivered-table "$GREEN_DELIVERED_TEMP" --opens-table "$GREEN_OPENS_TEMP" --clicks-table "$GREEN_CLICKS_TEMP" --total-unsubs-table "$GREEN_TOTAL_UNSUBS_TEMP" --unsubs-table "$GREEN_UNSUBS_TEMP" --final-table "$GREEN_FINAL_TEMP" --non-unique
 
 if [[ $? -ne 0 ]]
 then
 
-        error_fun "2" "Unable to create Green delivered table."
+        error_fun "2" "Unable to pull Green delivered and responders from snowflake."
         exit
 
 fi
 
-$CONNECTION_STRING -vv -c "\copy $GREEN_DELIVERED_TEMP(email,del_date,subid,bouncecat)  from '$SPOOLPATH/delivered' with delimiter '|' header csv "
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "2" "Unable to load Green delivered data into table."
-        exit
-
-fi
-
-
-#=== Green opens ===#
-
-$SF_STRING -q "select distinct EMAILID,OPENDATE,SUBID from GREEN.GREEN_LPT.RAW_OPENS_FOLLOWUP where OPENDATE>='$min_date' and OFFERID in ($offers);" -o output_format=csv -o header=true -o timing=false -o friendly=false -o variable_substitution=false  | tr ',' '|' | sed 's/"//g'  >$SPOOLPATH/opens
-
-if [[ $? -ne 0 ]]
-then
-
-        sleep 5s
-
-        $SF_STRING -q "select distinct EMAILID,OPENDATE,SUBID from GREEN.GREEN_LPT.RAW_OPENS_FOLLOWUP where OPENDATE>='$min_date' and OFFERID in ($offers);" -o output_format=csv -o header=true -o timing=false -o friendly=false -o variable_substitution=false  | tr ',' '|' | sed 's/"//g'  >$SPOOLPATH/opens
-
-
-        if [[ $? -ne 0 ]]
-        then
-
-                error_fun "2" "Unable to fetch green opens from impala table."
-                exit
-
-        fi
-
-
-fi
-
-
-
-$CONNECTION_STRING -vv -c "DROP table IF EXISTS  $GREEN_OPENS_TEMP "
-$CONNECTION_STRING -vv -c "create table $GREEN_OPENS_TEMP (id SERIAL ,email  varchar ,OPEN_DATE varchar,subid varchar) "
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "2" "Unable to create Green Opens table."
-        exit
-
-fi
-
-
-$CONNECTION_STRING -vv -c "\copy $GREEN_OPENS_TEMP(email,OPEN_DATE,subid)  from '$SPOOLPATH/opens' with delimiter '|' header csv "
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "2" "Unable to load Green Opens data into table."
-        exit
-
-fi
-
-
-
-#=== Green clicks ===#
-
-
-$SF_STRING -q "select distinct EMAILID,CLICKDATE,SUBID from GREEN.LIST_PROCESSING.RAW_CLICKS_FOLLOWUP_SF where CLICKDATE>='$min_date' and OFFERID in ($offers);" -o output_format=csv -o header=true -o timing=false -o friendly=false -o variable_substitution=false  | tr ',' '|' | sed 's/"//g'  >$SPOOLPATH/clicks
-
-if [[ $? -ne 0 ]]
-then
-
-        sleep 5s
-
-        $SF_STRING -q "select distinct EMAILID,CLICKDATE,SUBID from GREEN.LIST_PROCESSING.RAW_CLICKS_FOLLOWUP_SF where CLICKDATE>='$min_date' and OFFERID in ($offers);" -o output_format=csv -o header=true -o timing=false -o friendly=false -o variable_substitution=false  | tr ',' '|' | sed 's/"//g'  >$SPOOLPATH/clicks
-
-
-        if [[ $? -ne 0 ]]
-        then
-
-                error_fun "2" "Unable to pull green clicks from impala table"
-
-        fi
-
-fi
-
-$CONNECTION_STRING -vv -c "DROP table IF EXISTS  $GREEN_CLICKS_TEMP "
-$CONNECTION_STRING -vv -c "create table $GREEN_CLICKS_TEMP (id SERIAL ,email  varchar ,CLICK_DATE varchar,subid varchar) "
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "2" "Unable to create Green Clicks table."
-        exit
-
-fi
-
-
-
-$CONNECTION_STRING -vv -c "\copy $GREEN_CLICKS_TEMP(email,CLICK_DATE,subid)  from '$SPOOLPATH/clicks' with delimiter '|' header csv "
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "2" "Unable to load  Green Clicks data into table."
-        exit
-
-fi
-
-
-#==== GREEN ALL UNSUBS ===#
-
-
-$SF_STRING -q "select distinct email from GREEN.LIST_PROCESSING.APT_UNSUB_DETAILS_SF where  offerid in ($offers) and to_date(LASTUNSUBDATE)<'$min_date' "  -o output_format=csv -o header=true -o timing=false -o friendly=false -o variable_substitution=false  | tr ',' '|' | sed 's/"//g'   > $SPOOLPATH/green_all_unsubs
-
-if [[ $? -ne 0 ]]
-then
-
-        sleep 5s
-
-        $SF_STRING -q "select distinct email from GREEN.LIST_PROCESSING.APT_UNSUB_DETAILS_SF where  offerid in ($offers) and to_date(LASTUNSUBDATE)<'$min_date'"  -o output_format=csv -o header=true -o timing=false -o friendly=false -o variable_substitution=false  | tr ',' '|' | sed 's/"//g'   > $SPOOLPATH/green_all_unsubs
-
-        if [[ $? -ne 0 ]]
-        then
-
-                error_fun "2" "Unable to pull green unsubs  from impala table"
-
-        fi
-
-fi
-
-
-
-$CONNECTION_STRING -vv -c "DROP table IF EXISTS  $GREEN_TOTAL_UNSUBS_TEMP  "
-
-$CONNECTION_STRING -vv -c "create table $GREEN_TOTAL_UNSUBS_TEMP (email  varchar unique) "
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "2" "Unable to create Green Unsubs table."
-        exit
-
-fi
-
-$CONNECTION_STRING -vv -c "copy $GREEN_TOTAL_UNSUBS_TEMP(email)  from '$SPOOLPATH/green_all_unsubs' with delimiter '|' header csv "
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "2" "Unable to load data into Green Unsubs table."
-        exit
-
-fi
-
-#tmp_indx_name="gr_tmp_idx_$REQUEST_ID"
-#
-#$CONNECTION_STRING -vv -c "create index $tmp_indx_name on $GREEN_TOTAL_UNSUBS_TEMP(UNSUB_DATE)"
-
-#=== Green Unsubs ===#
-
-$SF_STRING -q "select email,to_date(LASTUNSUBDATE),subid from GREEN.LIST_PROCESSING.APT_UNSUB_DETAILS_SF where  offerid in ($offers) and to_date(LASTUNSUBDATE)>='$min_date' " -o output_format=csv -o header=true -o timing=false -o friendly=false -o variable_substitution=false | tr '\t' '|' > $SPOOLPATH/unsubs
-
-if [[ $? -ne 0 ]]
-then
-
-        sleep 5s
-
-        $SF_STRING -q "select email,to_date(LASTUNSUBDATE),subid from GREEN.LIST_PROCESSING.APT_UNSUB_DETAILS_SF where  offerid in ($offers) and to_date(LASTUNSUBDATE)>='$min_date' " -o output_format=csv -o header=true -o timing=false -o friendly=false -o variable_substitution=false | tr '\t' '|' > $SPOOLPATH/unsubs
-
-        if [[ $? -ne 0 ]]
-        then
-
-                error_fun "2" "Unable to pull green unsubs from impala table"
-
-        fi
-
-fi
-
-
-
-$CONNECTION_STRING -vv -c "DROP table IF EXISTS  $GREEN_UNSUBS_TEMP "
-$CONNECTION_STRING -vv -c "create table $GREEN_UNSUBS_TEMP (id SERIAL ,email  varchar ,UNSUB_DATE varchar,subid varchar) "
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "2" "Unable to create Green Unsubs table."
-        exit
-
-fi
-
-$CONNECTION_STRING -vv -c "\copy $GREEN_UNSUBS_TEMP(email,UNSUB_DATE,subid)  from '$SPOOLPATH/unsubs' with delimiter '|' header csv "
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "2" "Unable to load data into Green Unsubs table."
-        exit
-
-fi
-
-
-
-
-#====== final table ===#
-
-
-$CONNECTION_STRING -vv -c "DROP table IF EXISTS  $GREEN_FINAL_TEMP "
-$CONNECTION_STRING -vv -c "CREATE TABLE $GREEN_FINAL_TEMP(EMAIL VARCHAR,DEL_DATE VARCHAR ,OPEN_DATE VARCHAR,CLICK_DATE VARCHAR,UNSUB_DATE VARCHAR, STATUS INT DEFAULT 1 , SUBID VARCHAR, UNSUB INT DEFAULT 0,unique(email,del_date))"
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "2" "Unable to create Green Final Delivered table."
-        exit
-
-fi
-
-$CONNECTION_STRING -vv -c "create index subid_index_final_$REQUEST_ID  on $GREEN_FINAL_TEMP( SUBID)"
-
-#=== BOUNCES INSERT ===#
-
-#$CONNECTION_STRING -vv -c " INSERT INTO $GREEN_FINAL_TEMP (EMAIL,DEL_DATE,STATUS) SELECT EMAIL,DEL_DATE,-1 FROM $GREEN_DELIVERED_TEMP where bouncecat <> ('success')  ON CONFLICT DO NOTHING"
-
-#if [[ $? -ne 0 ]]
-#then
-#
-#        error_fun "2" "Unable to insert  Green Bounces into Final Green Delivered table."
-#        exit
-#
-#fi
-
-
-#=== UNSUBS INSERT ===#
-
-$CONNECTION_STRING -vv -c " INSERT INTO $GREEN_FINAL_TEMP (EMAIL,DEL_DATE,OPEN_DATE,UNSUB_DATE,STATUS,SUBID,UNSUB) SELECT A.EMAIL,B.DEL_DATE,A.UNSUB_DATE,A.UNSUB_DATE,2,A.SUBID,1 FROM $GREEN_UNSUBS_TEMP A , $GREEN_DELIVERED_TEMP B WHERE A.EMAIL=B.EMAIL AND A.SUBID=B.SUBID and A.EMAIL=B.EMAIL ON CONFLICT DO NOTHING"
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "2" "Unable to insert  Green Unsubs into Final Green Delivered table."
-        exit
-
-fi
-
-#$CONNECTION_STRING -vv -c " INSERT INTO $GREEN_FINAL_TEMP (EMAIL,OPEN_DATE,UNSUB_DATE,STATUS,SUBID,UNSUB) SELECT A.EMAIL,A.UNSUB_DATE,A.UNSUB_DATE,2,A.SUBID,1 FROM $GREEN_UNSUBS_TEMP A  ON CONFLICT DO NOTHING"
-
-
- #=== CLICKS INSERT ===#
-
-$CONNECTION_STRING -vv -c " INSERT INTO $GREEN_FINAL_TEMP (EMAIL,DEL_DATE,OPEN_DATE,CLICK_DATE,STATUS,SUBID) SELECT A.EMAIL,B.DEL_DATE,A.CLICK_DATE,A.CLICK_DATE,3,A.SUBID FROM $GREEN_CLICKS_TEMP A ,  $GREEN_DELIVERED_TEMP B WHERE A.EMAIL=B.EMAIL AND A.SUBID=B.SUBID ON CONFLICT DO NOTHING"
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "2" "Unable to insert  Green Clicks into Final Green Delivered table."
-        exit
-
-fi
-
-#$CONNECTION_STRING -vv -c " INSERT INTO $GREEN_FINAL_TEMP (EMAIL,OPEN_DATE,CLICK_DATE,STATUS,SUBID) SELECT A.EMAIL,A.CLICK_DATE,A.CLICK_DATE,3,A.SUBID FROM $GREEN_CLICKS_TEMP A  ON CONFLICT DO NOTHING"
-
-
-
-#==== OPENS INSERT ===#
-
-$CONNECTION_STRING -vv -c " INSERT INTO $GREEN_FINAL_TEMP (EMAIL,DEL_DATE,OPEN_DATE,STATUS,SUBID) SELECT A.EMAIL,B.DEL_DATE,A.OPEN_DATE,2,A.SUBID FROM $GREEN_OPENS_TEMP A ,  $GREEN_DELIVERED_TEMP B WHERE A.EMAIL=B.EMAIL AND A.SUBID=B.SUBID ON CONFLICT DO NOTHING"
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "2" "Unable to insert  Green Opens into Final Green Delivered table."
-        exit
-
-fi
-
-#$CONNECTION_STRING -vv -c " INSERT INTO $GREEN_FINAL_TEMP (EMAIL,OPEN_DATE,STATUS,SUBID) SELECT A.EMAIL,A.OPEN_DATE,2,A.SUBID FROM $GREEN_OPENS_TEMP A ON CONFLICT DO NOTHING"
-
-
-
-#=== DELIVERED INSERT ===#
-
-$CONNECTION_STRING -vv -c " INSERT INTO $GREEN_FINAL_TEMP (EMAIL,DEL_DATE,STATUS,SUBID) SELECT EMAIL,DEL_DATE,1,SUBID FROM  $GREEN_DELIVERED_TEMP ON CONFLICT DO NOTHING"
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "2" "Unable to insert  Green Delivered into Final Green Delivered table."
-                exit
-
-fi
-
-#================================================== FINAL INSERT ===#
-
-
-$CONNECTION_STRING -vv -c "CREATE TABLE $UNIQ_GEN_TABLE(EMAIL VARCHAR ,DEL_DATE VARCHAR ,OPEN_DATE VARCHAR,CLICK_DATE VARCHAR,UNSUB_DATE VARCHAR, STATUS INT DEFAULT 1 , SUBID VARCHAR, UNSUB INT DEFAULT 0,CHANNEL VARCHAR,unique(email,del_date) )"
-
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "2" "Unable to create genuine delivered table"
-                exit
-
-fi
-
-$CONNECTION_STRING -vv -c " INSERT INTO $UNIQ_GEN_TABLE (EMAIL,DEL_DATE,OPEN_DATE,CLICK_DATE,UNSUB_DATE,STATUS,SUBID,UNSUB,CHANNEL) SELECT  EMAIL,DEL_DATE,OPEN_DATE,CLICK_DATE,UNSUB_DATE,STATUS,SUBID,UNSUB,'Green' FROM  $GREEN_FINAL_TEMP ON CONFLICT DO NOTHING"
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "2" "Unable to insert green genuine delivered data into final table"
-                exit
-
-fi
-
-
-
-$CONNECTION_STRING -vv -c "DROP table IF EXISTS  $GREEN_DELIVERED_TEMP , $GREEN_OPENS_TEMP , $GREEN_CLICKS_TEMP , $GREEN_UNSUBS_TEMP , $GREEN_FINAL_TEMP "
 
 
 
@@ -493,24 +151,6 @@ then
 
 fi
 
-#========= ALL CHANNELS FINAL UNIQUE GEN TABLE ====#
-
-
-$CONNECTION_STRING -vv -c " INSERT INTO $UNIQ_GEN_TABLE (EMAIL,DEL_DATE,OPEN_DATE,CLICK_DATE,STATUS,CHANNEL) SELECT  EMAIL,DEL_DATE,OPEN_DATE,CLICK_DATE,STATUS,'Arcamax' FROM  $ARCA_GENUINE_DEL_TEMP order by status desc ON CONFLICT DO NOTHING"
-
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "2" "Unable to insert arca genuine delivered data into final table"
-                exit
-
-fi
-
-
-$CONNECTION_STRING -vv -c "DROP table IF EXISTS  $ARCA_GENUINE_DEL_TEMP "
-
-
 #=====================================ORANGE DATA PULLING =========================================#
 
 orange_offerids=`$ORANGE_STRING -A -ss -e "Select distinct offer_id from mt_offer_cake_offer_mappings where cake_offer_id in ($orange_cake_offids) " | tr '\n' ',' | sed "s/,$//g" `
@@ -590,116 +230,81 @@ then
 
         fi
 
-        #===== FINAL ORANGE DELIVERED TABLE ====#
-
-        $CONNECTION_STRING -vv -c "DROP table IF EXISTS  $ORANGE_GENUNIE_DELIVERED "
-        $CONNECTION_STRING -vv -c "CREATE TABLE $ORANGE_GENUNIE_DELIVERED(EMAIL VARCHAR ,DEL_DATE VARCHAR ,OPEN_DATE VARCHAR,CLICK_DATE VARCHAR,UNSUB_DATE VARCHAR, STATUS INT DEFAULT 1 , SUBID VARCHAR, UNSUB INT DEFAULT 0,deploy_id varchar,unique(email,del_date))"
-
-        if [[ $? -ne 0 ]]
-        then
-
-                error_fun "2" "Unable to create Orange Final Delivered table."
-                exit
-
-        fi
+else
 
-        #=== BOUNCES INSERT ===#
+        $CONNECTION_STRING -vv -c "DROP table IF EXISTS  $ORANGE_GENUINE_DEL_TEMP , $ORANGE_DEPLOY_IDS_TABLE "
+        $CONNECTION_STRING -vv -c "create table $ORANGE_GENUINE_DEL_TEMP (email varchar ,date_ varchar,STATUS INT,deploy_id varchar  ) "
+        $CONNECTION_STRING -vv -c "create table $ORANGE_DEPLOY_IDS_TABLE (deploy_id varchar ,sent_date varchar  ) "
 
-        $CONNECTION_STRING -vv -c "INSERT INTO $ORANGE_GENUNIE_DELIVERED(EMAIL,STATUS,deploy_id) SELECT EMAIL,'-1',deploy_id from $ORANGE_GENUINE_DEL_TEMP where STATUS='10' on conflict do nothing"
+fi
 
-        if [[ $? -ne 0 ]]
-        then
 
-                error_fun "2" "Unable to insert bounces into orange final table."
-                exit
+#========= ALL CHANNELS FINAL UNIQUE GEN TABLE ====#
+# One ranked merge of every channel's events: per email and delivered date the first channel wins (Green, Arcamax, Orange)
+# and within it the first event of the former insert order (unsub, click, open, delivered; Arcamax and Orange by status desc).
+# Rows without a delivered date are all kept, as the unique(email,del_date) key did. The key is built once the table is loaded.
 
-        fi
 
-        #=== UNSUBS INSERT ===#
+$CONNECTION_STRING -vv -c "CREATE TABLE $UNIQ_GEN_TABLE(EMAIL VARCHAR ,DEL_DATE VARCHAR ,OPEN_DATE VARCHAR,CLICK_DATE VARCHAR,UNSUB_DATE VARCHAR, STATUS INT DEFAULT 1 , SUBID VARCHAR, UNSUB INT DEFAULT 0,CHANNEL VARCHAR )"
 
-        $CONNECTION_STRING -vv -c "INSERT INTO $ORANGE_GENUNIE_DELIVERED(EMAIL,OPEN_DATE,UNSUB_DATE,STATUS,UNSUB,deploy_id) SELECT EMAIL,date_,date_,2,1,deploy_id from $ORANGE_GENUINE_DEL_TEMP where STATUS='7' on conflict do nothing"
 
-        if [[ $? -ne 0 ]]
-        then
+if [[ $? -ne 0 ]]
+then
 
-                error_fun "2" "Unable to insert Unsubs into orange final table."
+        error_fun "2" "Unable to create genuine delivered table"
                 exit
 
-        fi
-
-        #=== CLICKS INSERT ===#
-
-        $CONNECTION_STRING -vv -c "INSERT INTO $ORANGE_GENUNIE_DELIVERED(EMAIL,OPEN_DATE,click_date,STATUS,deploy_id) SELECT EMAIL,date_,date_,3,deploy_id from $ORANGE_GENUINE_DEL_TEMP where STATUS='2' on conflict do nothing"
-
-        if [[ $? -ne 0 ]]
-        then
-
-                error_fun "2" "Unable to insert clicks into orange final table."
-                exit
+fi
 
-        fi
+#=== Green events: already collapsed in Snowflake into GREEN_FINAL_TEMP (processing.responders.snowflake_dedup) or ranked from the raw pulls ===#
 
-        #=== OPENS INSERT ===#
+green_collapsed=`$CONNECTION_STRING -qtAX -c "select to_regclass('$GREEN_FINAL_TEMP') is not null"`
 
-        $CONNECTION_STRING -vv -c "INSERT INTO $ORANGE_GENUNIE_DELIVERED(EMAIL,OPEN_DATE,STATUS,deploy_id) SELECT EMAIL,date_,2,deploy_id from $ORANGE_GENUINE_DEL_TEMP where STATUS='1' on conflict do nothing"
+if [[ $green_collapsed == "t" ]]
+then
 
-        if [[ $? -ne 0 ]]
-        then
+        green_events="select email,del_date,open_date,click_date,unsub_date,status,subid,unsub,'Green' channel,1 channel_rank,event_rank from $GREEN_FINAL_TEMP"
 
-                error_fun "2" "Unable to insert OPENS into orange final table."
-                exit
+else
 
-        fi
+        green_events="select a.email,b.del_date,a.unsub_date open_date,null click_date,a.unsub_date,2 status,a.subid,1 unsub,'Green' channel,1 channel_rank,1 event_rank from $GREEN_UNSUBS_TEMP a join $GREEN_DELIVERED_TEMP b on a.email=b.email and a.subid=b.subid
+        union all
+        select a.email,b.del_date,a.click_date,a.click_date,null,3,a.subid,0,'Green',1,2 from $GREEN_CLICKS_TEMP a join $GREEN_DELIVERED_TEMP b on a.email=b.email and a.subid=b.subid
+        union all
+        select a.email,b.del_date,a.open_date,null,null,2,a.subid,0,'Green',1,3 from $GREEN_OPENS_TEMP a join $GREEN_DELIVERED_TEMP b on a.email=b.email and a.subid=b.subid
+        union all
+        select email,del_date,null,null,null,1,subid,0,'Green',1,4 from $GREEN_DELIVERED_TEMP"
 
-        #=== DELIVERED INSERT ===#
+fi
 
-        $CONNECTION_STRING -vv -c "INSERT INTO $ORANGE_GENUNIE_DELIVERED(EMAIL,deploy_id) SELECT EMAIL,deploy_id from $ORANGE_GENUINE_DEL_TEMP where STATUS=4 on conflict do nothing"
+$CONNECTION_STRING -vv -c "with events as (
+    $green_events
+    union all
+    select email,del_date,open_date,click_date,null,status,null,0,'Arcamax',2,-status from $ARCA_GENUINE_DEL_TEMP
+    union all
+    select email,sent_date,open_date,click_date,null,status,null,0,'Orange',3,-status from ( select a.email,b.sent_date,(case when a.STATUS in (7,2,1) then a.date_ end) open_date,(case when a.STATUS=2 then a.date_ end) click_date,(case a.STATUS when 10 then -1 when 7 then 2 when 2 then 3 when 1 then 2 else 1 end) status from $ORANGE_GENUINE_DEL_TEMP a left join $ORANGE_DEPLOY_IDS_TABLE b on a.deploy_id=b.deploy_id where a.STATUS in (10,7,2,1,4) ) o
+) INSERT INTO $UNIQ_GEN_TABLE (EMAIL,DEL_DATE,OPEN_DATE,CLICK_DATE,UNSUB_DATE,STATUS,SUBID,UNSUB,CHANNEL) select email,del_date,open_date,click_date,unsub_date,status,subid,unsub,channel from ( select *,row_number() over (partition by email,del_date order by channel_rank,event_rank) rn from events ) x where rn=1 or del_date is null order by channel_rank,event_rank"
 
-        if [[ $? -ne 0 ]]
-        then
+if [[ $? -ne 0 ]]
+then
 
-                error_fun "2" "Unable to insert delivered into orange final table."
+        error_fun "2" "Unable to insert genuine delivered data into final table"
                 exit
 
-        fi
-
-        $CONNECTION_STRING -vv -c "Create Index deploy_idex_1 on $ORANGE_GENUNIE_DELIVERED(deploy_id) "
-        $CONNECTION_STRING -vv -c "Create Index deploy_idex_2 on $ORANGE_DEPLOY_IDS_TABLE(deploy_id) "
-
-        #=== UPDATE DELIVERED DATE  ===#
-
-        $CONNECTION_STRING -vv -c "UPDATE $ORANGE_GENUNIE_DELIVERED a set del_date=sent_date from $ORANGE_DEPLOY_IDS_TABLE b where a.deploy_id=b.deploy_id "
-
-        if [[ $? -ne 0 ]]
-        then
-
-                        error_fun "2" "Unable to UPDATE delivered date into final table"
-                        exit
-
-        fi
-
-else
-
-        $CONNECTION_STRING -vv -c "CREATE TABLE $ORANGE_GENUNIE_DELIVERED(EMAIL VARCHAR ,DEL_DATE VARCHAR ,OPEN_DATE VARCHAR,CLICK_DATE VARCHAR,UNSUB_DATE VARCHAR, STATUS INT DEFAULT 1 , SUBID VARCHAR, UNSUB INT DEFAULT 0,deploy_id varchar,unique(email,del_date))"
-
 fi
 
-
-$CONNECTION_STRING -vv -c " INSERT INTO $UNIQ_GEN_TABLE (EMAIL,DEL_DATE,OPEN_DATE,CLICK_DATE,STATUS,CHANNEL) SELECT  EMAIL,DEL_DATE,OPEN_DATE,CLICK_DATE,STATUS,'Orange' FROM  $ORANGE_GENUNIE_DELIVERED order by status desc ON CONFLICT DO NOTHING"
-
+$CONNECTION_STRING -vv -c "ALTER TABLE $UNIQ_GEN_TABLE ADD UNIQUE (EMAIL,DEL_DATE)"
 
 if [[ $? -ne 0 ]]
 then
 
-        error_fun "2" "Unable to insert orange genuine delivered data into final table"
+        error_fun "2" "Unable to add unique key to genuine delivered table"
                 exit
 
 fi
 
 
-$CONNECTION_STRING -vv -c "DROP table IF EXISTS  $ORANGE_GENUNIE_DELIVERED "
-$CONNECTION_STRING -vv -c "DROP table IF EXISTS $ORANGE_DEPLOY_IDS_TABLE "
-$CONNECTION_STRING -vv -c "DROP table IF EXISTS $ORANGE_GENUINE_DEL_TEMP "
+$CONNECTION_STRING -vv -c "DROP table IF EXISTS  $GREEN_DELIVERED_TEMP , $GREEN_OPENS_TEMP , $GREEN_CLICKS_TEMP , $GREEN_UNSUBS_TEMP , $GREEN_FINAL_TEMP , $ARCA_GENUINE_DEL_TEMP , $ORANGE_DEPLOY_IDS_TABLE , $ORANGE_GENUINE_DEL_TEMP "
 
 
 #=== ADDING ROW NUMBER ===#
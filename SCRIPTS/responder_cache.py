@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Responder Cache Module
+On-disk cache of the Green PMTA delivered, opens and clicks extracts.
+
+Extracts are kept per (source, offerid, date) as zstd Parquet files:
+
+    <cache path>/<source>/offerid=<offerid>/<YYYY-MM-DD>.parquet
+
+Each source directory has a manifest.json recording every cached partition
+with its row count and fetch time. Partitions without rows are recorded too,
+so an offer that did not mail on a day is not asked for again.
+
+A pull reads the partitions of its offers and dates from disk and fetches
+only the missing ones from Snowflake, in one query per source, streamed to
+disk one partition file at a time. The fetch runs without the source lock,
+which is only taken to merge the new partitions into the manifest. Dates
+within settle_days of today are still pulled live on every run and never
+cached, as late events keep arriving for them; so are dates older than
+retention_days, whose partitions are removed. Rows are distinct within a
+partition; the same row under two offers of a request is loaded twice, which
+the module's final merge collapses.
+
+Used by green_responders.py (processing.responders.cache.enabled).
+"""
+
+import fcntl
+import json
+import logging
+import os
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import pyarrow.parquet as pq
+
+from config_loader import get_config
+from rltpDataPulling import COPY_SQL_TEMPLATE, STREAM_READ_SIZE, ArrowBatchStream
+
+cfg = get_config()
+
+logger = logging.getLogger(__name__)
+
+PARQUET_COMPRESSION = "zstd"
+
+# Partition key columns added to the Snowflake query of missing partitions
+OFFER_KEY = "CACHE_OFFERID"
+DATE_KEY = "CACHE_DATE"
+
+# Cached Snowflake sources (same columns and filters as green_responders.py).
+# date_column is compared with date_format literals; date_key turns it into a DATE.
+RESPONDER_SOURCES = {
+    "pmta_delivered": {
+        "table": "GREEN.LIST_PROCESSING.PMTA_LOG_SUMMARY_ACTIVE_HISTORICAL",
+        "columns": "TOADDRESS,TO_CHAR(TO_DATE(TIMELOGGED_DATE, 'YYYYMMDD'), 'YYYY-MM-DD') DEL_DATE,SUBID,BOUNCECAT",
+        "filter": "(BOUNCECAT='success' or DELIVEREDSTATUS='Hard Bounce') and REGEXP_LIKE(listId, '^[0-9]+$') "
+                  "and type in ('d','b')",
+        "offer_column": "OFFERID",
+        "date_column": "TIMELOGGED_DATE",
+        "date_format": "%Y%m%d",
+        "date_key": "TO_DATE(TIMELOGGED_DATE, 'YYYYMMDD')",
+    },
+    "green_opens": {
+        "table": "GREEN.GREEN_LPT.RAW_OPENS_FOLLOWUP",
+        "columns": "EMAILID,OPENDATE,SUBID",
+        "filter": None,
+        "offer_column": "OFFERID",
+        "date_column": "OPENDATE",
+        "date_format": "%Y-%m-%d",
+        "date_key": "TO_DATE(OPENDATE)",
+    },
+    "green_clicks": {
+        "table": "GREEN.LIST_PROCESSING.RAW_CLICKS_FOLLOWUP_SF",
+        "columns": "EMAILID,CLICKDATE,SUBID",
+        "filter": None,
+        "offer_column": "OFFERID",
+        "date_column": "CLICKDATE",
+        "date_format": "%Y-%m-%d",
+        "date_key": "TO_DATE(CLICKDATE)",
+    },
+}
+
+
+def parse_offers(offers):
+    """Offer ids of a quoted list such as '1','2'."""
+    return [offer.strip().strip("'") for offer in offers.split(",") if offer.strip().strip("'")]
+
+
+def _dates(start, end):
+    """Dates from start to end, both included."""
+    return [start + timedelta(days=n) for n in range((end - start).days + 1)]
+
+
+def _date_runs(dates):
+    """Group sorted dates into (first, day after last) runs of consecutive days."""
+    runs = []
+    for day in dates:
+        if runs and runs[-1][1] == day:
+            runs[-1][1] = day + timedelta(days=1)
+        else:
+            runs.append([day, day + timedelta(days=1)])
+    return [tuple(run) for run in runs]
+
+
+def source_query(source, ranges, with_keys):
+    """
+    SELECT DISTINCT of a source over date ranges.
+
+    Args:
+        source: RESPONDER_SOURCES entry
+        ranges: list of (offers, start, end); end is exclusive, None for open ended
+        with_keys: add the OFFER_KEY / DATE_KEY partition columns and order by them
+    """
+    fmt = source["date_format"]
+    predicates = []
+    for offers, start, end in ranges:
+        offer_list = ",".join(f"'{offer}'" for offer in offers)
+        predicate = (f"{source['offer_column']} IN ({offer_list}) "
+                     f"AND {source['date_column']}>='{start.strftime(fmt)}'")
+        if end is not None:
+            predicate += f" AND {source['date_column']}<'{end.strftime(fmt)}'"
+        predicates.append(f"({predicate})")
+
+    columns = source["columns"]
+    if with_keys:
+        columns += (f",{source['offer_column']}::VARCHAR {OFFER_KEY},"
+                    f"TO_CHAR({source['date_key']}, 'YYYY-MM-DD') {DATE_KEY}")
+    query = f"SELECT DISTINCT {columns} FROM {source['table']} WHERE ({' OR '.join(predicates)})"
+    if source["filter"]:
+        query += f" AND {source['filter']}"
+    if with_keys:
+        query += f" ORDER BY {OFFER_KEY},{DATE_KEY}"
+    return query
+
+
+def _partition_slices(table):
+    """
+    Split a table ordered by OFFER_KEY, DATE_KEY into its partitions.
+
+    Yields:
+        ((offer, date), rows without the key columns)
+    """
+    counts = table.group_by([OFFER_KEY, DATE_KEY], use_threads=False).aggregate([([], "count_all")])
+    offset = 0
+    for group in counts.to_pylist():
+        rows = group["count_all"]
+        part = table.slice(offset, rows).drop_columns([OFFER_KEY, DATE_KEY])
+        offset += rows
+        yield (group[OFFER_KEY], date.fromisoformat(group[DATE_KEY])), part
+
+
+class _PartitionFile:
+    """Parquet file of one partition, written batch by batch and moved in place on close."""
+
+    def __init__(self, key, cache_path, relative, schema):
+        self.key = key
+        self.relative = relative
+        self.full_path = os.path.join(cache_path, relative)
+        os.makedirs(os.path.dirname(self.full_path), exist_ok=True)
+        self.tmp_path = f"{self.full_path}.{os.getpid()}"
+        self.writer = pq.ParquetWriter(self.tmp_path, schema, compression=PARQUET_COMPRESSION)
+        self.rows = 0
+
+    def write(self, table):
+        if table.schema != self.writer.schema:
+            table = table.cast(self.writer.schema)
+        self.writer.write_table(table)
+        self.rows += table.num_rows
+
+    def close(self):
+        self.writer.close()
+        os.replace(self.tmp_path, self.full_path)
+
+    def discard(self):
+        self.writer.close()
+        os.remove(self.tmp_path)
+
+
+class SourceCache:
+    """Partition files and manifest of one cached source."""
+
+    def __init__(self, name):
+        self.name = name
+        self.source = RESPONDER_SOURCES[name]
+        self.path = os.path.join(cfg.responder_cache_path, name)
+        self.manifest_path = os.path.join(self.path, "manifest.json")
+        os.makedirs(self.path, exist_ok=True)
+
+    @contextmanager
+    def locked(self):
+        """Serialize manifest updates of concurrent requests."""
+        with open(os.path.join(self.path, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {"partitions": {}}
+        with open(self.manifest_path) as handle:
+            return json.load(handle)
+
+    def write_manifest(self, manifest):
+        tmp_path = f"{self.manifest_path}.{os.getpid()}"
+        with open(tmp_path, "w") as handle:
+            json.dump(manifest, handle, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    @staticmethod
+    def key(offer, day):
+        return f"{offer}|{day.isoformat()}"
+
+    def partition_file(self, offer, day):
+        return os.path.join(f"offerid={offer}", f"{day.isoformat()}.parquet")
+
+    def fetch_missing(self, sf_cursor, missing):
+        """
+        Pull the missing (offer, date) partitions in one query and write them
+        to disk. Rows arrive ordered by partition, so batches are appended to
+        one open partition file at a time.
+
+        Returns:
+            ({manifest key: entry} for every missing partition, rows fetched)
+        """
+        # Offers missing the same date runs share one predicate
+        runs_by_offer = {}
+        for offer, day in sorted(missing):
+            runs_by_offer.setdefault(offer, []).append(day)
+        offers_by_run = {}
+        for offer, days in runs_by_offer.items():
+            for run in _date_runs(days):
+                offers_by_run.setdefault(run, []).append(offer)
+        ranges = [(offers, start, end) for (start, end), offers in offers_by_run.items()]
+
+        sf_cursor.execute(source_query(self.source, ranges, with_keys=True))
+
+        fetched_at = datetime.now().isoformat(timespec="seconds")
+        entries = {
+            self.key(offer, day): {"rows": 0, "file": None, "fetched_at": fetched_at}
+            for offer, day in missing
+        }
+
+        def finish(partition_file):
+            partition_file.close()
+            entries[partition_file.key].update(rows=partition_file.rows, file=partition_file.relative)
+
+        fetched_rows = 0
+        current = None
+        try:
+            for batch in sf_cursor.fetch_arrow_batches():
+                fetched_rows += batch.num_rows
+                for (offer, day), part in _partition_slices(batch):
+                    if (offer, day) not in missing:
+                        continue
+                    key = self.key(offer, day)
+                    if current is not None and current.key != key:
+                        finish(current)
+                        current = None
+                    if current is None:
+                        current = _PartitionFile(key, self.path, self.partition_file(offer, day), part.schema)
+                    current.write(part)
+            if current is not None:
+                finish(current)
+                current = None
+        finally:
+            if current is not None:
+                current.discard()
+        return entries, fetched_rows
+
+    def prune(self, manifest, oldest):
+        """Remove the partitions dated before oldest."""
+        for key in list(manifest["partitions"]):
+            if date.fromisoformat(key.split("|", 1)[1]) >= oldest:
+                continue
+            entry = manifest["partitions"].pop(key)
+            if entry["file"]:
+                try:
+                    os.remove(os.path.join(self.path, entry["file"]))
+                except FileNotFoundError:
+                    pass
+
+
+def load_cached_pull(sf_cursor, pg_conn, name, offers, start, end, copy_target):
+    """
+    Load one Green pull into PostgreSQL from the cache, fetching what is missing.
+
+    Args:
+        sf_cursor: Snowflake cursor
+        pg_conn: PostgreSQL connection used for the COPY
+        name: RESPONDER_SOURCES key
+        offers: offer ids
+        start: first date (date)
+        end: last date, included (date), or None when open ended
+        copy_target: COPY target, "table(columns)"
+
+    Returns:
+        Number of rows loaded
+    """
+    cache = SourceCache(name)
+    source = cache.source
+    today = date.today()
+    live_from = today - timedelta(days=cfg.responder_cache_settle_days)
+    retained_from = today - timedelta(days=cfg.responder_cache_retention_days)
+
+    # Only dates inside the retention window are cached; older ones are pulled live
+    cached_start = max(start, retained_from)
+    cached_end = live_from - timedelta(days=1)
+    if end is not None:
+        cached_end = min(cached_end, end)
+    wanted = [(offer, day) for offer in offers for day in _dates(cached_start, cached_end)]
+
+    manifest = cache.read_manifest()
+    missing = {(offer, day) for offer, day in wanted
+               if cache.key(offer, day) not in manifest["partitions"]}
+    entries, fetched_rows = {}, 0
+    if missing:
+        entries, fetched_rows = cache.fetch_missing(sf_cursor, missing)
+
+    with cache.locked():
+        manifest = cache.read_manifest()
+        manifest["partitions"].update(entries)
+        cache.prune(manifest, retained_from)
+        cache.write_manifest(manifest)
+
+    files = [manifest["partitions"][cache.key(offer, day)]["file"] for offer, day in wanted]
+    files = [os.path.join(cache.path, f) for f in files if f]
+    logger.info(
+        f"{name}: {len(wanted) - len(missing)}/{len(wanted)} partitions cached, "
+        f"{len(missing)} fetched ({fetched_rows:,} rows)"
+    )
+
+    live_ranges = []
+    if start < cached_start:
+        before_cache = min(cached_start, live_from)
+        if end is not None:
+            before_cache = min(before_cache, end + timedelta(days=1))
+        live_ranges.append((offers, start, before_cache))
+    live_start = max(start, live_from)
+    if end is None or live_start <= end:
+        live_ranges.append((offers, live_start, None if end is None else end + timedelta(days=1)))
+
+    def tables():
+        for path in files:
+            yield pq.read_table(path)
+        if live_ranges:
+            sf_cursor.execute(source_query(source, live_ranges, with_keys=False))
+            yield from sf_cursor.fetch_arrow_batches()
+
+    stream = ArrowBatchStream(tables())
+    cursor = pg_conn.cursor()
+    try:
+        cursor.copy_expert(COPY_SQL_TEMPLATE.format(table=copy_target), stream, size=STREAM_READ_SIZE)
+        pg_conn.commit()
+    except Exception:
+        pg_conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    logger.info(f"{name}: {stream.rows:,} rows loaded into {copy_target}")
+    return stream.rows
@@ -10,19 +10,38 @@ Key Improvements over original:
 - Improved variable naming and code structure
 - Process-level stage isolation
 - Memory-efficient processing with explicit buffer flushing
-- Automatic fallback to direct fetch if staging fails
+- Automatic fallback to direct fetch if staging fails; the fallback streams
+  Arrow result batches as CSV straight into the partition
+- Streaming load mode: stage .gz parts are decompressed straight into
+  COPY ... FROM STDIN, so no uncompressed decile CSV is written to disk
+- Multi-part deciles: parallel GET, per-part decompression threads and
+  several PostgreSQL COPY connections per decile, with the stage file size
+  picked from the expected row count
+- Partitioned unload: one COPY INTO ... PARTITION BY (decile) per RLTP query
+  instead of one Snowflake scan per decile
+- Checkpointed loads: a TRT rerun only re-pulls / re-indexes the
+  (query, decile) slices that did not finish (see trt_checkpoint.py)
+- One long-lived worker pool for every (query, decile) task; index builds are
+  gated by per-decile dependencies instead of a barrier between queries
+- In-process PID tracking (process_tracking) instead of a bash + psql
+  subprocess per worker
+- Per-decile phase metrics (export, GET, merge, COPY, index, ANALYZE; rows
+  and bytes) persisted to the RLTP metrics table (rltp_metrics)
 
 Version: 2.0 (Production Test - Staging Only)
 """
 
+import io
 import os
 import re
 import sys
-import csv
 import gzip
 import time
 import logging
 import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from queue import Queue
 from datetime import datetime
 from multiprocessing import Pool, Manager, cpu_count
@@ -30,9 +49,11 @@ from pathlib import Path
 
 import pandas as pd
 import psycopg2
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
 import snowflake.connector
 import warnings
-import subprocess
 
 # Import configuration loader
 from config_loader import get_config
@@ -46,6 +67,10 @@ from DbConns import *
 from DB_conns import *
 
 import log_module
+import trt_checkpoint
+import process_tracking
+import rltp_metrics
+from rltp_metrics import add_phase_time
 
 warnings.filterwarnings("ignore", category=UserWarning)
 
@@ -54,7 +79,7 @@ warnings.filterwarnings("ignore", category=UserWarning)
 # ============================================================================
 
 # Data fetching configuration
-CHUNK_SIZE = cfg.chunk_size  # Rows per fetch chunk (for fallback direct fetch)
+CHUNK_SIZE = cfg.chunk_size  # Max rows serialized per CSV block (direct fetch)
 MAX_RETRY_ATTEMPTS = cfg.max_retries  # Maximum retries for data pulling
 RETRY_DELAY_SECONDS = cfg.retry_delay  # Delay between retries
 
@@ -65,10 +90,46 @@ STAGE_PREFIX = cfg.stage_prefix  # Prefix for temporary stages
 # Example: apt_rltp_temp_stage_req12345_dec1
 STAGE_MAX_FILE_SIZE = cfg.stage_max_file_size  # Max file size per stage file
 STAGE_COMPRESSION = cfg.stage_compression  # Compression for stage files
+STAGE_LOAD_MODE = cfg.stage_load_mode  # 'stream' (gz -> COPY) or 'merge' (gz -> CSV -> COPY)
+STREAM_READ_SIZE = 8 * 1024 * 1024  # Bytes handed to COPY per read in stream mode
+STAGE_GET_PARALLEL = cfg.stage_get_parallel  # GET ... PARALLEL = n
+STAGE_LOAD_CONNECTIONS = cfg.stage_load_connections  # COPY connections per decile
+STAGE_TARGET_PARTS = cfg.stage_target_parts  # Desired stage files per decile
+STAGE_MIN_FILE_SIZE = cfg.stage_min_file_size  # Floor for per-decile MAX_FILE_SIZE
+STAGE_BYTES_PER_ROW = cfg.stage_bytes_per_row  # Uncompressed bytes/row estimate
+STAGE_PREFLIGHT_COUNT = cfg.stage_preflight_count  # COUNT ... GROUP BY decile up front (per-decile pulls only)
+STAGE_PARTITIONED_UNLOAD = cfg.stage_partitioned_unload  # One PARTITION BY unload per query
+
+# File format shared by every RLTP stage (per-decile and partitioned)
+STAGE_FILE_FORMAT = f"""
+        FILE_FORMAT = (
+            TYPE = CSV
+            FIELD_DELIMITER = '|'
+            COMPRESSION = '{STAGE_COMPRESSION}'
+            RECORD_DELIMITER = '\\n'
+            FIELD_OPTIONALLY_ENCLOSED_BY = '"'
+            NULL_IF = ('', 'NULL')
+            ESCAPE_UNENCLOSED_FIELD = NONE
+        )"""
+
+# PostgreSQL COPY statement shared by the file and stream load paths
+COPY_SQL_TEMPLATE = "COPY {table} FROM STDIN WITH DELIMITER '|' CSV"
+
+# Arrow -> CSV options matching COPY_SQL_TEMPLATE (nulls are written unquoted
+# and empty, which PostgreSQL CSV reads back as NULL; an empty string would be
+# written as "" and kept, see empty_strings_as_null)
+ARROW_CSV_OPTIONS = pa_csv.WriteOptions(include_header=False, delimiter="|")
 
 # Multiprocessing configuration
 MAX_WORKER_PROCESSES = cfg.max_workers  # Maximum parallel workers
 
+# Index build planning (request-wide, shared by all workers)
+INDEX_MAX_CONCURRENT = cfg.index_max_concurrent  # CREATE INDEX running at once
+INDEX_MEM_MIN_MB = cfg.index_mem_min_mb  # maintenance_work_mem floor
+INDEX_MEM_MAX_MB = cfg.index_mem_max_mb  # maintenance_work_mem ceiling
+INDEX_MAX_PARALLEL_WORKERS = cfg.index_max_parallel_workers
+INDEX_BYTES_PER_PARALLEL_WORKER = cfg.index_bytes_per_parallel_worker
+
 # ============================================================================
 # GLOBAL STATE
 # ============================================================================
@@ -76,6 +137,12 @@ MAX_WORKER_PROCESSES = cfg.max_workers  # Maximum parallel workers
 # Shared event for inter-process communication
 event = None
 
+# Shared semaphore capping concurrent index builds across all workers
+index_slots = None
+
+# Shared list of per-index build timings (dicts)
+index_timings = None
+
 # Logger instance
 logger = None
 
@@ -85,10 +152,15 @@ logger = None
 # ============================================================================
 
 
-def init_worker(shared_event):
-    """Initialize worker process with shared event for termination signaling."""
-    global event
+def init_worker(shared_event, shared_index_slots=None, shared_index_timings=None):
+    """
+    Initialize worker process with shared event for termination signaling,
+    plus the request-wide index build slots and timing list.
+    """
+    global event, index_slots, index_timings
     event = shared_event
+    index_slots = shared_index_slots
+    index_timings = shared_index_timings
 
 
 # ============================================================================
@@ -124,23 +196,85 @@ def update_request_status(description):
 # ============================================================================
 
 
-def create_indexes_parallel(partition_table, include_md5_index, logger_instance):
+def plan_index_session(partition_bytes):
+    """
+    Choose per-session index build settings from the partition's heap size.
+
+    maintenance_work_mem is sized to about half the partition (clamped to the
+    configured floor/ceiling) and one parallel maintenance worker is allowed
+    per INDEX_BYTES_PER_PARALLEL_WORKER of data.
+
+    Returns:
+        (maintenance_work_mem_mb, max_parallel_maintenance_workers)
+    """
+    mem_mb = partition_bytes // (2 * 1024 * 1024)
+    mem_mb = int(max(INDEX_MEM_MIN_MB, min(INDEX_MEM_MAX_MB, mem_mb)))
+    parallel_workers = int(
+        min(INDEX_MAX_PARALLEL_WORKERS, partition_bytes // INDEX_BYTES_PER_PARALLEL_WORKER)
+    )
+    return mem_mb, parallel_workers
+
+
+def get_partition_size(partition_table):
+    """Return the heap size of a partition in bytes (0 if unknown)."""
+    conn = None
+    cursor = None
+    try:
+        conn, cursor = getPgConnection()
+        cursor.execute(f"SELECT pg_relation_size('{partition_table}')")
+        return int(cursor.fetchone()[0] or 0)
+    except Exception:
+        return 0
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
+def create_indexes_parallel(partition_table, include_md5_index, logger_instance, query_index=None):
     """
     Create multiple indexes in parallel using threads.
     Each thread creates one index with its own database connection.
 
+    Builds are queued on the request-wide index_slots semaphore, so at most
+    INDEX_MAX_CONCURRENT CREATE INDEX statements run at once across all
+    decile workers. Session settings come from plan_index_session and each
+    build's wait and build time is appended to index_timings.
+
     Args:
         partition_table: Table name (partition)
         include_md5_index: True if suppression (md5) index needed
         logger_instance: Logger instance
+        query_index: Query whose slice the timings are recorded under
 
     Returns:
         True if all indexes created successfully, False otherwise
     """
     results = Queue()
+    partition_bytes = get_partition_size(partition_table)
+    mem_mb, parallel_workers = plan_index_session(partition_bytes)
+    logger_instance.info(
+        f"Index plan for {partition_table} ({partition_bytes:,} bytes): "
+        f"maintenance_work_mem={mem_mb}MB, "
+        f"max_parallel_maintenance_workers={parallel_workers}"
+    )
 
     def create_single_index(index_name, columns):
-        """Worker thread to create one index."""
+        """Worker thread to create one index (waits for a build slot first)."""
+        queued_at = datetime.now()
+        try:
+            with index_slots if index_slots is not None else nullcontext():
+                wait_seconds = (datetime.now() - queued_at).total_seconds()
+                build_single_index(index_name, columns, wait_seconds)
+        except Exception as e:
+            logger_instance.error(
+                f"❌ Failed to create {index_name} on {partition_table}: {e}"
+            )
+            results.put((index_name, False))
+
+    def build_single_index(index_name, columns, wait_seconds):
+        """Create one index while holding an index build slot."""
         conn = None
         cursor = None
         try:
@@ -158,10 +292,19 @@ def create_indexes_parallel(partition_table, include_md5_index, logger_instance)
                 results.put((index_name, True))
                 return
 
+            # Per-session build settings from the partition size
+            cursor.execute(f"SET maintenance_work_mem = '{mem_mb}MB'")
+            cursor.execute(
+                f"SET max_parallel_maintenance_workers = {parallel_workers}"
+            )
+
             # Build CREATE INDEX statement
             sql = f"CREATE INDEX {index_name} ON {partition_table} ({columns})"
 
-            logger_instance.info(f"Creating index {index_name} on {partition_table}...")
+            logger_instance.info(
+                f"Creating index {index_name} on {partition_table} "
+                f"(queued {wait_seconds:.2f}s)..."
+            )
             start_time = datetime.now()
 
             cursor.execute(sql)
@@ -171,6 +314,16 @@ def create_indexes_parallel(partition_table, include_md5_index, logger_instance)
             logger_instance.info(
                 f"✅ {index_name} created in {duration:.2f}s on {partition_table}"
             )
+            if index_timings is not None:
+                index_timings.append({
+                    "index_name": index_name,
+                    "query_index": query_index,
+                    "decile": decile,
+                    "partition_table": partition_table,
+                    "partition_bytes": partition_bytes,
+                    "wait_seconds": round(wait_seconds, 2),
+                    "build_seconds": round(duration, 2),
+                })
             results.put((index_name, True))
 
         except Exception as e:
@@ -250,7 +403,23 @@ def create_indexes_parallel(partition_table, include_md5_index, logger_instance)
 # ============================================================================
 
 
-def export_to_snowflake_stage(sf_cursor, query, stage_name, file_name, logger_instance):
+def choose_stage_file_size(expected_rows):
+    """
+    Pick MAX_FILE_SIZE for one decile so it unloads into ~STAGE_TARGET_PARTS files.
+
+    Small deciles stay at STAGE_MIN_FILE_SIZE (few parts, little overhead);
+    huge deciles are capped at STAGE_MAX_FILE_SIZE. Without an estimate the
+    configured maximum is used, as before.
+    """
+    if not expected_rows:
+        return STAGE_MAX_FILE_SIZE
+    target_size = expected_rows * STAGE_BYTES_PER_ROW // max(STAGE_TARGET_PARTS, 1)
+    return int(max(STAGE_MIN_FILE_SIZE, min(STAGE_MAX_FILE_SIZE, target_size)))
+
+
+def export_to_snowflake_stage(
+        sf_cursor, query, stage_name, file_name, logger_instance, max_file_size=None
+):
     """
     Export query results to Snowflake internal stage using COPY INTO.
 
@@ -263,6 +432,7 @@ def export_to_snowflake_stage(sf_cursor, query, stage_name, file_name, logger_in
         stage_name: Name of Snowflake stage (includes request_id, decile, process_id)
         file_name: Output file name prefix
         logger_instance: Logger for output
+        max_file_size: Per-file size limit (defaults to STAGE_MAX_FILE_SIZE)
 
     Returns:
         True if successful, False otherwise
@@ -272,16 +442,7 @@ def export_to_snowflake_stage(sf_cursor, query, stage_name, file_name, logger_in
         # Stage name format: apt_rltp_temp_stage_req{request_id}_dec{decile}_pid{process_id}
         # TEMPORARY ensures it's session-scoped and auto-cleaned on disconnect
         create_stage_sql = f"""
-        CREATE  TEMPORARY STAGE IF NOT EXISTS {stage_name}
-        FILE_FORMAT = (
-            TYPE = CSV
-            FIELD_DELIMITER = '|'
-            COMPRESSION = '{STAGE_COMPRESSION}'
-            RECORD_DELIMITER = '\\n'
-            FIELD_OPTIONALLY_ENCLOSED_BY = '"'
-            NULL_IF = ('', 'NULL')
-            ESCAPE_UNENCLOSED_FIELD = NONE
-        )
+        CREATE  TEMPORARY STAGE IF NOT EXISTS {stage_name}{STAGE_FILE_FORMAT}
         """
 
         logger_instance.info(f"Creating temporary stage: {stage_name}")
@@ -292,11 +453,14 @@ def export_to_snowflake_stage(sf_cursor, query, stage_name, file_name, logger_in
         export_sql = f"""
         COPY INTO @{stage_name}/{file_name}
         FROM ({query})
-        MAX_FILE_SIZE = {STAGE_MAX_FILE_SIZE}
+        MAX_FILE_SIZE = {max_file_size or STAGE_MAX_FILE_SIZE}
         OVERWRITE = TRUE
         """
 
-        logger_instance.info(f"Exporting data to stage: @{stage_name}/{file_name}")
+        logger_instance.info(
+            f"Exporting data to stage: @{stage_name}/{file_name} "
+            f"(MAX_FILE_SIZE={max_file_size or STAGE_MAX_FILE_SIZE:,})"
+        )
         export_start = datetime.now()
 
         result = sf_cursor.execute(export_sql)
@@ -337,7 +501,10 @@ def download_from_snowflake_stage(
         Path(local_dir).mkdir(parents=True, exist_ok=True)
 
         # Download from stage using GET
-        get_sql = f"GET @{stage_name}/{file_pattern} file://{local_dir}/"
+        get_sql = (
+            f"GET @{stage_name}/{file_pattern} file://{local_dir}/ "
+            f"PARALLEL = {STAGE_GET_PARALLEL}"
+        )
         logger_instance.info(f"Downloading from stage to {local_dir}")
         download_start = datetime.now()
 
@@ -437,24 +604,252 @@ def decompress_and_merge_stage_files(
         return False
 
 
+def record_stage_download(load_stats, load_path, downloaded_files):
+    """Note the load path and the compressed size of the downloaded parts."""
+    if load_stats is None or not downloaded_files:
+        return
+    load_stats["load_path"] = load_path
+    load_stats["file_count"] = len(downloaded_files)
+    load_stats["bytes_compressed"] = sum(os.path.getsize(f) for f in downloaded_files)
+
+
+def merge_stage_files_timed(downloaded_files, decile_file, logger_instance, load_stats):
+    """decompress_and_merge_stage_files, recording merge time and output size."""
+    merge_start = datetime.now()
+    if not decompress_and_merge_stage_files(downloaded_files, decile_file, logger_instance):
+        return False
+    add_phase_time(load_stats, "merge", merge_start)
+    if load_stats is not None:
+        load_stats["bytes_uncompressed"] = os.path.getsize(decile_file)
+    return True
+
+
+class StageFileStream:
+    """
+    Read-only file-like object over a list of GZIP stage files.
+
+    psycopg2's copy_expert only calls read(size), so the parts are chained
+    back to back and decompressed on the fly. Each part is removed from disk
+    as soon as it has been fully consumed; close() removes whatever is left.
+    """
+
+    def __init__(self, gz_files, logger_instance):
+        self._pending = list(gz_files)
+        self._current = None
+        self._current_path = None
+        self.logger = logger_instance
+        self.bytes_read = 0
+
+    def _finish_current(self):
+        self._current.close()
+        os.remove(self._current_path)
+        self.logger.info(f"Streamed and removed: {self._current_path}")
+        self._current = None
+        self._current_path = None
+
+    def read(self, size=-1):
+        while self._current or self._pending:
+            if self._current is None:
+                self._current_path = self._pending.pop(0)
+                self._current = gzip.open(self._current_path, "rb")
+            chunk = self._current.read(size)
+            if chunk:
+                self.bytes_read += len(chunk)
+                return chunk
+            self._finish_current()
+        return b""
+
+    def close(self):
+        if self._current:
+            self._current.close()
+            self._pending.insert(0, self._current_path)
+            self._current = None
+        for gz_file in self._pending:
+            if os.path.exists(gz_file):
+                os.remove(gz_file)
+        self._pending = []
+
+
+def split_stage_files(downloaded_files, bucket_count):
+    """
+    Spread stage files over bucket_count lists with roughly equal bytes.
+
+    Largest files are placed first, each into the currently lightest bucket.
+    """
+    buckets = [[] for _ in range(bucket_count)]
+    bucket_bytes = [0] * bucket_count
+    for gz_file in sorted(downloaded_files, key=os.path.getsize, reverse=True):
+        lightest = bucket_bytes.index(min(bucket_bytes))
+        buckets[lightest].append(gz_file)
+        bucket_bytes[lightest] += os.path.getsize(gz_file)
+    return [bucket for bucket in buckets if bucket]
+
+
+def stream_stage_files_to_postgres(
+        downloaded_files, pg_conn, partition_table, logger_instance, load_stats=None
+):
+    """
+    Load GZIP stage files into a partition without writing an uncompressed file.
+
+    Parts are split over up to STAGE_LOAD_CONNECTIONS connections (the
+    caller's connection plus extra ones from getPgConnection). Each connection
+    runs in its own thread, decompressing its parts on the fly into
+    COPY ... FROM STDIN. With a single connection the COPY goes straight into
+    the partition. With several, each one copies into its own UNLOGGED load
+    table and the partition is filled from all of them by one INSERT ... SELECT
+    on the caller's connection, so the partition only ever sees one commit
+    and a failure at any point leaves it untouched (other queries may be
+    loading the same partition, so it cannot be truncated to clean up).
+
+    Args:
+        downloaded_files: List of downloaded .gz file paths
+        pg_conn: PostgreSQL connection used for the first COPY
+        partition_table: Target partition table
+        logger_instance: Logger for output
+        load_stats: Optional dict; rows, bytes and COPY time are set on success
+
+    Returns:
+        True if successful, False otherwise
+    """
+    buckets = split_stage_files(
+        downloaded_files, max(1, min(STAGE_LOAD_CONNECTIONS, len(downloaded_files)))
+    )
+    streams = [StageFileStream(bucket, logger_instance) for bucket in buckets]
+    connections = [pg_conn]
+    extra_connections = []
+    if len(buckets) > 1:
+        load_id = uuid.uuid4().hex[:12]
+        targets = [f"trt_load_{load_id}_{n}" for n in range(len(buckets))]
+    else:
+        targets = [partition_table]
+    load_tables = []
+
+    def copy_bucket(conn, stream, target):
+        cursor = conn.cursor()
+        try:
+            cursor.copy_expert(
+                COPY_SQL_TEMPLATE.format(table=target),
+                stream,
+                size=STREAM_READ_SIZE,
+            )
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+    try:
+        for _ in buckets[1:]:
+            extra_conn, extra_cursor = getPgConnection()
+            extra_cursor.close()
+            extra_connections.append(extra_conn)
+        connections += extra_connections
+
+        if len(buckets) > 1:
+            cursor = pg_conn.cursor()
+            try:
+                for target in targets:
+                    cursor.execute(
+                        f"CREATE UNLOGGED TABLE {target} (LIKE {partition_table})"
+                    )
+                    load_tables.append(target)
+                pg_conn.commit()
+            finally:
+                cursor.close()
+
+        logger_instance.info(
+            f"Streaming {len(downloaded_files)} stage file(s) into {partition_table} "
+            f"over {len(buckets)} connection(s)"
+        )
+        copy_start = datetime.now()
+
+        with ThreadPoolExecutor(max_workers=len(buckets)) as executor:
+            futures = [
+                executor.submit(copy_bucket, conn, stream, target)
+                for conn, stream, target in zip(connections, streams, targets)
+            ]
+            errors = [f.exception() for f in futures if f.exception()]
+
+        if errors:
+            raise errors[0]
+
+        for conn in extra_connections:
+            conn.commit()
+        if load_tables:
+            cursor = pg_conn.cursor()
+            try:
+                cursor.execute(
+                    f"INSERT INTO {partition_table} "
+                    + " UNION ALL ".join(f"SELECT * FROM {table}" for table in load_tables)
+                )
+            finally:
+                cursor.close()
+        pg_conn.commit()
+
+        copy_duration = (datetime.now() - copy_start).total_seconds()
+        bytes_read = sum(stream.bytes_read for stream in streams)
+        if load_stats is not None:
+            load_stats["rows_loaded"] = sum(f.result() for f in futures)
+            load_stats["bytes_uncompressed"] = bytes_read
+            add_phase_time(load_stats, "copy", copy_start)
+        logger_instance.info(
+            f"✅ Streaming COPY completed in {copy_duration:.2f}s for {partition_table} "
+            f"({bytes_read:,} bytes uncompressed)"
+        )
+        return True
+
+    except Exception as e:
+        logger_instance.error(
+            f"Streaming COPY failed for {partition_table}: {e}", exc_info=True
+        )
+        for conn in connections:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+        return False
+
+    finally:
+        for stream in streams:
+            stream.close()
+        for conn in extra_connections:
+            conn.close()
+        if load_tables:
+            try:
+                cursor = pg_conn.cursor()
+                cursor.execute(f"DROP TABLE IF EXISTS {', '.join(load_tables)}")
+                pg_conn.commit()
+                cursor.close()
+            except Exception as e:
+                logger_instance.warning(f"Unable to drop load tables {load_tables}: {e}")
+
+
 # ============================================================================
 # DATA PULLING WITH STAGING
 # ============================================================================
 
 
-def pull_data_with_staging(sf_cursor, query, decile_file, decile_name, logger_instance):
+def pull_data_with_staging(
+        sf_cursor, query, decile_file, decile_name, logger_instance,
+        stream_target=None, expected_rows=None, load_stats=None
+):
     """
     Pull data using Snowflake staging (COPY INTO + GET).
 
     This is 20-30% faster than direct cursor fetching for medium datasets (5-20GB)
     and uses less memory as Snowflake handles the data export.
 
+    When stream_target is given the downloaded parts are streamed straight into
+    PostgreSQL and decile_file is never written; otherwise the parts are merged
+    into decile_file for the caller to COPY.
+
     Args:
         sf_cursor: Snowflake cursor
         query: SQL query to execute
-        decile_file: Path to final output CSV file
+        decile_file: Path to final output CSV file (merge mode)
         decile_name: Decile identifier
         logger_instance: Logger
+        stream_target: Optional (pg_conn, partition_table) for stream mode
+        expected_rows: Estimated row count, used to size the stage files
+        load_stats: Optional dict; path, bytes and phase timings are recorded
 
     Returns:
         True if successful, False if should fallback to direct fetch
@@ -472,18 +867,25 @@ def pull_data_with_staging(sf_cursor, query, decile_file, decile_name, logger_in
     try:
         # Step 1: Export to Snowflake stage
         logger_instance.info(f"Using Snowflake staging for decile {decile_name}")
-        if not export_to_snowflake_stage(
-                sf_cursor, query, stage_name, file_prefix, logger_instance
-        ):
+        phase_start = datetime.now()
+        exported = export_to_snowflake_stage(
+            sf_cursor, query, stage_name, file_prefix, logger_instance,
+            max_file_size=choose_stage_file_size(expected_rows),
+        )
+        add_phase_time(load_stats, "export", phase_start)
+        if not exported:
             logger_instance.warning(
                 "Stage export failed, will fallback to direct fetch"
             )
             return False
 
         # Step 2: Download from stage
+        phase_start = datetime.now()
         downloaded_files = download_from_snowflake_stage(
             sf_cursor, stage_name, f"{file_prefix}", local_dir, logger_instance
         )
+        add_phase_time(load_stats, "get", phase_start)
+        record_stage_download(load_stats, "staging", downloaded_files)
 
         if not downloaded_files:
             logger_instance.warning(
@@ -492,9 +894,20 @@ def pull_data_with_staging(sf_cursor, query, decile_file, decile_name, logger_in
             cleanup_snowflake_stage(sf_cursor, stage_name, logger_instance)
             return False
 
-        # Step 3: Decompress and merge files
-        if not decompress_and_merge_stage_files(
-                downloaded_files, decile_file, logger_instance
+        # Step 3: Stream into PostgreSQL, or decompress and merge files
+        if stream_target:
+            pg_conn, partition_table = stream_target
+            if not stream_stage_files_to_postgres(
+                    downloaded_files, pg_conn, partition_table, logger_instance,
+                    load_stats=load_stats,
+            ):
+                logger_instance.warning(
+                    "Streaming load failed, will fallback to direct fetch"
+                )
+                cleanup_snowflake_stage(sf_cursor, stage_name, logger_instance)
+                return False
+        elif not merge_stage_files_timed(
+                downloaded_files, decile_file, logger_instance, load_stats
         ):
             logger_instance.warning("File merge failed, will fallback to direct fetch")
             cleanup_snowflake_stage(sf_cursor, stage_name, logger_instance)
@@ -520,47 +933,311 @@ def pull_data_with_staging(sf_cursor, query, decile_file, decile_name, logger_in
         return False
 
 
-def pull_data_direct_fetch(sf_cursor, query, decile_file, logger_instance):
+def empty_strings_as_null(table):
+    """
+    Null out the empty strings of every string column of an Arrow table.
+
+    The former csv.writer fallback wrote None and '' alike as an empty field,
+    so both loaded as NULL; pyarrow quotes '' and COPY would keep it.
     """
-    Pull data using direct cursor fetching (fallback method).
+    columns = [
+        pc.if_else(pc.equal(column, ""), pa.scalar(None, column.type), column)
+        if pa.types.is_string(column.type) or pa.types.is_large_string(column.type)
+        else column
+        for column in table.columns
+    ]
+    return pa.Table.from_arrays(columns, names=table.column_names)
 
-    This is the traditional approach - slower but more reliable as fallback.
+
+class ArrowBatchStream:
+    """
+    Read-only file-like object over Snowflake Arrow result batches.
+
+    Each batch (sliced to at most CHUNK_SIZE rows) is serialized to
+    pipe-delimited CSV by pyarrow in one vectorized call and handed to
+    copy_expert through read(size). No Python row objects are created.
+    Empty strings load as NULL, as with the former csv.writer fallback.
+    """
+
+    def __init__(self, batches):
+        self._batches = iter(batches)
+        self._pending = []
+        self._buffer = memoryview(b"")
+        self.rows = 0
+        self.bytes_read = 0
+
+    def _next_block(self):
+        while not self._pending:
+            table = next(self._batches, None)
+            if table is None:
+                return None
+            self._pending = [
+                table.slice(offset, CHUNK_SIZE)
+                for offset in range(0, table.num_rows, CHUNK_SIZE)
+            ]
+        block = empty_strings_as_null(self._pending.pop(0))
+        sink = io.BytesIO()
+        pa_csv.write_csv(block, sink, write_options=ARROW_CSV_OPTIONS)
+        self.rows += block.num_rows
+        return sink.getvalue()
+
+    def read(self, size=-1):
+        while not self._buffer:
+            block = self._next_block()
+            if block is None:
+                return b""
+            self._buffer = memoryview(block)
+        if size is None or size < 0:
+            size = len(self._buffer)
+        chunk = self._buffer[:size].tobytes()
+        self._buffer = self._buffer[size:]
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def pull_data_direct_fetch(
+        sf_cursor, query, pg_conn, partition_table, logger_instance, load_stats=None
+):
+    """
+    Pull data with a direct query and stream it into PostgreSQL (fallback method).
+
+    Uses the connector's Arrow result batches; every batch is converted to CSV
+    in a vectorized way and fed into COPY ... FROM STDIN as one transaction.
 
     Args:
         sf_cursor: Snowflake cursor
         query: SQL query to execute
-        decile_file: Path to output CSV file
+        pg_conn: PostgreSQL connection used for the COPY
+        partition_table: Target partition table
         logger_instance: Logger
+        load_stats: Optional dict; rows, bytes and fetch+COPY time are set on success
 
     Returns:
         True if successful, False otherwise
     """
+    cursor = None
     try:
-        logger_instance.info("Using direct fetch method")
+        logger_instance.info("Using direct fetch method (Arrow batches)")
+        fetch_start = datetime.now()
         sf_cursor.execute(query)
 
-        with open(decile_file, "wt", newline="") as f:
-            writer = csv.writer(f, delimiter="|")
+        stream = ArrowBatchStream(sf_cursor.fetch_arrow_batches())
+        cursor = pg_conn.cursor()
+        cursor.copy_expert(
+            COPY_SQL_TEMPLATE.format(table=partition_table),
+            stream,
+            size=STREAM_READ_SIZE,
+        )
+        pg_conn.commit()
+        if load_stats is not None:
+            # Fetch and COPY overlap here, so both count as the COPY phase
+            load_stats["load_path"] = "direct"
+            load_stats["rows_loaded"] = stream.rows
+            load_stats["bytes_uncompressed"] = stream.bytes_read
+            add_phase_time(load_stats, "copy", fetch_start)
+
+        fetch_duration = (datetime.now() - fetch_start).total_seconds()
+        logger_instance.info(
+            f"✅ Direct fetch completed: {stream.rows:,} rows "
+            f"({stream.bytes_read:,} bytes) in {fetch_duration:.2f}s into {partition_table}"
+        )
+        return True
+
+    except Exception as e:
+        logger_instance.error(f"Direct fetch failed: {e}", exc_info=True)
+        try:
+            pg_conn.rollback()
+        except Exception:
+            pass
+        return False
+
+    finally:
+        if cursor:
+            cursor.close()
 
-            rows_written = 0
-            while True:
-                rows = sf_cursor.fetchmany(size=CHUNK_SIZE)
-                if not rows:
-                    break
 
-                writer.writerows(rows)
-                rows_written += len(rows)
+# ============================================================================
+# PARTITIONED UNLOAD (ONE SCAN PER RLTP QUERY)
+# ============================================================================
+
+
+def get_decile_output_column(query):
+    """
+    Return the output name of the decile column (5th select item) of a query.
+
+    Handles 'expr AS name', 'expr name' and qualified 'alias.col' forms.
+    """
+    select_item = query.split(",")[4].strip()
+    return select_item.split()[-1].split(".")[-1]
 
-                # Flush buffer to prevent memory accumulation
-                f.flush()
 
-        logger_instance.info(f"✅ Direct fetch completed: {rows_written:,} rows")
+def export_partitioned_unload(query, stage_name, max_file_size, logger_instance):
+    """
+    Unload one RLTP query into a named stage with one prefix per decile.
+
+    A single COPY INTO ... PARTITION BY scans the source table once and writes
+    files under @stage/decile=<n>/. The stage is permanent (workers use their
+    own sessions) and is dropped by the caller via cleanup_snowflake_stage.
+
+    Args:
+        query: RLTP query without any decile filter
+        stage_name: Stage to create
+        max_file_size: Per-file size limit
+        logger_instance: Logger for output
+
+    Returns:
+        True if successful, False otherwise
+    """
+    sf_conn = None
+    sf_cursor = None
+    try:
+        sf_conn, sf_cursor = getSnowflake()
+        decile_column = get_decile_output_column(query)
+
+        logger_instance.info(f"Creating partitioned unload stage: {stage_name}")
+        sf_cursor.execute(
+            f"CREATE STAGE IF NOT EXISTS {stage_name}{STAGE_FILE_FORMAT}"
+        )
+        # OVERWRITE is not supported with PARTITION BY, so clear leftovers first
+        sf_cursor.execute(f"REMOVE @{stage_name}")
+
+        export_sql = f"""
+        COPY INTO @{stage_name}/
+        FROM ({query.strip().rstrip(';')})
+        PARTITION BY ('decile=' || {decile_column}::varchar)
+        MAX_FILE_SIZE = {max_file_size}
+        """
+
+        logger_instance.info(
+            f"Partitioned unload to @{stage_name} by {decile_column} "
+            f"(MAX_FILE_SIZE={max_file_size:,})"
+        )
+        export_start = datetime.now()
+        result = sf_cursor.execute(export_sql)
+        rows_exported = result.fetchone()
+
+        export_duration = (datetime.now() - export_start).total_seconds()
+        logger_instance.info(
+            f"✅ Partitioned unload completed in {export_duration:.2f}s: {rows_exported}"
+        )
         return True
 
     except Exception as e:
-        logger_instance.error(f"Direct fetch failed: {e}", exc_info=True)
+        logger_instance.error(f"Partitioned unload failed: {e}", exc_info=True)
+        if sf_cursor:
+            cleanup_snowflake_stage(sf_cursor, stage_name, logger_instance)
         return False
 
+    finally:
+        if sf_cursor:
+            sf_cursor.close()
+        if sf_conn:
+            sf_conn.close()
+
+
+def drop_partitioned_stage(stage_name, logger_instance):
+    """Drop a partitioned unload stage on a fresh Snowflake session."""
+    sf_conn = None
+    try:
+        sf_conn, sf_cursor = getSnowflake()
+        cleanup_snowflake_stage(sf_cursor, stage_name, logger_instance)
+    except Exception as e:
+        logger_instance.warning(f"Failed to drop stage {stage_name}: {e}")
+    finally:
+        if sf_conn:
+            sf_conn.close()
+
+
+def save_index_timings(request_id, timings, logger_instance):
+    """Record one metrics row per index build (see rltp_metrics.save_index_metrics)."""
+    pg_conn = None
+    try:
+        pg_conn, pg_cursor = getPgConnection()
+        pg_cursor.close()
+        rltp_metrics.save_index_metrics(pg_conn, cfg.rltp_metrics_table, request_id, timings)
+    except Exception as e:
+        logger_instance.warning(f"Unable to save index build metrics: {e}")
+    finally:
+        if pg_conn:
+            pg_conn.close()
+
+
+def save_unload_metrics(request_id, query_index, unload_stats, logger_instance):
+    """Record the export time of a partitioned unload under decile 'ALL'."""
+    pg_conn = None
+    try:
+        pg_conn, pg_cursor = getPgConnection()
+        pg_cursor.close()
+        rltp_metrics.save_phase_metrics(
+            pg_conn, cfg.rltp_metrics_table, request_id, query_index,
+            rltp_metrics.ALL_DECILES, unload_stats,
+        )
+    except Exception as e:
+        logger_instance.warning(f"Unable to save partitioned unload metrics: {e}")
+    finally:
+        if pg_conn:
+            pg_conn.close()
+
+
+def pull_data_from_partitioned_stage(
+        sf_cursor, stage_name, decile_name, decile_file, logger_instance,
+        stream_target=None, load_stats=None
+):
+    """
+    Download one decile's prefix of a partitioned unload and load it.
+
+    Args:
+        sf_cursor: Snowflake cursor
+        stage_name: Partitioned unload stage
+        decile_name: Decile identifier (matches the decile=<n> prefix)
+        decile_file: Path to final output CSV file (merge mode)
+        logger_instance: Logger
+        stream_target: Optional (pg_conn, partition_table) for stream mode
+        load_stats: Optional dict; path, bytes and phase timings are recorded
+
+    Returns:
+        True if successful, False if the per-decile pull should be used
+    """
+    # Parts of every decile share file names, so each decile gets its own dir
+    local_dir = os.path.join(
+        os.path.dirname(decile_file), f"{stage_name}_decile_{decile_name}"
+    )
+    try:
+        phase_start = datetime.now()
+        downloaded_files = download_from_snowflake_stage(
+            sf_cursor, stage_name, f"decile={decile_name}/", local_dir, logger_instance
+        )
+        add_phase_time(load_stats, "get", phase_start)
+        record_stage_download(load_stats, "partitioned_stage", downloaded_files)
+        if not downloaded_files:
+            logger_instance.warning(
+                f"No partitioned unload files for decile {decile_name}"
+            )
+            return False
+
+        if stream_target:
+            pg_conn, partition_table = stream_target
+            return stream_stage_files_to_postgres(
+                downloaded_files, pg_conn, partition_table, logger_instance,
+                load_stats=load_stats,
+            )
+        return merge_stage_files_timed(
+            downloaded_files, decile_file, logger_instance, load_stats
+        )
+
+    except Exception as e:
+        logger_instance.error(
+            f"Partitioned stage load failed for decile {decile_name}: {e}",
+            exc_info=True,
+        )
+        return False
+
+    finally:
+        if os.path.isdir(local_dir):
+            for leftover in os.listdir(local_dir):
+                os.remove(os.path.join(local_dir, leftover))
+            os.rmdir(local_dir)
+
 
 # ============================================================================
 # WORKER PROCESS FOR DATA PULLING
@@ -577,6 +1254,12 @@ def process_decile_worker(args):
     3. Load into PostgreSQL using COPY
     4. Create indexes in parallel
     5. Run ANALYZE
+
+    Every finished step is recorded in the request's checkpoint table. With
+    action ACTION_FINALIZE the rows are already loaded and only steps 4-5 run.
+
+    Returns:
+        (decile_name, True) on success, (decile_name, False) otherwise
     """
     (
         decile_name,
@@ -589,7 +1272,11 @@ def process_decile_worker(args):
         client_id,
         audit_trt_limit,
         indx_val,
-        indx_creation
+        indx_creation,
+        expected_rows,
+        partition_stage,
+        checkpoint_table,
+        action
     ) = args
 
     sf_conn = None
@@ -603,19 +1290,14 @@ def process_decile_worker(args):
         pg_conn, pg_cursor = getPgConnection()
 
         # Track this worker process
-        track_command = f"""
-        track_process() {{
-            source {cfg.get_config_properties_path(sys.argv[1])}
-            source {cfg.tracking_helper_path}
-            append_process_id $1 "RLTP_WORKER_{decile_name}"
-        }}
-        track_process {sys.argv[1]}
-        """
-        subprocess.run(["bash", "-c", track_command], check=False)
+        process_tracking.track_process(sys.argv[1], f"RLTP_WORKER_{decile_name}", worker=True)
 
         # Check if termination signal is set
         if event.is_set():
-            return
+            return decile_name, False
+
+        query_hash = trt_checkpoint.query_fingerprint(query)
+        loading = action == trt_checkpoint.ACTION_LOAD
 
         # Modify query for decile-wise processing
         if is_decile_wise:
@@ -630,48 +1312,77 @@ def process_decile_worker(args):
             f"RLTP Data pulling started for decile {decile_name} at: {start_time}"
         )
 
-        # Sample query for validation
-        sample_query = f"{query.strip().rstrip(';')} LIMIT 3"
-        logger.info(f"Sampling query (Snowflake):: {sample_query}")
-        sf_cursor.execute(sample_query)
-        sample_rows = sf_cursor.fetchall()
-        logger.info(f"Sample rows for {decile_name}: {sample_rows}")
+        # Sample query for validation (the partitioned unload already scanned
+        # the query once, so the per-decile sample is skipped there)
+        if loading and not partition_stage:
+            sample_query = f"{query.strip().rstrip(';')} LIMIT 3"
+            logger.info(f"Sampling query (Snowflake):: {sample_query}")
+            sf_cursor.execute(sample_query)
+            sample_rows = sf_cursor.fetchall()
+            logger.info(f"Sample rows for {decile_name}: {sample_rows}")
 
         # Apply audit limit for specific clients (from config)
+        # (fixed-size row sample: uniform like ORDER BY random() LIMIT n, without the sort)
         if cfg.is_audit_client(client_id):
-            query = f"{query} order by random() limit {audit_trt_limit}"
+            query = f"SELECT * FROM ({query.strip().rstrip(';')}) SAMPLE ({audit_trt_limit} ROWS)"
 
         # Define output file (use config method for FILES path)
         files_path = cfg.get_files_path(request_id)
         decile_file = os.path.join(files_path, f"decile_{decile_name}.csv")
+        partition_table = f"{trt_table_base}_{decile_name}".lower()
+
+        # In stream mode the staging path loads the partition itself
+        stream_target = None
+        if STAGE_LOAD_MODE == "stream":
+            stream_target = (pg_conn, partition_table)
 
-        # Retry logic for data pulling
+        # Retry logic for data pulling (finalize-only reruns skip the pull)
         attempt = 1
-        success = False
+        success = not loading
+        data_loaded = not loading
+        load_stats = {}
 
-        while attempt <= MAX_RETRY_ATTEMPTS:
+        while loading and attempt <= MAX_RETRY_ATTEMPTS:
             try:
                 logger.info(
                     f"Attempt {attempt}/{MAX_RETRY_ATTEMPTS} for decile {decile_name}"
                 )
                 logger.info(f"Execution query :: {query}")
 
+                # Use this decile's prefix of the partitioned unload if present
+                if partition_stage and attempt == 1:
+                    success = pull_data_from_partitioned_stage(
+                        sf_cursor, partition_stage, decile_name, decile_file, logger,
+                        stream_target=stream_target, load_stats=load_stats,
+                    )
+                    data_loaded = success and stream_target is not None
+                    if not success:
+                        logger.info(
+                            "Partitioned stage load failed, using per-decile pull"
+                        )
+
                 # Try Snowflake staging first (faster for medium/large datasets)
-                if USE_SNOWFLAKE_STAGING:
+                if not success and USE_SNOWFLAKE_STAGING:
                     success = pull_data_with_staging(
-                        sf_cursor, query, decile_file, decile_name, logger
+                        sf_cursor, query, decile_file, decile_name, logger,
+                        stream_target=stream_target,
+                        expected_rows=expected_rows,
+                        load_stats=load_stats,
                     )
+                    data_loaded = success and stream_target is not None
 
                     # If staging failed, fallback to direct fetch
                     if not success:
                         logger.info("Staging failed, using direct fetch fallback")
-                        success = pull_data_direct_fetch(
-                            sf_cursor, query, decile_file, logger
+                        success = data_loaded = pull_data_direct_fetch(
+                            sf_cursor, query, pg_conn, partition_table, logger,
+                            load_stats=load_stats,
                         )
-                else:
+                elif not success:
                     # Direct fetch if staging is disabled
-                    success = pull_data_direct_fetch(
-                        sf_cursor, query, decile_file, logger
+                    success = data_loaded = pull_data_direct_fetch(
+                        sf_cursor, query, pg_conn, partition_table, logger,
+                        load_stats=load_stats,
                     )
 
                 if success:
@@ -688,8 +1399,12 @@ def process_decile_worker(args):
                     exc_info=True,
                 )
                 if attempt == MAX_RETRY_ATTEMPTS:
+                    trt_checkpoint.save_checkpoint(
+                        pg_conn, checkpoint_table, indx_val, decile_name,
+                        query_hash=query_hash, load_state=trt_checkpoint.FAILED,
+                    )
                     event.set()
-                    return
+                    return decile_name, False
                 else:
                     logger.info(f"Retrying in {RETRY_DELAY_SECONDS} seconds...")
                     time.sleep(RETRY_DELAY_SECONDS)
@@ -698,21 +1413,32 @@ def process_decile_worker(args):
         if not success:
             logger.error(f"Failed to write data for decile {decile_name}")
             event.set()
-            return
-
-        # --- PostgreSQL load with COPY  ---
-        partition_table = f"{trt_table_base}_{decile_name}".lower()
+            return decile_name, False
+
+        # --- PostgreSQL load with COPY (skipped if already streamed) ---
+        if not data_loaded:
+            with open(decile_file, "r") as f:
+                logger.info(f"Starting COPY to {partition_table}...")
+                copy_start = datetime.now()
+                pg_cursor.copy_expert(
+                    COPY_SQL_TEMPLATE.format(table=partition_table), f
+                )
+                load_stats["rows_loaded"] = pg_cursor.rowcount
+                pg_conn.commit()
+                add_phase_time(load_stats, "copy", copy_start)
+                copy_duration = (datetime.now() - copy_start).total_seconds()
+                logger.info(
+                    f"✅ COPY completed in {copy_duration:.2f}s for {partition_table}"
+                )
 
-        with open(decile_file, "r") as f:
-            logger.info(f"Starting COPY to {partition_table}...")
-            copy_start = datetime.now()
-            pg_cursor.copy_expert(
-                f"COPY {partition_table} FROM STDIN WITH DELIMITER '|' CSV", f
-            )
-            pg_conn.commit()
-            copy_duration = (datetime.now() - copy_start).total_seconds()
-            logger.info(
-                f"✅ COPY completed in {copy_duration:.2f}s for {partition_table}"
+        if loading:
+            trt_checkpoint.save_checkpoint(
+                pg_conn, checkpoint_table, indx_val, decile_name,
+                query_hash=query_hash,
+                rows_loaded=load_stats.get("rows_loaded"),
+                load_state=trt_checkpoint.LOADED,
+                index_state=trt_checkpoint.PENDING,
+                analyze_state=trt_checkpoint.PENDING,
             )
 
         # Create indexes in parallel (email, segment/subseg, optionally md5)
@@ -721,15 +1447,28 @@ def process_decile_worker(args):
         )
         if indx_creation==indx_val:
 
+            index_start = datetime.now()
             index_success = create_indexes_parallel(
-                partition_table, include_md5_index, logger
+                partition_table, include_md5_index, logger, query_index=indx_val
             )
+            add_phase_time(load_stats, "index", index_start)
 
             if not index_success:
                 logger.error(f"Index creation failed for {partition_table}")
+                trt_checkpoint.save_checkpoint(
+                    pg_conn, checkpoint_table, indx_val, decile_name,
+                    index_state=trt_checkpoint.FAILED,
+                )
                 update_request_status("Unable to create indexes on TRT")
                 event.set()
-                return
+                return decile_name, False
+            index_state = trt_checkpoint.DONE
+        else:
+            # Indexes are built by the last query's worker for this decile
+            index_state = trt_checkpoint.SKIPPED
+        trt_checkpoint.save_checkpoint(
+            pg_conn, checkpoint_table, indx_val, decile_name, index_state=index_state
+        )
 
         # Run ANALYZE to update table statistics for query planner
         try:
@@ -737,28 +1476,46 @@ def process_decile_worker(args):
             analyze_start = datetime.now()
             pg_cursor.execute(f"ANALYZE {partition_table}")
             pg_conn.commit()
+            add_phase_time(load_stats, "analyze", analyze_start)
             analyze_duration = (datetime.now() - analyze_start).total_seconds()
             logger.info(
                 f"✅ ANALYZE completed in {analyze_duration:.2f}s for {partition_table}"
             )
+            analyze_state = trt_checkpoint.DONE
         except Exception as e:
             logger.warning(f"ANALYZE failed for {partition_table}: {e}")
+            pg_conn.rollback()
+            analyze_state = trt_checkpoint.FAILED
+        trt_checkpoint.save_checkpoint(
+            pg_conn, checkpoint_table, indx_val, decile_name, analyze_state=analyze_state
+        )
 
-        # Clean up file
-        os.remove(decile_file)
-        logger.info(f"Temporary file {decile_file} removed")
+        try:
+            rltp_metrics.save_phase_metrics(
+                pg_conn, cfg.rltp_metrics_table, sys.argv[1], indx_val, decile_name,
+                load_stats,
+            )
+        except Exception as e:
+            logger.warning(f"Unable to save phase metrics for {partition_table}: {e}")
+            pg_conn.rollback()
+
+        # Clean up file (merge mode only)
+        if os.path.exists(decile_file):
+            os.remove(decile_file)
+            logger.info(f"Temporary file {decile_file} removed")
 
         end_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         total_ex = datetime.strptime(end_time, "%Y-%m-%d %H:%M:%S") - datetime.strptime(
             start_time, "%Y-%m-%d %H:%M:%S"
         )
         logger.info(f"Execution time for decile {decile_name}: {total_ex}")
+        return decile_name, True
 
     except Exception as e:
         logger.error(f"Error processing {decile_name}: {e}", exc_info=True)
         update_request_status("Unable to pull data from RLTP")
         event.set()
-        return
+        return decile_name, False
 
     finally:
         if sf_cursor:
@@ -771,6 +1528,223 @@ def process_decile_worker(args):
             pg_conn.close()
 
 
+# ============================================================================
+# PRE-FLIGHT ROW COUNTS
+# ============================================================================
+
+
+def fetch_expected_rows(query, is_decile_wise, decile_list, logger_instance):
+    """
+    Count rows per decile for one RLTP query with a single grouped scan.
+
+    The decile is always the 5th select column, so it is addressed
+    positionally on the wrapped query. When the query is not decile-wise the
+    total is attributed to its single target decile.
+
+    Returns:
+        Dict of decile (str) -> row count, or {} if the count failed
+    """
+    sf_conn = None
+    try:
+        sf_conn, sf_cursor = getSnowflake()
+        base_query = query.strip().rstrip(";")
+        if is_decile_wise:
+            count_sql = (
+                f"SELECT $5::varchar, COUNT(*) FROM ({base_query}) GROUP BY 1"
+            )
+        else:
+            count_sql = f"SELECT '{decile_list[0]}', COUNT(*) FROM ({base_query})"
+        count_start = datetime.now()
+        sf_cursor.execute(count_sql)
+        counts = {str(decile): int(rows) for decile, rows in sf_cursor.fetchall()}
+        logger_instance.info(
+            f"Pre-flight row counts in "
+            f"{(datetime.now() - count_start).total_seconds():.2f}s: {counts}"
+        )
+        return counts
+    except Exception as e:
+        logger_instance.warning(f"Pre-flight row count failed: {e}")
+        return {}
+    finally:
+        if sf_conn:
+            sf_conn.close()
+
+
+def decile_size(decile, expected_rows, delivered_by_decile):
+    """
+    Expected size of one decile task, used to start the largest ones first.
+
+    Uses the pre-flight Snowflake count when available and falls back to the
+    decile report's Delivered total otherwise.
+    """
+    rows = expected_rows.get(str(decile))
+    if rows is None:
+        rows = delivered_by_decile.get(str(decile), 0)
+    return rows
+
+
+# ============================================================================
+# TASK SCHEDULING (ONE POOL FOR ALL QUERIES)
+# ============================================================================
+
+
+def run_trt_tasks(pool, tasks, partition_stages, logger_instance):
+    """
+    Run every (query index, decile) task on one pool, honouring dependencies.
+
+    Ready tasks are submitted largest-first; a task becomes ready once all of
+    its depends_on keys have finished. Tasks whose dependencies failed are not
+    started and count as failed. A query's partitioned unload stage is dropped
+    as soon as all of its tasks are settled.
+
+    Args:
+        pool: multiprocessing Pool initialized with init_worker
+        tasks: {(query_index, decile): {"args", "size", "depends_on"}}
+        partition_stages: {query_index: stage name}; entries are removed once dropped
+        logger_instance: Logger
+
+    Returns:
+        Dict of task key -> True/False
+    """
+    finished = Queue()
+    results = {}
+    submitted = set()
+
+    def drop_settled_stages():
+        for query_index in list(partition_stages):
+            if all(k in results for k in tasks if k[0] == query_index):
+                drop_partitioned_stage(partition_stages.pop(query_index), logger_instance)
+
+    def submit_ready():
+        while True:
+            ready = [
+                key for key, task in tasks.items()
+                if key not in submitted and task["depends_on"] <= results.keys()
+            ]
+            if not ready:
+                return
+            for key in sorted(ready, key=lambda k: tasks[k]["size"], reverse=True):
+                submitted.add(key)
+                failed = [dep for dep in tasks[key]["depends_on"] if not results[dep]]
+                if failed:
+                    logger_instance.error(f"Task {key} not started, failed dependencies: {failed}")
+                    results[key] = False
+                    continue
+                pool.apply_async(
+                    process_decile_worker,
+                    (tasks[key]["args"],),
+                    callback=lambda result, key=key: finished.put((key, result[1])),
+                    error_callback=lambda exc, key=key: finished.put((key, False)),
+                )
+
+    submit_ready()
+    drop_settled_stages()
+    while len(results) < len(tasks):
+        key, ok = finished.get()
+        results[key] = ok
+        query_index, decile = key
+        logger_instance.info(
+            f"Query {query_index} decile {decile} {'completed' if ok else 'FAILED'} "
+            f"({len(results)}/{len(tasks)})"
+        )
+
+        submit_ready()
+        drop_settled_stages()
+
+    return results
+
+
+def trt_tasks_succeeded(results, logger_instance):
+    """
+    True if every (query index, decile) task of run_trt_tasks completed;
+    otherwise logs the failed or never started ones.
+    """
+    failed = sorted(key for key, ok in results.items() if not ok)
+    if failed:
+        logger_instance.error(f"TRT incomplete, failed (query, decile) tasks: {failed}")
+    return not failed
+
+
+# ============================================================================
+# CHECKPOINT RESUME PLANNING
+# ============================================================================
+
+
+def trt_layout_matches(pg_cursor, trt_table_base, columns, deciles):
+    """
+    True if an existing TRT has exactly the request's columns and one
+    partition per decile (the query or decile report may have been edited
+    since it was built).
+    """
+    pg_cursor.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = 'public' AND table_name = %s ORDER BY ordinal_position",
+        (trt_table_base,),
+    )
+    existing_columns = [row[0] for row in pg_cursor.fetchall()]
+    pg_cursor.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = %s::regclass",
+        (trt_table_base,),
+    )
+    partitions = {row[0] for row in pg_cursor.fetchall()}
+    expected_partitions = {f"{trt_table_base}_{decile}".lower() for decile in deciles}
+    return (
+        existing_columns == [column.lower() for column in columns]
+        and partitions == expected_partitions
+    )
+
+
+def plan_trt_resume(trt_table_base, checkpoint_table, query_list, deciles,
+                    request_id, logger_instance):
+    """
+    Decide per (query index, decile) whether to load, finalize or skip.
+
+    Partitions that cannot be verified against the checkpoint are truncated,
+    their indexes dropped and their checkpoint rows removed, so they are
+    rebuilt from scratch.
+
+    Returns:
+        Dict of (query_index, decile str) -> trt_checkpoint action
+    """
+    pg_conn, pg_cursor = getPgConnection()
+    try:
+        query_hashes = {
+            query_index: trt_checkpoint.query_fingerprint(query)
+            for query_index, query in enumerate(query_list, 1)
+        }
+        checkpoints = trt_checkpoint.read_checkpoints(pg_cursor, checkpoint_table)
+
+        slice_actions = {}
+        for decile in deciles:
+            partition_table = f"{trt_table_base}_{decile}".lower()
+            actions, reset = trt_checkpoint.plan_decile(
+                decile, query_hashes, checkpoints,
+                lambda exact: trt_checkpoint.partition_row_count(
+                    pg_cursor, partition_table, exact
+                ),
+            )
+            if reset:
+                logger_instance.info(
+                    f"Checkpoint mismatch for {partition_table}, rebuilding decile {decile}"
+                )
+                pg_cursor.execute(f"TRUNCATE {partition_table}")
+                for index_type in ("email", "seg_subseg", "md5"):
+                    pg_cursor.execute(
+                        f"DROP INDEX IF EXISTS {cfg.get_index_name(index_type, request_id, decile)}"
+                    )
+                trt_checkpoint.reset_decile(pg_cursor, checkpoint_table, decile)
+                pg_conn.commit()
+            for query_index, action in actions.items():
+                slice_actions[(query_index, str(decile))] = action
+
+        logger_instance.info(f"Resume plan from checkpoint: {slice_actions}")
+        return slice_actions
+    finally:
+        pg_cursor.close()
+        pg_conn.close()
+
+
 # ============================================================================
 # MAIN EXECUTION
 # ============================================================================
@@ -780,15 +1754,7 @@ if __name__ == "__main__":
         request_id = sys.argv[1]
 
         # Track main process
-        track_command = f"""
-        track_process() {{
-            source {cfg.get_config_properties_path(request_id)}
-            source {cfg.tracking_helper_path}
-            append_process_id $1 "RLTP_MAIN"
-        }}
-        track_process {request_id}
-        """
-        subprocess.run(["bash", "-c", track_command], check=False)
+        process_tracking.track_process(request_id, "RLTP_MAIN")
 
         # Setup paths from config
         request_path = cfg.get_request_path(request_id)
@@ -800,6 +1766,7 @@ if __name__ == "__main__":
         logger.info(
             f"Snowflake staging: {'ENABLED' if USE_SNOWFLAKE_STAGING else 'DISABLED'}"
         )
+        logger.info(f"Stage load mode: {STAGE_LOAD_MODE}")
 
         start_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         logger.info("RLTP data pulling started at : " + start_time)
@@ -824,6 +1791,11 @@ if __name__ == "__main__":
             request_df['client_name'][0],
             request_df['week'][0]
         )
+        checkpoint_table = cfg.get_trt_checkpoint_table(
+            str(request_df['request_id'][0]),
+            request_df['client_name'][0],
+            request_df['week'][0]
+        )
 
         # Load decile report
         decile_df = pd.read_csv(
@@ -844,17 +1816,15 @@ if __name__ == "__main__":
         ]
 
         decile_count = len(decile_df["decile"].drop_duplicates())
+        delivered_by_decile = {
+            str(decile): int(delivered)
+            for decile, delivered in decile_df.groupby("decile")["Delivered"].sum().items()
+        }
         client_id = int(request_df["client_id"][0])
         audit_trt_limit = decile_df["Delivered"].sum() + cfg.audit_trt_buffer
 
         # Check if MD5 index is needed
         include_md5_index = True
-        supp_path = request_df["supp_path"][0]
-        if supp_path != "":
-            supp_sample = pd.read_csv(supp_path, nrows=10, header=None)
-            if not supp_sample[0].str.contains("@").any():
-                logger.info("Adding index on md5 level")
-                include_md5_index = True
 
         # Extract the number from request_df['query'] and modify the query string
         modified_queries = []
@@ -917,6 +1887,25 @@ if __name__ == "__main__":
             """)
             table_exists = pg_cursor.fetchone()[0]
 
+            is_resume = trt_checkpoint.ensure_checkpoint_table(pg_cursor, checkpoint_table)
+            if table_exists and is_resume and not trt_layout_matches(
+                pg_cursor, trt_table_base, req_cols, list(decile_df["decile"].drop_duplicates())
+            ):
+                logger.info(f"Columns or deciles of {trt_table_base} changed, discarding checkpoint")
+                pg_cursor.execute(f"TRUNCATE {checkpoint_table}")
+                is_resume = False
+            rltp_metrics.ensure_metrics_table(pg_cursor, cfg.rltp_metrics_table)
+            if not is_resume:
+                rltp_metrics.clear_request_metrics(
+                    pg_cursor, cfg.rltp_metrics_table, request_id
+                )
+            pg_conn.commit()
+            if table_exists and not is_resume:
+                # TRT left without a usable checkpoint: completed slices are unknown
+                logger.info(f"Dropping un-checkpointed TRT table {trt_table_base}")
+                pg_cursor.execute(f"DROP TABLE {trt_table_base} CASCADE")
+                table_exists = False
+
             if not table_exists:
                 pg_cursor.execute(
                     f"CREATE TABLE {trt_table_base} ({colsn}) PARTITION BY LIST(decile)"
@@ -938,8 +1927,23 @@ if __name__ == "__main__":
             if pg_conn:
                 pg_conn.close()
 
-        # Process each query
-        indx_val=1
+        # Resume: work out which (query, decile) slices still need work
+        slice_actions = {}
+        if is_resume:
+            try:
+                slice_actions = plan_trt_resume(
+                    trt_table_base, checkpoint_table, query_list,
+                    list(decile_df["decile"].drop_duplicates()), request_id, logger
+                )
+            except Exception as e:
+                logger.error(f"Unable to read TRT checkpoints: {e}", exc_info=True)
+                update_request_status("Unable to read TRT checkpoints")
+                sys.exit(1)
+
+        # Build the (query, decile) task list for every query up front
+        tasks = {}
+        partition_stages = {}
+        indx_val = 1
         for query in query_list:
             if re.findall("apt_rltp_request_raw_", query):
                 decile_column = str(query.split(",")[4].strip().split()[0])
@@ -957,45 +1961,137 @@ if __name__ == "__main__":
                         list(decile_df["decile"].drop_duplicates()), reverse=True
                     )
 
-                logger.info("Executing decile processing with parallel workers")
-
-                try:
-                    manager = Manager()
-                    shared_event = manager.Event()
-
-                    with Pool(
-                            processes=MAX_WORKER_PROCESSES,
-                            initializer=init_worker,
-                            initargs=(shared_event,),
-                    ) as pool:
-                        pool.map(
-                            process_decile_worker,
-                            [
-                                (
-                                    decile,
-                                    trt_table_base,
-                                    query,
-                                    include_md5_index,
-                                    1,
-                                    is_decile_wise,
-                                    request_path,
-                                    client_id,
-                                    audit_trt_limit,
-                                    indx_val,
-                                    indx_creation
-                                )
-                                for decile in decile_list
-                            ],
+                decile_actions = {
+                    decile: slice_actions.get(
+                        (indx_val, str(decile)), trt_checkpoint.ACTION_LOAD
+                    )
+                    for decile in decile_list
+                }
+                decile_list = [
+                    decile for decile in decile_list
+                    if decile_actions[decile] != trt_checkpoint.ACTION_SKIP
+                ]
+                if not decile_list:
+                    logger.info(f"Query {indx_val}: all deciles complete in checkpoint, skipping")
+                    indx_val = indx_val + 1
+                    continue
+                loads_all = all(
+                    decile_actions[decile] == trt_checkpoint.ACTION_LOAD
+                    for decile in decile_list
+                ) and len(decile_list) == len(decile_actions)
+
+                use_partitioned_unload = (
+                        USE_SNOWFLAKE_STAGING
+                        and STAGE_PARTITIONED_UNLOAD
+                        and is_decile_wise
+                        and loads_all
+                        and not cfg.is_audit_client(client_id)
+                )
+
+                # The pre-flight count is a full scan of the query of its own, which
+                # the single partitioned unload scan does not pay for: that one is
+                # sized from the decile report's Delivered totals instead
+                expected_rows = {}
+                if USE_SNOWFLAKE_STAGING and STAGE_PREFLIGHT_COUNT and not use_partitioned_unload:
+                    expected_rows = fetch_expected_rows(
+                        query, is_decile_wise, decile_list, logger
+                    )
+
+                # One scan for all deciles instead of one query per decile
+                partition_stage = None
+                if use_partitioned_unload:
+                    stage_name = f"{STAGE_PREFIX}_req{request_id}_q{indx_val}"
+                    max_file_size = choose_stage_file_size(max(
+                        decile_size(decile, expected_rows, delivered_by_decile)
+                        for decile in decile_list
+                    ))
+                    unload_stats = {"load_path": "partitioned_unload"}
+                    export_start = datetime.now()
+                    if export_partitioned_unload(
+                            query, stage_name, max_file_size, logger
+                    ):
+                        partition_stage = stage_name
+                        partition_stages[indx_val] = stage_name
+                        add_phase_time(unload_stats, "export", export_start)
+                        save_unload_metrics(request_id, indx_val, unload_stats, logger)
+                    else:
+                        logger.warning(
+                            "Partitioned unload failed, deciles will be pulled individually"
                         )
 
-                    logger.info("All threads for TRT are completed.")
-                    indx_val=indx_val+1
-                except Exception as e:
-                    logger.error("An error occurred: %s", str(e), exc_info=True)
-                    update_request_status("Failed to Launch Worker nodes for TRT")
-                    sys.exit(1)
+                for decile in decile_list:
+                    tasks[(indx_val, str(decile))] = {
+                        "args": (
+                            decile,
+                            trt_table_base,
+                            query,
+                            include_md5_index,
+                            1,
+                            is_decile_wise,
+                            request_path,
+                            client_id,
+                            audit_trt_limit,
+                            indx_val,
+                            indx_creation,
+                            expected_rows.get(str(decile)),
+                            partition_stage,
+                            checkpoint_table,
+                            decile_actions[decile],
+                        ),
+                        "size": decile_size(decile, expected_rows, delivered_by_decile),
+                        "depends_on": set(),
+                    }
+                indx_val = indx_val + 1
+
+        # Index gating: the last query's worker builds a decile's indexes, so it
+        # waits for every other query's task on that decile (not for a barrier)
+        for (query_index, decile), task in tasks.items():
+            if query_index == indx_creation:
+                task["depends_on"] = {
+                    key for key in tasks
+                    if key[1] == decile and key[0] != indx_creation
+                }
+
+        logger.info(
+            f"Executing {len(tasks)} (query, decile) task(s) on one pool of "
+            f"{MAX_WORKER_PROCESSES} workers"
+        )
+
+        try:
+            manager = Manager()
+            shared_event = manager.Event()
+            shared_index_slots = manager.BoundedSemaphore(INDEX_MAX_CONCURRENT)
+            shared_index_timings = manager.list()
+
+            with Pool(
+                    processes=MAX_WORKER_PROCESSES,
+                    initializer=init_worker,
+                    initargs=(shared_event, shared_index_slots, shared_index_timings),
+            ) as pool:
+                task_results = run_trt_tasks(pool, tasks, partition_stages, logger)
+
+            if not trt_tasks_succeeded(task_results, logger):
+                update_request_status("Unable to load all TRT deciles")
+                sys.exit(1)
 
-                time.sleep(2)
+            logger.info("All threads for TRT are completed.")
+            for timing in sorted(
+                    shared_index_timings, key=lambda t: t["build_seconds"], reverse=True
+            ):
+                logger.info(
+                    f"Index build: {timing['index_name']} "
+                    f"{timing['build_seconds']:.2f}s "
+                    f"(queued {timing['wait_seconds']:.2f}s, "
+                    f"{timing['partition_bytes']:,} bytes)"
+                )
+            save_index_timings(request_id, list(shared_index_timings), logger)
+        except Exception as e:
+            logger.error("An error occurred: %s", str(e), exc_info=True)
+            update_request_status("Failed to Launch Worker nodes for TRT")
+            sys.exit(1)
+        finally:
+            for partition_stage in partition_stages.values():
+                drop_partitioned_stage(partition_stage, logger)
 
         end_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         logger.info(f"Script ended at: {end_time}")
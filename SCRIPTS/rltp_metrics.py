@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+RLTP Phase Metrics Module
+Per-decile throughput profile for rltpDataPulling.py.
+
+Workers collect phase timings and byte counts in their load_stats dict and
+write one row per (request, query index, decile) to the metrics table, plus
+one row per index build under the same keys and the index name. The backend
+serves the rows at /api/requests/<id>/trt-profile, so a slow week can be
+attributed to the Snowflake export, the GET, local decompression, COPY or
+the PostgreSQL index build.
+"""
+
+from datetime import datetime
+
+# Phases timed by the worker; each is stored as <phase>_seconds
+PHASES = ("export", "get", "merge", "copy", "index", "analyze")
+
+# Phases that move rows (used for rows_per_second)
+LOAD_PHASES = ("export", "get", "merge", "copy")
+
+# Other load_stats keys persisted as-is
+STAT_COLUMNS = ("load_path", "rows_loaded", "bytes_compressed", "bytes_uncompressed", "file_count")
+
+# Decile label of the per-query partitioned unload row
+ALL_DECILES = "ALL"
+
+# Row key; index_name is '' on the per-slice rows
+KEY_COLUMNS = "request_id, query_index, decile, index_name"
+
+
+def add_phase_time(stats, phase: str, started: datetime) -> None:
+    """Add the time elapsed since started to stats['<phase>_seconds']."""
+    if stats is None:
+        return
+    key = f"{phase}_seconds"
+    stats[key] = round(stats.get(key, 0) + (datetime.now() - started).total_seconds(), 2)
+
+
+def ensure_metrics_table(cursor, table: str) -> None:
+    """Create the metrics table if needed, or add the per-index columns to an older one."""
+    phase_columns = "".join(f"{phase}_seconds numeric, " for phase in PHASES)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            request_id         int,
+            query_index        int,
+            decile             varchar,
+            load_path          varchar,
+            rows_loaded        bigint,
+            bytes_compressed   bigint,
+            bytes_uncompressed bigint,
+            file_count         int,
+            {phase_columns}
+            rows_per_second    numeric,
+            index_name         varchar NOT NULL DEFAULT '',
+            index_wait_seconds numeric,
+            recorded_at        timestamp DEFAULT now(),
+            PRIMARY KEY ({KEY_COLUMNS})
+        )
+    """)
+
+    # Tables created before the per-index rows: add their columns and key
+    cursor.execute(
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS index_name varchar NOT NULL DEFAULT '', "
+        f"ADD COLUMN IF NOT EXISTS index_wait_seconds numeric"
+    )
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'p'",
+        (table,),
+    )
+    primary_key = cursor.fetchone()
+    if primary_key and "index_name" not in primary_key[1]:
+        cursor.execute(
+            f"ALTER TABLE {table} DROP CONSTRAINT {primary_key[0]}, ADD PRIMARY KEY ({KEY_COLUMNS})"
+        )
+
+
+def clear_request_metrics(cursor, table: str, request_id) -> None:
+    """Forget the profile of an earlier run of a request."""
+    cursor.execute(f"DELETE FROM {table} WHERE request_id = %s", (int(request_id),))
+
+
+def save_phase_metrics(conn, table: str, request_id, query_index: int, decile, stats: dict) -> None:
+    """
+    Upsert the metrics of one (query index, decile) slice.
+
+    Only the columns present in stats are written, so a finalize-only
+    rerun (index and ANALYZE) does not wipe the load phases of the first run.
+    """
+    fields = {
+        column: stats[column]
+        for column in STAT_COLUMNS + tuple(f"{phase}_seconds" for phase in PHASES)
+        if stats.get(column) is not None
+    }
+    load_seconds = sum(stats.get(f"{phase}_seconds", 0) for phase in LOAD_PHASES)
+    if stats.get("rows_loaded") and load_seconds:
+        fields["rows_per_second"] = round(stats["rows_loaded"] / load_seconds, 2)
+
+    columns = ["request_id", "query_index", "decile"] + list(fields)
+    values = [int(request_id), query_index, str(decile)] + list(fields.values())
+    updates = "".join(f", {col} = EXCLUDED.{col}" for col in fields)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(values))}) "
+            f"ON CONFLICT ({KEY_COLUMNS}) "
+            f"DO UPDATE SET recorded_at = now(){updates}",
+            values,
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def save_index_metrics(conn, table: str, request_id, timings) -> None:
+    """
+    Upsert one row per index build, keyed like the (query index, decile)
+    slice whose index phase it belongs to plus the index name: index_seconds
+    is the build time and index_wait_seconds the time queued for a build slot.
+    """
+    cursor = conn.cursor()
+    try:
+        for timing in timings:
+            cursor.execute(
+                f"INSERT INTO {table} ({KEY_COLUMNS}, index_seconds, index_wait_seconds) "
+                f"VALUES (%s, %s, %s, %s, %s, %s) "
+                f"ON CONFLICT ({KEY_COLUMNS}) DO UPDATE SET recorded_at = now(), "
+                f"index_seconds = EXCLUDED.index_seconds, "
+                f"index_wait_seconds = EXCLUDED.index_wait_seconds",
+                (
+                    int(request_id), timing["query_index"], str(timing["decile"]),
+                    timing["index_name"], timing["build_seconds"], timing["wait_seconds"],
+                ),
+            )
+        conn.commit()
+    finally:
+        cursor.close()
@@ -76,8 +76,6 @@ report_path=`$CONNECTION_STRING -qtAX -c "select CPM_REPORT_PATH from  $REQUEST_
 
 decile_file=`$CONNECTION_STRING -qtAX -c "select DECILE_WISE_REPORT_PATH from  $REQUEST_TABLE where REQUEST_ID=$REQUEST_ID"`
 
-decile_loop_counter=0
-
 if [[ $REQUEST_TYPE == 1 ]]
 then
 
@@ -99,8 +97,6 @@ fi
 
 ip_append=`$CONNECTION_STRING -qtAX -c "select upper(IP_APPEND) from  $REQUEST_TABLE where REQUEST_ID=$REQUEST_ID"`
 
-posted_unsub_table=`$CONNECTION_STRING -qtAX -c "select upper(POSTED_UNSUB_HARDS_TABLE) from $CLIENT_TABLE a join $REQUEST_TABLE b on a.CLIENT_ID=b.CLIENT_ID where REQUEST_ID=$REQUEST_ID"`
-
 OLD_DATA=`$CONNECTION_STRING -qtAX -c "select upper(TOTAL_DELIVERED_TABLE) from $CLIENT_TABLE a join $REQUEST_TABLE b on a.client_id=b.client_id where request_id=$REQUEST_ID"`
 
 LAST_WK_PB_TABLE=`$CONNECTION_STRING -qtAX -c "select upper(PREV_WEEK_PB_TABLE) from $CLIENT_TABLE a join $REQUEST_TABLE b on a.client_id=b.client_id where request_id=$REQUEST_ID"`
@@ -115,8 +111,6 @@ then
 
         $CONNECTION_STRING -vv -c "truncate table $OLD_DATA"
 
-        $CONNECTION_STRING -vv -c "truncate table $posted_unsub_table"
-
 else
 
         select_ver=" "
@@ -126,77 +120,7 @@ fi
 
 
 
-#=== INSERT LAST WEEK UNSUBS ===#
-
-
-#=== UNSUBS INSERT ===#
-
-inserted_unsub_cnt=`$CONNECTION_STRING -qtAX -c " with cte as (select email,segment,del_date,unsub_date from $LAST_WK_PB_TABLE where unsub_date is not null ) , rows as (insert into $posted_unsub_table(email,segment,del_date,unsub_date) select * from cte on conflict do nothing returning 1) select count(*) from rows"`
-
-if [[ $? -ne 0 ]]
-then
-
-error_fun "4" "Unable to insert last week unsubs into posted unsub table"
-exit
-
-fi
-
-
-$CONNECTION_STRING -vv -c "UPDATE $QA_TABLE SET LAST_WK_UNSUB_INSERT_CNT=$inserted_unsub_cnt WHERE REQUEST_ID=$REQUEST_ID "
-
-
-
-#== HARDS INSERTS ===#
-
-$CONNECTION_STRING -vv -c " with cte as (select email,segment,del_date,flag from $LAST_WK_PB_TABLE where flag='B') insert into $posted_unsub_table(email,segment,del_date,flag) select * from cte on conflict do nothing"
-
-if [[ $? -ne 0 ]]
-then
-
-error_fun "4" "Unable to insert last week hards into posted unsub table"
-exit
-
-fi
-
-
-
-
-
-#==== POSTED UNSUBS AND HARDS SUPPRESSION ====#
-
-echo "POSTED UNSUB SUPP START TIME: `date`"
-
-query="delete from $TRT_TABLE a using $posted_unsub_table b where a.email=b.email "
-#unsubs_supp_cnt=$(python3 $SCRIPTPATH/delete_partitions.py "$query" "$REQUEST_ID")
-
-
-unsubs_supp_cnt=$(python3 "$SCRIPTPATH/delete_partitions.py" "$query" "$REQUEST_ID" 2>/dev/null)
-
-if [[ $? -ne 0 ]]
-then
-
-        error_fun "4" "Unable to perform posted unsubs/hards suppression to the TRT"
-        exit
-else
-
-        $CONNECTION_STRING -vv -c "update $REQUEST_TABLE set REQUEST_DESC='Mailer Unsubs/Hards Suppressed.' where REQUEST_ID=$REQUEST_ID  "
-
-        $CONNECTION_STRING -vv -c "update $QA_TABLE set  POSTED_UNSUB_HARDS_SUPP_COUNT=$unsubs_supp_cnt where REQUEST_ID=$REQUEST_ID"
-
-fi
-
-echo "POSTED UNSUB SUPP END TIME: `date`"
-
-if [[ $client_name == 'VERIZON' ]]
-then
-
-        #$CONNECTION_STRING -vv -c "truncate table $LAST_WK_PB_TABLE"
-
-        $CONNECTION_STRING -vv -c "truncate table $OLD_DATA"
-
-        $CONNECTION_STRING -vv -c "truncate table $posted_unsub_table"
-
-fi
+#=== LAST WEEK UNSUBS/HARDS ARE INSERTED AND SUPPRESSED IN suppressionList.sh ===#
 
 
 
@@ -238,73 +162,62 @@ $CONNECTION_STRING -vv -c "create table $SRC_TABLE (like $TRT_TABLE)"
 
 if [[ $client_name == 'VERIZON' ]]
 then
-        $CONNECTION_STRING -vv -c "alter table $SRC_TABLE add status int default 0,add unsub int default 0,add freq int default 1,add flag varchar,add del_date varchar,add id serial primary key,add touch int default 1,add unique(email,segment); comment on column $SRC_TABLE.status is '-1 - Bounce, 0 - Random, 1 - Genuine, 2 - Open, 3 - Click' "
+        $CONNECTION_STRING -vv -c "alter table $SRC_TABLE add status int default 0,add unsub int default 0,add freq int default 1,add flag varchar,add del_date varchar,add id serial primary key,add touch int default 1,add rnd double precision default random(),add unique(email,segment); comment on column $SRC_TABLE.status is '-1 - Bounce, 0 - Random, 1 - Genuine, 2 - Open, 3 - Click' "
 
         src_idx_key_ver=src_email_idx_$REQUEST_ID
         $CONNECTION_STRING -vv -c "create index $src_idx_key_ver on $SRC_TABLE(email)"
 
 else
 
-        $CONNECTION_STRING -vv -c "alter table $SRC_TABLE add status int default 0,add unsub int default 0,add freq int default 1,add flag varchar,add del_date varchar,add id serial primary key,add touch int default 1,add unique(email); comment on column $SRC_TABLE.status is '-1 - Bounce, 0 - Random, 1 - Genuine, 2 - Open, 3 - Click' "
+        $CONNECTION_STRING -vv -c "alter table $SRC_TABLE add status int default 0,add unsub int default 0,add freq int default 1,add flag varchar,add del_date varchar,add id serial primary key,add touch int default 1,add rnd double precision default random(),add unique(email); comment on column $SRC_TABLE.status is '-1 - Bounce, 0 - Random, 1 - Genuine, 2 - Open, 3 - Click' "
 fi
 
+#=== RANDOM RANK INDEXES ===#
+# rnd is drawn once per row on insert: "n random rows of a group" is an
+# index range scan on (group, rnd) instead of ORDER BY random() over the group.
+# The (group, rnd) indexes are built after the bulk loads, right before the
+# picks that use them. A pick re-draws rnd only for rows a later rnd-ordered
+# pick can select again, so it never sees them ordered by the key that selected them.
 
-#== GENUINE DELIVERED INSERT===#
+#=== GENUINE DELIVERED INSERT / FREQUENCY UPDATE ===#
+# One session for the block (see module_runner.py), step timings go to the step metrics table
 
-$CONNECTION_STRING -vv -c " with cte as ( select a.*,b.status,b.unsub,del_date from $TRT_TABLE a join $UNIQ_GEN_TABLE b on a.email=b.email ) insert into $SRC_TABLE($trt_header,status,unsub,del_date) select * from cte on conflict do nothing"
-
-if [[ $? -ne 0 ]]
+if [[ $priority == 'Y' ]]
 then
 
-        error_fun "4" "Unable to insert genuine delivered data."
-        exit
-
-fi
-
-
-$CONNECTION_STRING -vv -c "update $SRC_TABLE c set del_date=null where id in (select a.id from $SRC_TABLE a left join $REPORT_TABLE b on a.del_date=b.del_date and a.segment=b.segment and a.subseg=b.sub_seg where b.del_date is null and b.segment is null and b.sub_seg is null)  "
-
-#=== INSERT GENUINE BOUNCES INTO HARDS TABLE ===#
-
-#$CONNECTION_STRING -vv -c "  insert into $HARDS_TABLE(email) select email from $UNIQ_GEN_TABLE where status=-1 on conflict do nothing "
-
-
-
-#==== UPDATE FREQUENCY WITH OLD DELIVERED DATA ===#
-
-$CONNECTION_STRING -vv -c " with cte as ( select a.id from $SRC_TABLE a join $OLD_DATA b on a.email=b.email ) update $SRC_TABLE x set freq=0 from cte y where x.id=y.id "
+        alloc_priority_opt="--priority"
 
-if [[ $? -ne 0 ]]
-then
+else
 
-        error_fun "4" "Unable to update frequency to SRC table."
-        exit
+        alloc_priority_opt=""
 
 fi
 
-#=== PULL SOURCE INITIAL STATS AND INSERT DEFICITS AS PER PRIORITY ===#
-
-if [[ $priority == 'Y' ]]
-then
+echo "Analyzing tables before source preparation: `date`"
 
-        priority_order=" , priority"
+run_module_steps "SRC_PREPARATION" "4" "$PG_SESSION_SETTINGS" <<EOF
+-- step: genuine_insert | Unable to insert genuine delivered data.
+with cte as ( select a.*,b.status,b.unsub,del_date from $TRT_TABLE a join $UNIQ_GEN_TABLE b on a.email=b.email ) insert into $SRC_TABLE($trt_header,status,unsub,del_date) select * from cte on conflict do nothing
 
-else
+-- step: unreported_deldates
+update $SRC_TABLE c set del_date=null where id in (select a.id from $SRC_TABLE a left join $REPORT_TABLE b on a.del_date=b.del_date and a.segment=b.segment and a.subseg=b.sub_seg where b.del_date is null and b.segment is null and b.sub_seg is null)
 
-        priority_order=" "
+-- step: old_delivered_freq | Unable to update frequency to SRC table.
+with cte as ( select a.id from $SRC_TABLE a join $OLD_DATA b on a.email=b.email ) update $SRC_TABLE x set freq=0 from cte y where x.id=y.id
 
-fi
+-- step: request_status
+UPDATE $REQUEST_TABLE set REQUEST_STATUS='R',REQUEST_DESC='Preparing Source.' where REQUEST_ID=$REQUEST_ID
 
+-- step: analyze_src
+-- CRITICAL: Analyze tables before multi-table JOINs to ensure accurate planner estimates
+ANALYZE $SRC_TABLE
 
-$CONNECTION_STRING -vv -c "UPDATE $REQUEST_TABLE set REQUEST_STATUS='R',REQUEST_DESC='Preparing Source.' where REQUEST_ID=$REQUEST_ID "
+-- step: analyze_hards
+ANALYZE $HARDS_TABLE
+EOF
 
 #============SOURCE PREPARATION SEGMENT-SUBSEGMENT WISE=======================================#
 
-# CRITICAL: Analyze tables before multi-table JOINs to ensure accurate planner estimates
-echo "Analyzing tables before source preparation: `date`"
-$CONNECTION_STRING -vv -c "ANALYZE $SRC_TABLE"
-$CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
-
         if [[ $on_sent == 'Y' ]]
         then
 
@@ -323,6 +236,21 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                 $CONNECTION_STRING -vv -c " update $SRC_TABLE set del_date=null,flag='B' where status=-1"
 
+                # Hards picks only: partial, dropped once the hards are dated
+                src_rnd_idx=src_rnd_idx_$REQUEST_ID
+
+                $CONNECTION_STRING -vv -c "create index $src_rnd_idx on $SRC_TABLE (segment,subseg,rnd) where status=-1"
+
+                load_group_counts "select 'hards|'||segment||'|'||subseg,count(email) from $SRC_TABLE where status=-1 group by 1"
+
+                if [[ $? -ne 0 ]]
+                then
+
+                        error_fun "4" "Unable to pull hards counts from source table."
+                        exit
+
+                fi
+
 
                 while read hards
                 do
@@ -332,7 +260,7 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
                         hard_subseg=`echo $hards | cut -d'|' -f3`
 
 
-                        avl_hard_cnt=`$CONNECTION_STRING -qtAX -c "select count(email) from $SRC_TABLE WHERE status=-1 and segment='$hard_seg' and subseg='$hard_subseg' "`
+                        avl_hard_cnt=`group_count "hards|$hard_seg|$hard_subseg"`
 
                         req_cnt=`echo $hard_cnt-$avl_hard_cnt | bc`
 
@@ -340,7 +268,7 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
                         then
 
                                 # HARDS insert with HARDS_TABLE join - with session optimization settings
-                                $CONNECTION_STRING -vv -c "$PG_SESSION_SETTINGS with cte as ( select a.*,(case when c.email is not null then 0 else 1 end) trt_freq,-1,'B' from $TRT_TABLE a left join $SRC_TABLE b on a.email=b.email left join $OLD_DATA c on a.email=c.email join  $HARDS_TABLE d on a.email=d.email where c.email is null and b.email is null and a.segment='$hard_seg' and a.subseg='$hard_subseg' ) insert into $SRC_TABLE($trt_header,freq,status,flag) select  * from cte limit $req_cnt on conflict do nothing"
+                                inserted_cnt=`$CONNECTION_STRING -qtAX -c "$PG_SESSION_SETTINGS with cte as ( select a.*,(case when c.email is not null then 0 else 1 end) trt_freq,-1,'B' from $TRT_TABLE a left join $SRC_TABLE b on a.email=b.email left join $OLD_DATA c on a.email=c.email join  $HARDS_TABLE d on a.email=d.email where c.email is null and b.email is null and a.segment='$hard_seg' and a.subseg='$hard_subseg' ) , rows as ( insert into $SRC_TABLE($trt_header,freq,status,flag) select  * from cte limit $req_cnt on conflict do nothing returning email ) select count(email) from rows"`
 
                                 if [[ $? -ne 0 ]]
                                 then
@@ -350,11 +278,13 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                                 fi
 
+                                add_group_count "hards|$hard_seg|$hard_subseg" $inserted_cnt
+
                         else
 
                                 req_cnt1=`echo $req_cnt | sed 's/-//g'`
 
-                                $CONNECTION_STRING -vv -c "with cte as ( select id from $SRC_TABLE where status=-1 and segment='$hard_seg' and subseg='$hard_subseg' order by random() limit $req_cnt1) delete from $SRC_TABLE a using cte b where a.id=b.id"
+                                deleted_cnt=`$CONNECTION_STRING -qtAX -c "with cte as ( select id from $SRC_TABLE where status=-1 and segment='$hard_seg' and subseg='$hard_subseg' order by rnd limit $req_cnt1) , rows as ( delete from $SRC_TABLE a using cte b where a.id=b.id returning a.email ) select count(email) from rows"`
 
                                 if [[ $? -ne 0 ]]
                                 then
@@ -364,11 +294,13 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                                 fi
 
+                                add_group_count "hards|$hard_seg|$hard_subseg" -$deleted_cnt
+
                         fi
 
                         #=== FILLING STILL DEFICIT ===#
 
-                        avl_hard_cnt=`$CONNECTION_STRING -qtAX -c "select count(email) from $SRC_TABLE WHERE status=-1 and segment='$hard_seg' and subseg='$hard_subseg' "`
+                        avl_hard_cnt=`group_count "hards|$hard_seg|$hard_subseg"`
 
                         req_cnt=`echo $hard_cnt-$avl_hard_cnt | bc`
 
@@ -408,7 +340,7 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                         #==== HARDS UPDATE ===#
 
-                        $CONNECTION_STRING -vv -c "with cte as (select id from $SRC_TABLE where status=-1 and flag='B' and del_date is null and segment='$hard_seg' and subseg='$hard_subseg' order by random() limit $hard_cnt) update $SRC_TABLE a set del_date='$hard_deldate' from cte b where a.id=b.id"
+                        $CONNECTION_STRING -vv -c "with cte as (select id from $SRC_TABLE where status=-1 and flag='B' and del_date is null and segment='$hard_seg' and subseg='$hard_subseg' order by rnd limit $hard_cnt) update $SRC_TABLE a set del_date='$hard_deldate' from cte b where a.id=b.id"
 
                         if [[ $? -ne 0 ]]
                         then
@@ -423,6 +355,7 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                 done <$SPOOLPATH/total_hards_del_date
 
+                $CONNECTION_STRING -vv -c "drop index if exists $src_rnd_idx"
 
         else
 
@@ -440,324 +373,76 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
         echo "Analyzing SRC_TABLE before frequency deficit inserts: `date`"
         $CONNECTION_STRING -vv -c "ANALYZE $SRC_TABLE"
 
-        while read decile_stats
-        do
-                cpm_sent=`echo $decile_stats | cut -d'|' -f1`
-                cpm_seg=`echo $decile_stats | cut -d'|' -f5`
-                cpm_subseg=`echo $decile_stats | cut -d'|' -f6`
-                cpm_decile=`echo $decile_stats | cut -d'|' -f7`
-                old_per=`echo $decile_stats | cut -d'|' -f8`
-
-                total_old=`echo $old_per*$cpm_sent/100 | bc`
-
-                avl_old=`$CONNECTION_STRING -qtAX -c " select count(email) from $SRC_TABLE where segment='$cpm_seg' and subseg='$cpm_subseg' and decile='$cpm_decile' and freq=0"`
-
-                if [[ $total_old -gt $avl_old ]]
-                then
-
-                        req_old=`echo $total_old-$avl_old | bc`
-
-                        # OLD frequency inserts - with session optimization settings
-                        $CONNECTION_STRING -vv -c "$PG_SESSION_SETTINGS with cte as ( select a.*,(case when c.email is not null then 0 else 1 end) trt_freq from $TRT_TABLE a left join $SRC_TABLE b on a.email=b.email left join $OLD_DATA c on a.email=c.email $include_hards_status b.email is null and a.segment='$cpm_seg' and a.subseg='$cpm_subseg' and a.decile='$cpm_decile'  ) insert into $SRC_TABLE($trt_header,freq) select $select_ver * from cte order by trt_freq $priority_order limit $req_old"
-                        #$CONNECTION_STRING -vv -c "WITH candidates AS (SELECT a.*, CASE WHEN c.email IS NOT NULL THEN 0 ELSE 1 END AS trt_freq FROM $TRT_TABLE a LEFT JOIN $OLD_DATA c ON a.email = c.email $include_hards_status NOT EXISTS (SELECT 1 FROM $SRC_TABLE b WHERE b.email = a.email) AND a.segment = '$cpm_seg' AND a.subseg = '$cpm_subseg' AND a.decile = '$cpm_decile'), ranked AS (SELECT * FROM candidates a ORDER BY trt_freq  $priority_order ) INSERT INTO $SRC_TABLE($trt_header, freq) SELECT $select_ver * FROM ranked LIMIT $req_old;"
-
-                        if [[ $? -ne 0 ]]
-                        then
-
-                                error_fun "4" "Unable to insert freq wise deficit inserts."
-                                exit
-
-                        fi
-
-                        total_avl=`$CONNECTION_STRING -qtAX -c " select count(email) from $SRC_TABLE where segment='$cpm_seg' and subseg='$cpm_subseg' and decile='$cpm_decile'"`
-
-                        req_new=`echo $cpm_sent-$total_avl | bc`
-
-                        if [[ $req_new -gt 0 ]]
-                        then
-
-                                echo "SRC Decile Wise, Frequency wise insert Start time: `date`"
-
-                                # NEW frequency inserts - with session optimization settings (fixes 2hr+ query)
-                                $CONNECTION_STRING -vv -c "$PG_SESSION_SETTINGS with cte as ( select a.*,(case when c.email is not null then 0 else 1 end) trt_freq from $TRT_TABLE a left join $SRC_TABLE b on a.email=b.email  left join $OLD_DATA c on a.email=c.email $include_hards_status b.email is null and a.segment='$cpm_seg' and a.subseg='$cpm_subseg' and a.decile='$cpm_decile' ) insert into $SRC_TABLE($trt_header,freq) select $select_ver * from cte order by trt_freq desc  $priority_order  limit $req_new "
-                                #$CONNECTION_STRING -vv -c "WITH candidates AS (SELECT a.*, CASE WHEN c.email IS NOT NULL THEN 0 ELSE 1 END AS trt_freq FROM $TRT_TABLE a LEFT JOIN $OLD_DATA c ON a.email = c.email $include_hards_status NOT EXISTS (SELECT 1 FROM $SRC_TABLE b WHERE b.email = a.email) AND a.segment = '$cpm_seg' AND a.subseg = '$cpm_subseg' AND a.decile = '$cpm_decile'), ranked AS (SELECT * FROM candidates a ORDER BY trt_freq DESC $priority_order ) INSERT INTO $SRC_TABLE($trt_header, freq) SELECT $select_ver * FROM ranked LIMIT $req_new;"
-                        if [[ $? -ne 0 ]]
-                        then
-
-                                error_fun "4" "Unable to insert freq wise deficit inserts."
-                                exit
-
-                        fi
-
-                                echo "SRC Decile Wise, Frequency wise insert End time: `date`"
-
-                        elif [[ $req_new -lt 0 ]]
-                        then
-
-                                req_new_1=`echo $req_new | sed 's/-//g'`
-
-                                $CONNECTION_STRING -vv -c " with cte as ( select id from $SRC_TABLE where segment='$cpm_seg' and subseg='$cpm_subseg' and decile='$cpm_decile' and status in (0,1,2,3) and flag is null order by freq desc,status limit $req_new_1 ) delete from $SRC_TABLE a using cte b where a.id=b.id "
-
-                                if [[ $? -ne 0 ]]
-                                then
-
-                                        error_fun "4" "Unable to insert freq wise deficit inserts."
-                                        exit
-
-                                fi
-
-                        fi
-
-                elif [[ $total_old -lt $avl_old ]]
-                then
-
-                                                extra_gen=`expr $avl_old - $total_old | bc `
-
-                         $CONNECTION_STRING -vv -c " with cte as ( select id from $SRC_TABLE where segment='$cpm_seg' and subseg='$cpm_subseg' and decile='$cpm_decile' and status in (0,1,2,3) and flag is null order by status,freq  limit $extra_gen ) delete from $SRC_TABLE a using cte b where a.id=b.id "
-
-                         if [[ $? -ne 0 ]]
-                         then
-
-                                 error_fun "4" "Unable to delete extra old records from source"
-                                 exit
-
-                         fi
-
-
-                        total_avl=`$CONNECTION_STRING -qtAX -c " select count(email) from $SRC_TABLE where segment='$cpm_seg' and subseg='$cpm_subseg' and decile='$cpm_decile'"`
-
-                        req_cnt=`echo $cpm_sent-$total_avl | bc `
-
-                        if [[ $req_cnt -gt 0 ]]
-                        then
-
-                                # Deficit inserts - with session optimization settings
-                                $CONNECTION_STRING -vv -c "$PG_SESSION_SETTINGS with cte as ( select a.*,(case when c.email is not null then 0 else 1 end) trt_freq from $TRT_TABLE a left join $SRC_TABLE b on a.email=b.email left join $OLD_DATA c on a.email=c.email $include_hards_status b.email is null and a.segment='$cpm_seg' and a.subseg='$cpm_subseg' and a.decile='$cpm_decile' ) insert into $SRC_TABLE($trt_header,freq) select $select_ver * from cte order by trt_freq desc $priority_order limit $req_cnt"
-                                #$CONNECTION_STRING -vv -c "WITH candidates AS (SELECT a.*, CASE WHEN c.email IS NOT NULL THEN 0 ELSE 1 END AS trt_freq FROM $TRT_TABLE a LEFT JOIN $OLD_DATA c ON a.email = c.email $include_hards_status NOT EXISTS (SELECT 1 FROM $SRC_TABLE b WHERE b.email = a.email) AND a.segment = '$cpm_seg' AND a.subseg = '$cpm_subseg' AND a.decile = '$cpm_decile'), ranked AS (SELECT * FROM candidates a ORDER BY trt_freq DESC $priority_order ) INSERT INTO $SRC_TABLE($trt_header, freq) SELECT $select_ver * FROM ranked LIMIT $req_cnt;"
-                                if [[ $? -ne 0 ]]
-                                then
-
-                                        error_fun "4" "Unable to insert freq wise deficit inserts."
-                                        exit
-
-                                fi
-
-
-                        else
+        # All (segment, subseg, decile) quotas are allocated set-based, one statement per step
+        if [[ $bounce_as_delivered == 'Y' ]]
+        then
+                alloc_hards_opt=""
+        else
+                alloc_hards_opt="--exclude-hards $HARDS_TABLE"
+        fi
 
-                                req_cnt_1=`echo $req_cnt | sed 's/-//g'`
+        echo "SRC Decile Wise, Frequency wise allocation Start time: `date`"
 
-                                $CONNECTION_STRING -vv -c " with cte as ( select id from $SRC_TABLE where segment='$cpm_seg' and subseg='$cpm_subseg' and decile='$cpm_decile' and status in (0,1,2,3) and flag is null order by freq desc,status limit $req_cnt_1 ) delete from $SRC_TABLE a using cte b where a.id=b.id "
+        python3 $SCRIPTPATH/src_allocation.py "$REQUEST_ID" "$SRC_TABLE" "$TRT_TABLE" "$OLD_DATA" "$unique_decile_file" $alloc_priority_opt $alloc_hards_opt --session-settings "$PG_SESSION_SETTINGS"
 
-                                if [[ $? -ne 0 ]]
-                                then
+        if [[ $? -ne 0 ]]
+        then
 
-                                        error_fun "4" "Unable to insert freq wise deficit inserts."
-                                        exit
+                error_fun "4" "Unable to insert freq wise deficit inserts."
+                exit
 
-                                fi
+        fi
 
-                        fi
-                fi
-                decile_loop_counter=$((decile_loop_counter + 1))
-                # ANALYZE only (no VACUUM) every 5 iterations for fresh stats
-                if [[ $((decile_loop_counter % 5)) -eq 0 ]]; then
-                        $CONNECTION_STRING -vv -c "ANALYZE $SRC_TABLE"
-                fi
-                # Full VACUUM ANALYZE every 20 iterations
-                if [[ $((decile_loop_counter % 20)) -eq 0 ]]; then
-                        $CONNECTION_STRING -vv -c "vacuum analyze $SRC_TABLE"
-                fi
+        echo "SRC Decile Wise, Frequency wise allocation End time: `date`"
 
-        done <$unique_decile_file
+        $CONNECTION_STRING -vv -c "vacuum analyze $SRC_TABLE"
 
 
         $CONNECTION_STRING -qtAX -c "select sum(DEL_COUNT) cnt,sum(UNSUB_COUNT) unsub_cnt,sum(SOFT_COUNT) softs,segment,sub_seg,del_date from $REPORT_TABLE group by 4,5,6 order by 4,5,6"> $SPOOLPATH/deldate_counts
 
 
 
-        #=== UPDATE DEL_DATES TO NULL FOR EXTRA DATA ====#
-
-
-        while read read_del_cnt
-        do
-
-                del_cnt=`echo $read_del_cnt | cut -d'|' -f1`
-                unsub_cnt=`echo $read_del_cnt | cut -d'|' -f2`
-                soft_cnt=`echo $read_del_cnt | cut -d'|' -f3`
-                del_seg=`echo $read_del_cnt | cut -d'|' -f4`
-                del_subseg=`echo $read_del_cnt | cut -d'|' -f5`
-                del_deldate=`echo $read_del_cnt | cut -d'|' -f6`
-
-                avl_del_cnt=`$CONNECTION_STRING -qtAX -c "select count(email) from $SRC_TABLE where del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' " `
-
-                req_del_cnt=`echo $del_cnt-$avl_del_cnt | bc`
-
-                if [[ $req_del_cnt -lt 0 ]]
-                then
-
-                    req_del_cnt_1=`echo $req_del_cnt | sed 's/-//g'`
-
-                    $CONNECTION_STRING -vv -c "with cte as (select id from $SRC_TABLE where del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' and status in (0,1,2,3)  and flag is null order by status,random() limit $req_del_cnt_1) update $SRC_TABLE a set del_date=null from cte b where a.id=b.id"
-
-                    if [[ $? -ne 0 ]]
-                    then
-
-                            error_fun "4" "Unable to update deldate"
-                            exit
-
-                    fi
-
-                fi
-
-        done <$SPOOLPATH/deldate_counts
-
         #=== UPDATE DELIVERED DATES ,SOFTS & UNSUBS ====#
+        # Every report row is assigned in one pass and applied with one bulk UPDATE
 
-        while read read_del_cnt
-        do
-
-                del_cnt=`echo $read_del_cnt | cut -d'|' -f1`
-                unsub_cnt=`echo $read_del_cnt | cut -d'|' -f2`
-                soft_cnt=`echo $read_del_cnt | cut -d'|' -f3`
-                del_seg=`echo $read_del_cnt | cut -d'|' -f4`
-                del_subseg=`echo $read_del_cnt | cut -d'|' -f5`
-                del_deldate=`echo $read_del_cnt | cut -d'|' -f6`
-
-
-                 #=== DELDATE UPDATE ====#
-
-
-                avl_del_cnt=`$CONNECTION_STRING -qtAX -c "select count(email) from $SRC_TABLE where del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' " `
-
-                req_del_cnt=`echo $del_cnt-$avl_del_cnt | bc`
-
-                if [[ $req_del_cnt -gt 0 ]]
-                then
-
-                        $CONNECTION_STRING -vv -c "with cte as (select id from $SRC_TABLE where del_date is null and segment='$del_seg' and subseg='$del_subseg' order by random() limit $req_del_cnt) update $SRC_TABLE a set del_date='$del_deldate' from cte b where a.id=b.id"
-
-                        if [[ $? -ne 0 ]]
-                        then
-
-                                error_fun "4" "Unable to update deldate"
-                                exit
-
-                        fi
-
-
-                else
-
-                        req_del_cnt_1=`echo $req_del_cnt | sed 's/-//g'`
-
-                        $CONNECTION_STRING -vv -c "with cte as (select id from $SRC_TABLE where del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' and status in (0,1,2,3)  and flag is null order by status,random() limit $req_del_cnt_1) update $SRC_TABLE a set del_date=null from cte b where a.id=b.id"
-
-                        if [[ $? -ne 0 ]]
-                        then
-
-                                error_fun "4" "Unable to update deldate"
-                                exit
-
-                        fi
-
-                fi
-
-
-                        #=== UNSUB UPDATE ====#
-
-
-                avl_unsub_cnt=`$CONNECTION_STRING -qtAX -c "select count(email) from $SRC_TABLE where del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' and unsub=1 " `
-
-                req_unsub_cnt=`echo $unsub_cnt-$avl_unsub_cnt | bc`
-
-                if [[ $req_unsub_cnt -gt 0 ]]
-                then
-
-                        $CONNECTION_STRING -vv -c "with cte as (select x.id from $SRC_TABLE x join $UNSUBS_TABLE y on x.email=y.email  where x.del_date='$del_deldate' and x.segment='$del_seg' and x.subseg='$del_subseg' and x.unsub=0 and x.flag is null order by x.status,random() limit $req_unsub_cnt) update $SRC_TABLE a set status=2,unsub=1 from cte b where a.id=b.id"
-
-                        if [[ $? -ne 0 ]]
-                        then
-
-                                error_fun "4" "Unable to update unsubs"
-                                exit
-
-                        fi
-
-                else
-
-                        req_unsub_cnt_1=`echo $req_unsub_cnt | sed 's/-//g'`
-
-                        $CONNECTION_STRING -vv -c "with cte as (select id from $SRC_TABLE where del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' and unsub=1 order by random() limit $req_unsub_cnt_1) update $SRC_TABLE a set unsub=0,status=2 from cte b where a.id=b.id"
-
-                        if [[ $? -ne 0 ]]
-                        then
-
-                                error_fun "4" "Unable to update unsubs"
-                                exit
-
-                        fi
+        if [[ $on_sent == 'Y' ]]
+        then
+                assign_softs_opt="--softs"
+        else
+                assign_softs_opt=""
+        fi
 
-                fi
+        python3 $SCRIPTPATH/src_assignment.py "$REQUEST_ID" "$SRC_TABLE" "$REPORT_TABLE" "$UNSUBS_TABLE" $assign_softs_opt
 
-                avl_unsub_cnt=`$CONNECTION_STRING -qtAX -c "select count(email) from $SRC_TABLE where del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' and unsub=1 " `
+        if [[ $? -ne 0 ]]
+        then
 
-                req_unsub_cnt=`echo $unsub_cnt-$avl_unsub_cnt | bc`
+                error_fun "4" "Unable to update deldate, unsubs and softs"
+                exit
 
-                if [[ $req_unsub_cnt -gt 0 ]]
-                then
+        fi
 
-                        $CONNECTION_STRING -vv -c "with cte as (select id from $SRC_TABLE where  flag is null and del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' and unsub=0 order by status,random() limit $req_unsub_cnt) update $SRC_TABLE a set status=2,unsub=1 from cte b where a.id=b.id"
+        $CONNECTION_STRING -vv -c "vacuum analyze $SRC_TABLE"
 
-                        if [[ $? -ne 0 ]]
-                        then
-
-                                error_fun "4" "Unable to update unsubs"
-                                exit
+                        $CONNECTION_STRING -vv -c "update $SRC_TABLE set status=0 where  flag ='S' "
 
-                        fi
 
+                #================================TOUCH 2 CHECK ==================#
 
-                fi
 
+                $CONNECTION_STRING -qtAX -c "select sum(DEL_COUNT) cnt,segment,sub_seg from $REPORT_TABLE group by 2,3 order by 2,3"> $SPOOLPATH/segment_wise_cnts
 
+                touch="1"
 
-                #=== SOFTS UPDATE ====#
+                load_group_counts "select 'deciles|'||segment||'|'||subseg||'|'||decile,count(email) from $SRC_TABLE group by 1"
 
-                if [[ $on_sent == 'Y' ]]
+                if [[ $? -ne 0 ]]
                 then
 
-                        if [[ $soft_cnt -gt 0 ]]
-                        then
-
-                                $CONNECTION_STRING -vv -c "with cte as (select id from $SRC_TABLE where  flag is null and del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' and unsub=0 order by status,random() limit $soft_cnt) update $SRC_TABLE a set flag='S' from cte b where a.id=b.id"
-
-                                if [[ $? -ne 0 ]]
-                                then
-
-                                        error_fun "4" "Unable to update softs"
-                                        exit
-
-                                fi
-
-
-                        fi
-
+                        error_fun "4" "Unable to pull decile counts from source table"
+                        exit
 
                 fi
-                $CONNECTION_STRING -vv -c "vacuum analyze $SRC_TABLE"
-
-
-        done <$SPOOLPATH/deldate_counts
-
-                        $CONNECTION_STRING -vv -c "update $SRC_TABLE set status=0 where  flag ='S' "
-
-
-                #================================TOUCH 2 CHECK ==================#
-
-
-                $CONNECTION_STRING -qtAX -c "select sum(DEL_COUNT) cnt,segment,sub_seg from $REPORT_TABLE group by 2,3 order by 2,3"> $SPOOLPATH/segment_wise_cnts
-
-                touch="1"
 
                 while read check_touch
                 do
@@ -766,7 +451,7 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
                                         cpm_subseg=`echo $check_touch | cut -d'|' -f6`
                                         cpm_decile=`echo $check_touch | cut -d'|' -f7`
 
-                     avl_cnt=`$CONNECTION_STRING -qtAX -c "select count(email) from $SRC_TABLE where segment='$cpm_seg' and subseg='$cpm_subseg' and decile='$cpm_decile' " `
+                     avl_cnt=`group_count "deciles|$cpm_seg|$cpm_subseg|$cpm_decile"`
 
                      if [[ $cpm_sent -gt $avl_cnt ]]
                      then
@@ -791,14 +476,8 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                 #================= NON-UNIQUE SOURCE BUILDING======================#
 
-                touch_counter="2"
-
-                while [[ $touch -gt 1 && $touch_counter -le $touch ]]
-                do
-
-
-                        if [[ $touch_counter -eq 2 ]]
-                        then
+                if [[ $touch -gt 1 ]]
+                then
 
                                 UNIQ_SRC_TABLE=$SRC_TABLE\_UNIQ
 
@@ -806,7 +485,7 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                                 $CONNECTION_STRING -vv -c "create table $SRC_TABLE (like $TRT_TABLE)"
 
-                                $CONNECTION_STRING -vv -c "alter table $SRC_TABLE add status int default 0,add unsub int default 0,add freq int default 1,add flag varchar,add del_date varchar,add id serial primary key,add touch int default 1; comment on column $SRC_TABLE.status is '-1 - Bounce, 0 - Random, 1 - Genuine, 2 - Open, 3 - Click' "
+                                $CONNECTION_STRING -vv -c "alter table $SRC_TABLE add status int default 0,add unsub int default 0,add freq int default 1,add flag varchar,add del_date varchar,add id serial primary key,add touch int default 1,add rnd double precision default random(); comment on column $SRC_TABLE.status is '-1 - Bounce, 0 - Random, 1 - Genuine, 2 - Open, 3 - Click' "
                                 if [[ $client_name == 'VERIZON' ]]
                                 then
                                         $CONNECTION_STRING -vv -c " alter table $SRC_TABLE add unique(email,del_date,segment) "
@@ -830,53 +509,49 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                         $CONNECTION_STRING -vv -c " create index $src_index_2 on $SRC_TABLE (del_date,segment,subseg)"
 
-
-                        fi
-
-                        prev_touch=`expr $touch_counter - 1 |bc`
-
                         $CONNECTION_STRING -vv -c "UPDATE $REQUEST_TABLE set REQUEST_STATUS='R',REQUEST_DESC='Preparing NonUnique Source.' where REQUEST_ID=$REQUEST_ID "
                         #=== TOUCH DEFICIT INSERTS ===#
+                        # All touches in one statement: the eligible touch-1 rows of each decile group are
+                        # ranked by del_date and repeated over generate_series(2,touch); copy number
+                        # (t-2)*eligible+rn is kept while it is within the group's deficit, which is what
+                        # the former touch_counter loop inserted round by round.
 
+                        touch_quota=`awk -F'|' -v q="'" 'NF>=7 && $1!="" { gsub(/,/,"",$1); printf "%s(%s%s%s,%s%s%s,%s%s%s,%d)", sep, q, $5, q, q, $6, q, q, $7, q, $1; sep="," }' $decile_file`
 
-                        while read decile_stats
-                        do
-                                cpm_sent=`echo $decile_stats | cut -d'|' -f1`
-                                cpm_seg=`echo $decile_stats | cut -d'|' -f5`
-                                cpm_subseg=`echo $decile_stats | cut -d'|' -f6`
-                                cpm_decile=`echo $decile_stats | cut -d'|' -f7`
-
-                                avl_cnt=`$CONNECTION_STRING -qtAX -c "select count(email) from $SRC_TABLE where segment='$cpm_seg' and subseg='$cpm_subseg'  and decile='$cpm_decile' " `
-
-                                if [[ $cpm_sent -gt $avl_cnt ]]
-                                then
-
-                                        req_cnt=`echo $cpm_sent-$avl_cnt | bc`
-
-                                        if [[ $req_cnt -gt 0 ]]
-                                        then
+                        $CONNECTION_STRING -vv -c "$PG_SESSION_SETTINGS with quota as ( select segment,subseg,decile,max(cpm_sent) cpm_sent from (values $touch_quota) q(segment,subseg,decile,cpm_sent) group by 1,2,3 ),
+                                need as ( select q.segment,q.subseg,q.decile,q.cpm_sent-count(s.email) req_cnt from quota q left join $SRC_TABLE s on s.segment=q.segment and s.subseg=q.subseg and s.decile=q.decile group by q.segment,q.subseg,q.decile,q.cpm_sent ),
+                                base as ( select s.*,n.req_cnt,row_number() over (partition by s.segment,s.subseg,s.decile order by s.del_date) touch_rn,count(*) over (partition by s.segment,s.subseg,s.decile) touch_base from $SRC_TABLE s join need n on s.segment=n.segment and s.subseg=n.subseg and s.decile=n.decile where n.req_cnt>0 and (s.flag is null or s.flag='S') and s.unsub=0 and s.touch=1 )
+                                insert into $SRC_TABLE($trt_header,status,unsub,freq,touch) select $trt_header,0,unsub,freq,t from base cross join generate_series(2,$touch) t where (t-2)*touch_base+touch_rn <= req_cnt"
 
-                                                $CONNECTION_STRING -vv -c " with cte as ( select $trt_header,0 status,unsub,freq from  $SRC_TABLE  where segment='$cpm_seg' and subseg='$cpm_subseg' and decile='$cpm_decile' and (flag is null or flag='S') and unsub=0 and touch=$prev_touch order by del_date) insert into $SRC_TABLE($trt_header,status,unsub,freq,touch) select $trt_header,status,unsub,freq,$touch_counter from cte limit $req_cnt"
+                        if [[ $? -ne 0 ]]
+                        then
 
-                                                if [[ $? -ne 0 ]]
-                                                then
+                                error_fun "4" "Unable to insert deficits into non-unique src table "
+                                exit
 
-                                                        error_fun "4" "Unable to insert deficits into non-unique src table "
-                                                        exit
+                        fi
 
-                                                fi
+                        # Random rank indexes of the del_date, unsub and soft picks
+                        src_touch_rnd_idx=src_touch_rnd_idx_$REQUEST_ID
+                        src_rnd_idx_3=src_rnd_idx_3_$REQUEST_ID
 
-                                        fi
+                        $CONNECTION_STRING -vv -c " create index $src_touch_rnd_idx on $SRC_TABLE (segment,subseg,del_date,rnd)"
+                        $CONNECTION_STRING -vv -c " create index $src_rnd_idx_3 on $SRC_TABLE (segment,subseg,del_date,status,rnd)"
 
-                                fi
-                                $CONNECTION_STRING -vv -c "vacuum analyze $SRC_TABLE"
+                        $CONNECTION_STRING -vv -c "vacuum analyze $SRC_TABLE"
 
+                        #==== TOUCH DEL_DATE,SOFTS & UNSUBS SETUP ===#
+                        # Runs once, over the undated rows of every touch
 
+                        load_group_counts "select x.* from (select segment||'|'||subseg||'|'||del_date grp,count(email) dels,count(email) filter (where unsub=1) unsubs,count(email) filter (where flag='S') softs from $SRC_TABLE where del_date is not null group by 1) g cross join lateral (values ('touch_dels|'||grp,dels),('touch_unsubs|'||grp,unsubs),('touch_softs|'||grp,softs)) x"
 
-                        done <$decile_file
+                        if [[ $? -ne 0 ]]
+                        then
 
-                        #==== TOUCH DEL_DATE,SOFTS & UNSUBS SETUP ===#
+                                error_fun "4" "Unable to pull deldate counts from non-unique src table "
+                                exit
 
+                        fi
 
                         while read read_del_cnt
                         do
@@ -892,7 +567,9 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
                                 #=== DELDATE UPDATE ====#
 
 
-                                avl_del_cnt=`$CONNECTION_STRING -qtAX -c "select count(email) from $SRC_TABLE where del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' " `
+                                del_group="$del_seg|$del_subseg|$del_deldate"
+
+                                avl_del_cnt=`group_count "touch_dels|$del_group"`
 
                                 req_del_cnt=`echo $del_cnt-$avl_del_cnt | bc`
 
@@ -900,7 +577,8 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
                                 then
 
                                         #$CONNECTION_STRING -vv -c "with cte as (select x.id from $SRC_TABLE x  left join (select email from $SRC_TABLE  where del_date='$del_deldate' ) y on x.email=y.email where y.email is null and x.del_date is null and x.segment='$del_seg' and x.subseg='$del_subseg' order by random() limit $req_del_cnt) update $SRC_TABLE a set del_date='$del_deldate' from cte b where a.id=b.id"
-                                        $CONNECTION_STRING -vv -c " WITH cte AS (  SELECT x.id FROM $SRC_TABLE x WHERE NOT EXISTS ( SELECT 1 FROM $SRC_TABLE y  WHERE y.email = x.email AND y.del_date = '$del_deldate' ) AND x.del_date IS NULL AND x.segment = '$del_seg' AND x.subseg = '$del_subseg' ORDER BY random() LIMIT $req_del_cnt) UPDATE $SRC_TABLE a SET del_date = '$del_deldate' FROM cte b WHERE a.id = b.id "
+                                        # One undated copy per email: NOT EXISTS only sees the rows dated before this statement
+                                        dated_cnts=`$CONNECTION_STRING -qtAX -c " WITH cte AS (  SELECT d.id FROM ( SELECT DISTINCT ON (x.email) x.id, x.rnd FROM $SRC_TABLE x WHERE NOT EXISTS ( SELECT 1 FROM $SRC_TABLE y  WHERE y.email = x.email AND y.del_date = '$del_deldate' ) AND x.del_date IS NULL AND x.segment = '$del_seg' AND x.subseg = '$del_subseg' ORDER BY x.email, x.rnd ) d ORDER BY d.rnd LIMIT $req_del_cnt) , rows AS ( UPDATE $SRC_TABLE a SET del_date = '$del_deldate', rnd = random() FROM cte b WHERE a.id = b.id RETURNING a.email, a.unsub, a.flag ) SELECT count(email), count(email) FILTER (WHERE unsub = 1), count(email) FILTER (WHERE flag = 'S') FROM rows "`
 
                                                 if [[ $? -ne 0 ]]
                                                 then
@@ -910,19 +588,23 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                                                 fi
 
+                                        add_group_count "touch_dels|$del_group" `echo $dated_cnts | cut -d'|' -f1`
+                                        add_group_count "touch_unsubs|$del_group" `echo $dated_cnts | cut -d'|' -f2`
+                                        add_group_count "touch_softs|$del_group" `echo $dated_cnts | cut -d'|' -f3`
+
                                 fi
 
                                 #=== UNSUB UPDATE ====#
 
 
-                                avl_unsub_cnt=`$CONNECTION_STRING -qtAX -c "select count(email) from $SRC_TABLE where del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' and unsub=1 " `
+                                avl_unsub_cnt=`group_count "touch_unsubs|$del_group"`
 
                                 req_unsub_cnt=`echo $unsub_cnt-$avl_unsub_cnt | bc`
 
                                 if [[ $req_unsub_cnt -gt 0 ]]
                                 then
 
-                                        $CONNECTION_STRING -vv -c "with cte as (select x.id from $SRC_TABLE x join $UNSUBS_TABLE y on x.email=y.email  where x.del_date='$del_deldate' and x.segment='$del_seg' and x.subseg='$del_subseg' and x.unsub=0 order by x.status,random() limit $req_unsub_cnt) update $SRC_TABLE a set status=2,unsub=1 from cte b where a.id=b.id"
+                                        unsub_upd_cnt=`$CONNECTION_STRING -qtAX -c "with cte as (select x.id from $SRC_TABLE x join $UNSUBS_TABLE y on x.email=y.email  where x.del_date='$del_deldate' and x.segment='$del_seg' and x.subseg='$del_subseg' and x.unsub=0 order by x.status,x.rnd limit $req_unsub_cnt) , rows as ( update $SRC_TABLE a set status=2,unsub=1 from cte b where a.id=b.id returning a.email ) select count(email) from rows"`
 
                                                 if [[ $? -ne 0 ]]
                                                 then
@@ -932,11 +614,13 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                                                 fi
 
+                                        add_group_count "touch_unsubs|$del_group" $unsub_upd_cnt
+
                                 else
 
                                         req_unsub_cnt_1=`echo $req_unsub_cnt | sed 's/-//g'`
 
-                                        $CONNECTION_STRING -vv -c "with cte as (select id from $SRC_TABLE where del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' and unsub=1 order by random() limit $req_unsub_cnt_1) update $SRC_TABLE a set unsub=0,status=2 from cte b where a.id=b.id"
+                                        unsub_upd_cnt=`$CONNECTION_STRING -qtAX -c "with cte as (select id from $SRC_TABLE where del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' and unsub=1 order by rnd limit $req_unsub_cnt_1) , rows as ( update $SRC_TABLE a set unsub=0,status=2,rnd=random() from cte b where a.id=b.id returning a.email ) select count(email) from rows"`
 
                                                 if [[ $? -ne 0 ]]
                                                 then
@@ -946,17 +630,19 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                                                 fi
 
+                                        add_group_count "touch_unsubs|$del_group" -$unsub_upd_cnt
+
 
                                 fi
 
-                                avl_unsub_cnt=`$CONNECTION_STRING -qtAX -c "select count(email) from $SRC_TABLE where del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' and unsub=1 " `
+                                avl_unsub_cnt=`group_count "touch_unsubs|$del_group"`
 
                                 req_unsub_cnt=`echo $unsub_cnt-$avl_unsub_cnt | bc`
 
                                 if [[ $req_unsub_cnt -gt 0 ]]
                                 then
 
-                                        $CONNECTION_STRING -vv -c "with cte as (select id from $SRC_TABLE where  del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' and unsub=0 order by status,random() limit $req_unsub_cnt) update $SRC_TABLE a set status=2,unsub=1 from cte b where a.id=b.id"
+                                        unsub_upd_cnt=`$CONNECTION_STRING -qtAX -c "with cte as (select id from $SRC_TABLE where  del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' and unsub=0 order by status,rnd limit $req_unsub_cnt) , rows as ( update $SRC_TABLE a set status=2,unsub=1 from cte b where a.id=b.id returning a.email ) select count(email) from rows"`
 
                                                 if [[ $? -ne 0 ]]
                                                 then
@@ -966,6 +652,8 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                                                 fi
 
+                                        add_group_count "touch_unsubs|$del_group" $unsub_upd_cnt
+
 
                                 fi
 
@@ -975,14 +663,14 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                                 if [[ $on_sent == 'Y' ]]
                                 then
-                                                                                avl_soft_cnt=`$CONNECTION_STRING -qtAX -c "select count(email) from $SRC_TABLE where del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' and flag='S' " `
+                                                                                avl_soft_cnt=`group_count "touch_softs|$del_group"`
 
                                                                                 req_soft_cnt=`echo $soft_cnt-$avl_soft_cnt | bc`
 
                                         if [[ $req_soft_cnt -gt 0 ]]
                                         then
 
-                                                $CONNECTION_STRING -vv -c "with cte as (select id from $SRC_TABLE where  flag is null and del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' and unsub=0 order by status,random() limit $req_soft_cnt) update $SRC_TABLE a set flag='S' from cte b where a.id=b.id"
+                                                $CONNECTION_STRING -vv -c "with cte as (select id from $SRC_TABLE where  flag is null and del_date='$del_deldate' and segment='$del_seg' and subseg='$del_subseg' and unsub=0 order by status,rnd limit $req_soft_cnt) update $SRC_TABLE a set flag='S' from cte b where a.id=b.id"
 
                                                 if [[ $? -ne 0 ]]
                                                 then
@@ -1000,13 +688,25 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                         done <$SPOOLPATH/deldate_counts
 
+                fi
+
+                                $CONNECTION_STRING -vv -c " update $SRC_TABLE set status=0 where flag ='S' "
 
+                #=== RANDOM RANK INDEXES FOR DECILE / DELDATE WISE PICKS ===#
+                # (the non-unique SRC already has the del_date one, built for the touch picks)
 
-                        touch_counter=`expr $touch_counter + 1 |bc`
+                src_rnd_idx_2=src_rnd_idx_2_$REQUEST_ID
 
-                done
+                $CONNECTION_STRING -vv -c "create index $src_rnd_idx_2 on $SRC_TABLE (segment,subseg,decile,status,rnd)"
 
-                                $CONNECTION_STRING -vv -c " update $SRC_TABLE set status=0 where flag ='S' "
+                if [[ $touch -le 1 ]]
+                then
+
+                        src_rnd_idx_3=src_rnd_idx_3_$REQUEST_ID
+
+                        $CONNECTION_STRING -vv -c "create index $src_rnd_idx_3 on $SRC_TABLE (segment,subseg,del_date,status,rnd)"
+
+                fi
 
 
 
@@ -1033,6 +733,16 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                 #==== DECILE WISE OPENS/CLICKS SETUP ====#
 
+                        load_group_counts "select x.* from (select segment||'|'||subseg||'|'||decile grp,count(email) filter (where status=3) clicks,count(email) filter (where status in (2,3)) opens from $SRC_TABLE group by 1) g cross join lateral (values ('decile_clicks|'||grp,clicks),('decile_opens|'||grp,opens)) x"
+
+                        if [[ $? -ne 0 ]]
+                        then
+
+                                error_fun "4" "Unable to pull decile wise opens-clicks counts from src table "
+                                exit
+
+                        fi
+
                         while read decile_stats
                         do
                                 cpm_sent=`echo $decile_stats | cut -d'|' -f1`
@@ -1049,14 +759,16 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
                                 req_click=`expr 90*$cpm_click/100 | bc`
 
 
-                                avl_click_cnt=`$CONNECTION_STRING -qtAX -c "select count(email) from $SRC_TABLE where segment='$cpm_seg' and subseg='$cpm_subseg'  and decile='$cpm_decile'  and status=3" `
+                                decile_group="$cpm_seg|$cpm_subseg|$cpm_decile"
+
+                                avl_click_cnt=`group_count "decile_clicks|$decile_group"`
 
                                 if [[ $req_click -gt $avl_click_cnt ]]
                                 then
 
                                         req_cnt=`echo $req_click-$avl_click_cnt | bc`
 
-                                        $CONNECTION_STRING -vv -c " with cte as ( select a.id $select_ip_var from  $SRC_TABLE a $ip_var where a.segment='$cpm_seg' and a.subseg='$cpm_subseg' and a.decile='$cpm_decile' and a.flag is null and a.unsub=0 and a.status in (0,1,2) order by status desc $ip_order ,random() limit $req_cnt) update $SRC_TABLE a set status=3 from cte b where a.id=b.id "
+                                        click_upd_cnts=`$CONNECTION_STRING -qtAX -c " with cte as ( select a.id,a.status $select_ip_var from  $SRC_TABLE a $ip_var where a.segment='$cpm_seg' and a.subseg='$cpm_subseg' and a.decile='$cpm_decile' and a.flag is null and a.unsub=0 and a.status in (0,1,2) order by status desc $ip_order ,a.rnd desc limit $req_cnt) , rows as ( update $SRC_TABLE a set status=3,rnd=random() from cte b where a.id=b.id returning a.email,b.status ) select count(email),count(email) filter (where status in (0,1)) from rows "`
 
                                                 if [[ $? -ne 0 ]]
                                                 then
@@ -1066,13 +778,16 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                                                 fi
 
+                                        add_group_count "decile_clicks|$decile_group" `echo $click_upd_cnts | cut -d'|' -f1`
+                                        add_group_count "decile_opens|$decile_group" `echo $click_upd_cnts | cut -d'|' -f2`
+
 
                                 elif [[ $req_click -lt $avl_click_cnt ]]
                                 then
 
                                         excess_clicks=`expr $avl_click_cnt - $req_click |bc`
 
-                                        $CONNECTION_STRING -vv -c " with cte as ( select id from  $SRC_TABLE  where segment='$cpm_seg' and subseg='$cpm_subseg' and decile='$cpm_decile' and flag is null and unsub=0 and status=3 order by random() limit $excess_clicks) update $SRC_TABLE a set status=2 from cte b where a.id=b.id "
+                                        click_upd_cnt=`$CONNECTION_STRING -qtAX -c " with cte as ( select id from  $SRC_TABLE  where segment='$cpm_seg' and subseg='$cpm_subseg' and decile='$cpm_decile' and flag is null and unsub=0 and status=3 order by rnd limit $excess_clicks) , rows as ( update $SRC_TABLE a set status=2,rnd=random() from cte b where a.id=b.id returning a.email ) select count(email) from rows "`
 
                                                 if [[ $? -ne 0 ]]
                                                 then
@@ -1082,6 +797,8 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                                                 fi
 
+                                        add_group_count "decile_clicks|$decile_group" -$click_upd_cnt
+
                                 fi
 
                                 #=== OPENS ===#
@@ -1089,7 +806,7 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
                                 req_open=`expr 90*$cpm_open/100 | bc`
 
 
-                                avl_open_cnt=`$CONNECTION_STRING -qtAX -c "select count(email) from $SRC_TABLE where segment='$cpm_seg' and subseg='$cpm_subseg'  and decile='$cpm_decile'  and status in (2,3)" `
+                                avl_open_cnt=`group_count "decile_opens|$decile_group"`
 
 
 
@@ -1098,7 +815,7 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                                         req_open_cnt=`echo $req_open-$avl_open_cnt | bc`
 
-                                        $CONNECTION_STRING -vv -c " with cte as ( select a.id $select_ip_var from  $SRC_TABLE a $ip_var where segment='$cpm_seg' and subseg='$cpm_subseg' and decile='$cpm_decile' and flag is null and unsub=0 and status in (0,1) order by status desc $ip_order ,random() limit $req_open_cnt) update $SRC_TABLE a set status=2 from cte b where a.id=b.id "
+                                        open_upd_cnt=`$CONNECTION_STRING -qtAX -c " with cte as ( select a.id $select_ip_var from  $SRC_TABLE a $ip_var where segment='$cpm_seg' and subseg='$cpm_subseg' and decile='$cpm_decile' and flag is null and unsub=0 and status in (0,1) order by status desc $ip_order ,a.rnd desc limit $req_open_cnt) , rows as ( update $SRC_TABLE a set status=2,rnd=random() from cte b where a.id=b.id returning a.email ) select count(email) from rows "`
 
                                                 if [[ $? -ne 0 ]]
                                                 then
@@ -1108,13 +825,15 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                                                 fi
 
+                                        add_group_count "decile_opens|$decile_group" $open_upd_cnt
+
 
                                 elif [[ $req_open -lt $avl_open_cnt ]]
                                 then
 
                                         excess_opens=`expr $avl_open_cnt - $req_open |bc`
 
-                                        $CONNECTION_STRING -vv -c " with cte as ( select id from  $SRC_TABLE  where segment='$cpm_seg' and subseg='$cpm_subseg' and decile='$cpm_decile' and flag is null and unsub=0 and status=2 order by random() limit $excess_opens) update $SRC_TABLE a set status=1 from cte b where a.id=b.id "
+                                        open_upd_cnt=`$CONNECTION_STRING -qtAX -c " with cte as ( select id from  $SRC_TABLE  where segment='$cpm_seg' and subseg='$cpm_subseg' and decile='$cpm_decile' and flag is null and unsub=0 and status=2 order by rnd limit $excess_opens) , rows as ( update $SRC_TABLE a set status=1 from cte b where a.id=b.id returning a.email ) select count(email) from rows "`
 
                                                 if [[ $? -ne 0 ]]
                                                 then
@@ -1124,6 +843,8 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                                                 fi
 
+                                        add_group_count "decile_opens|$decile_group" -$open_upd_cnt
+
 
                                 fi
                                 $CONNECTION_STRING -vv -c "vacuum analyze $SRC_TABLE"
@@ -1139,6 +860,16 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                         $CONNECTION_STRING -qtAX -c "select sum(DEL_COUNT) cnt,sum(OPEN_COUNT) opens,sum(CLICK_COUNT) clics,sum(UNSUB_COUNT) unsubs,segment,sub_seg,del_date from $REPORT_TABLE group by 5,6,7 order by 5,6,7"> $SPOOLPATH/deldate_wise_counts
 
+                        load_group_counts "select x.* from (select segment||'|'||subseg||'|'||del_date grp,count(email) filter (where status=3) clicks,count(email) filter (where status in (2,3)) opens from $SRC_TABLE where del_date is not null group by 1) g cross join lateral (values ('date_clicks|'||grp,clicks),('date_opens|'||grp,opens)) x"
+
+                        if [[ $? -ne 0 ]]
+                        then
+
+                                error_fun "4" "Unable to pull del_date wise opens-clicks counts from src table "
+                                exit
+
+                        fi
+
                         while read del_stats
                         do
                                 cpm_sent=`echo $del_stats | cut -d'|' -f1`
@@ -1153,7 +884,9 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
                                 #=== CLICKS ===#
 
 
-                                avl_click_cnt=`$CONNECTION_STRING -qtAX -c "select count(email) from $SRC_TABLE where segment='$cpm_seg' and subseg='$cpm_subseg'  and del_date='$cpm_deldate'  and status=3" `
+                                date_group="$cpm_seg|$cpm_subseg|$cpm_deldate"
+
+                                avl_click_cnt=`group_count "date_clicks|$date_group"`
 
 
 
@@ -1162,7 +895,7 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                                         excess_clicks=`expr $avl_click_cnt - $cpm_click |bc`
 
-                                        $CONNECTION_STRING -vv -c " with cte as ( select id from  $SRC_TABLE  where segment='$cpm_seg' and subseg='$cpm_subseg' and del_date='$cpm_deldate' and flag is null and unsub=0 and status=3 order by random() limit $excess_clicks) update $SRC_TABLE a set status=2 from cte b where a.id=b.id "
+                                        $CONNECTION_STRING -vv -c " with cte as ( select id from  $SRC_TABLE  where segment='$cpm_seg' and subseg='$cpm_subseg' and del_date='$cpm_deldate' and flag is null and unsub=0 and status=3 order by rnd limit $excess_clicks) update $SRC_TABLE a set status=2,rnd=random() from cte b where a.id=b.id "
 
                                                 if [[ $? -ne 0 ]]
                                                 then
@@ -1176,7 +909,8 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                                 #=== OPENS ===#
 
-                                avl_open_cnt=`$CONNECTION_STRING -qtAX -c "select count(email) from $SRC_TABLE where segment='$cpm_seg' and subseg='$cpm_subseg'  and del_date='$cpm_deldate'  and status in (2,3)" `
+                                # demoting clickers to status 2 leaves the opens (status 2,3) count unchanged
+                                avl_open_cnt=`group_count "date_opens|$date_group"`
 
 
 
@@ -1185,7 +919,7 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                                         req_open_cnt=`echo $avl_open_cnt-$cpm_open | bc`
 
-                                        $CONNECTION_STRING -vv -c " with cte as ( select id from  $SRC_TABLE  where segment='$cpm_seg' and subseg='$cpm_subseg' and del_date='$cpm_deldate' and flag is null and unsub=0 and status=2 order by random() limit $req_open_cnt) update $SRC_TABLE a set status=1 from cte b where a.id=b.id "
+                                        $CONNECTION_STRING -vv -c " with cte as ( select id from  $SRC_TABLE  where segment='$cpm_seg' and subseg='$cpm_subseg' and del_date='$cpm_deldate' and flag is null and unsub=0 and status=2 order by rnd limit $req_open_cnt) update $SRC_TABLE a set status=1 from cte b where a.id=b.id "
 
 
                                                 if [[ $? -ne 0 ]]
@@ -1244,6 +978,8 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
                                 exit
                         fi
 
+                        # Partitions are unlogged: PARTITION_SRC is a scratch copy that the delivered consumers
+                        # delete from, rebuilt from SRC_TABLE on a code 5 retry, so its rows and indexes skip WAL
                         $CONNECTION_STRING -qtAX -c "select distinct del_date from $REPORT_TABLE "  > $SPOOLPATH/uniq_deldates
 
 
@@ -1253,7 +989,7 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                                 part_src_table=$PARTITION_SRC\_$date1
 
-                                $CONNECTION_STRING -vv -c "create table $part_src_table PARTITION OF $PARTITION_SRC FOR VALUES IN ('$date_')"
+                                $CONNECTION_STRING -vv -c "create unlogged table $part_src_table PARTITION OF $PARTITION_SRC FOR VALUES IN ('$date_')"
 
                                 if [[ $? -ne 0 ]]
                                 then
@@ -1268,7 +1004,8 @@ $CONNECTION_STRING -vv -c "ANALYZE $HARDS_TABLE"
 
                         #+== INSERT SRC INTO PARTITION SOURCE TABLE ===#
 
-                        $CONNECTION_STRING -vv -c "insert into $PARTITION_SRC select * from $SRC_TABLE where del_date is not null "
+                        # SRC's rnd pick key stays behind: the postback tables do not carry it
+                        $CONNECTION_STRING -vv -c "insert into $PARTITION_SRC($trt_header,status,unsub,freq,flag,del_date,id,touch) select $trt_header,status,unsub,freq,flag,del_date,id,touch from $SRC_TABLE where del_date is not null "
 
                         if [[ $? -ne 0 ]]
                         then
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Set-based quota allocation for the decile-wise frequency block of
+srcPreparation.sh.
+
+Every (segment, subseg, decile) group of the decile report has a sent quota
+(cpm_sent) and an old-delivered share (old_per). The quotas are loaded once
+into a temp table and each step is applied to all groups together:
+
+1. Old rows: groups short of freq=0 rows get TRT rows ranked trt_freq ASC
+   (old delivered first); groups with too many lose their lowest-status
+   rows.
+2. Totals: groups touched in step 1 are topped up to cpm_sent with TRT rows
+   ranked trt_freq DESC (new first), or trimmed by freq DESC, status.
+
+Inserts rank the TRT ⟕ SRC ⟕ OLD_DATA anti join with
+row_number() OVER (PARTITION BY segment, subseg, decile ...) and keep
+rn <= deficit, so one statement fills every group. An email wanted by
+several groups goes to the first one in report order; a group left short by
+that is topped up in a further round, so per-group counts match the former
+row-by-row loop.
+
+Usage:
+    python3 src_allocation.py <request_id> <src_table> <trt_table> <old_data_table> \
+        <decile_file> [--priority] [--exclude-hards <hards_table>] \
+        [--session-settings "<SET ...; SET ...>"]
+"""
+
+import argparse
+import logging
+import sys
+from decimal import Decimal
+
+from psycopg2.extras import execute_values
+
+from config_loader import get_config
+
+cfg = get_config()
+
+# Add python modules path and import DbConns
+sys.path.append(cfg.python_modules_path)
+from DbConns import *
+
+import process_tracking
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+QUOTA_TABLE = "src_alloc_quota"
+NEED_TABLE = "src_alloc_need"
+
+# SRC rows that may be trimmed (not bounces / forced rows)
+TRIM_FILTER = "s.status IN (0,1,2,3) AND s.flag IS NULL"
+
+GROUP_JOIN = "{a}.segment = q.segment AND {a}.subseg = q.subseg AND {a}.decile = q.decile"
+
+
+def load_quotas(path):
+    """
+    Read the decile report (Delivered|Opens|clicks|unsubs|segment|sub_seg|decile|old_per).
+
+    Returns:
+        List of (grp, segment, subseg, decile, cpm_sent, total_old), grp being
+        the report line order
+    """
+    quotas = []
+    with open(path) as handle:
+        for line in handle:
+            fields = [field.strip() for field in line.rstrip("\n").split("|")]
+            if len(fields) < 8 or not fields[0]:
+                continue
+            # Thousands separators only in the numeric fields; keys are kept as in SRC
+            cpm_sent = int(Decimal(fields[0].replace(",", "")))
+            # Same truncation as `echo $old_per*$cpm_sent/100 | bc`
+            total_old = int(Decimal(fields[7].replace(",", "")) * cpm_sent / 100)
+            quotas.append((len(quotas), fields[4], fields[5], fields[6], cpm_sent, total_old))
+    return quotas
+
+
+def create_work_tables(cur, quotas):
+    cur.execute(
+        f"CREATE TEMP TABLE {QUOTA_TABLE} (grp int PRIMARY KEY, segment varchar, "
+        f"subseg varchar, decile varchar, cpm_sent bigint, total_old bigint)"
+    )
+    execute_values(cur, f"INSERT INTO {QUOTA_TABLE} VALUES %s", quotas)
+    cur.execute(f"CREATE TEMP TABLE {NEED_TABLE} (grp int PRIMARY KEY, n bigint)")
+    cur.execute(f"ANALYZE {QUOTA_TABLE}")
+
+
+def set_needs(cur, needs):
+    cur.execute(f"TRUNCATE {NEED_TABLE}")
+    execute_values(cur, f"INSERT INTO {NEED_TABLE} VALUES %s", list(needs.items()))
+    cur.execute(f"ANALYZE {NEED_TABLE}")
+
+
+def group_counts(cur, src_table):
+    """{grp: (freq=0 rows, all rows)} for every quota group, in one scan."""
+    cur.execute(
+        f"SELECT q.grp, count(s.email) FILTER (WHERE s.freq = 0), count(s.email) "
+        f"FROM {QUOTA_TABLE} q LEFT JOIN {src_table} s ON {GROUP_JOIN.format(a='s')} "
+        f"GROUP BY q.grp"
+    )
+    return {grp: (avl_old, total) for grp, avl_old, total in cur.fetchall()}
+
+
+def trim_groups(cur, src_table, excess, order_by):
+    """Delete excess[grp] trimmable rows per group, lowest order_by first."""
+    excess = {grp: n for grp, n in excess.items() if n > 0}
+    if not excess:
+        return 0
+    set_needs(cur, excess)
+    cur.execute(f"""
+        WITH ranked AS (
+            SELECT s.id, n.n,
+                   row_number() OVER (PARTITION BY n.grp ORDER BY {order_by}) AS alloc_rn
+            FROM {src_table} s
+            JOIN {QUOTA_TABLE} q ON {GROUP_JOIN.format(a='s')}
+            JOIN {NEED_TABLE} n ON n.grp = q.grp
+            WHERE {TRIM_FILTER}
+        )
+        DELETE FROM {src_table} x USING ranked r WHERE x.id = r.id AND r.alloc_rn <= r.n
+    """)
+    return cur.rowcount
+
+
+def fill_groups(cur, args, columns, needs, trt_freq_order):
+    """
+    Insert needs[grp] TRT rows per group that are not in SRC yet, ranked by
+    trt_freq (trt_freq_order) then priority. Rounds repeat for groups left
+    short by cross-group email dedup until a round inserts nothing.
+
+    Returns:
+        (rows inserted, {grp: rows still missing} for the groups left short)
+    """
+    needs = {grp: n for grp, n in needs.items() if n > 0}
+    column_list = ", ".join(columns)
+    a_columns = ", ".join(f"a.{column}" for column in columns)
+    order = f"c.trt_freq {trt_freq_order}" + (", c.priority" if args.priority else "")
+    hards_join, hards_filter = "", ""
+    if args.exclude_hards:
+        hards_join = f"LEFT JOIN {args.exclude_hards} h ON a.email = h.email"
+        hards_filter = "AND h.email IS NULL"
+
+    inserted_total = 0
+    while needs:
+        set_needs(cur, needs)
+        cur.execute(f"""
+            WITH candidates AS (
+                SELECT {a_columns},
+                       (CASE WHEN o.email IS NOT NULL THEN 0 ELSE 1 END) AS trt_freq,
+                       q.grp AS alloc_grp
+                FROM {args.trt_table} a
+                JOIN {QUOTA_TABLE} q ON {GROUP_JOIN.format(a='a')}
+                JOIN {NEED_TABLE} n ON n.grp = q.grp
+                LEFT JOIN {args.src_table} b ON a.email = b.email
+                LEFT JOIN {args.old_data_table} o ON a.email = o.email
+                {hards_join}
+                WHERE b.email IS NULL {hards_filter}
+            ),
+            ranked AS (
+                SELECT c.*,
+                       row_number() OVER (PARTITION BY c.alloc_grp ORDER BY {order}) AS alloc_rn
+                FROM candidates c
+            ),
+            chosen AS (
+                SELECT r.*,
+                       row_number() OVER (PARTITION BY r.email ORDER BY r.alloc_grp, r.alloc_rn) AS email_rn
+                FROM ranked r
+                JOIN {NEED_TABLE} n ON n.grp = r.alloc_grp
+                WHERE r.alloc_rn <= n.n
+            ),
+            ins AS (
+                INSERT INTO {args.src_table} ({column_list}, freq)
+                SELECT {column_list}, trt_freq FROM chosen WHERE email_rn = 1
+                RETURNING segment, subseg, decile
+            )
+            SELECT q.grp, count(*)
+            FROM ins i JOIN {QUOTA_TABLE} q ON {GROUP_JOIN.format(a='i')}
+            GROUP BY q.grp
+        """)
+        inserted = dict(cur.fetchall())
+        round_total = sum(inserted.values())
+        inserted_total += round_total
+        if round_total == 0:
+            break
+        needs = {
+            grp: n - inserted.get(grp, 0)
+            for grp, n in needs.items()
+            if n - inserted.get(grp, 0) > 0
+        }
+    return inserted_total, needs
+
+
+def log_short_groups(quotas, short, step):
+    """Log every group the TRT could not fill up to its quota."""
+    keys = {q[0]: q[1:4] for q in quotas}
+    for grp, n in sorted(short.items()):
+        segment, subseg, decile = keys[grp]
+        logger.warning(
+            f"{step}: segment {segment}, subseg {subseg}, decile {decile} "
+            f"still {n} rows below quota"
+        )
+
+
+def allocate(conn, cur, args):
+    """Run the two allocation steps over all quota groups."""
+    quotas = load_quotas(args.decile_file)
+    logger.info(f"Loaded {len(quotas)} quota groups from {args.decile_file}")
+    if not quotas:
+        return
+
+    cur.execute(f"SELECT * FROM {args.trt_table} LIMIT 0")
+    columns = [desc[0] for desc in cur.description]
+
+    create_work_tables(cur, quotas)
+    cpm_sent = {q[0]: q[4] for q in quotas}
+    total_old = {q[0]: q[5] for q in quotas}
+
+    # Step 1: old-delivered share
+    counts = group_counts(cur, args.src_table)
+    old_short = {grp: total_old[grp] - counts[grp][0] for grp in cpm_sent if total_old[grp] > counts[grp][0]}
+    old_extra = {grp: counts[grp][0] - total_old[grp] for grp in cpm_sent if total_old[grp] < counts[grp][0]}
+
+    inserted, short = fill_groups(cur, args, columns, old_short, "ASC")
+    log_short_groups(quotas, short, "Old share")
+    deleted = trim_groups(cur, args.src_table, old_extra, "s.status, s.freq")
+    conn.commit()
+    logger.info(
+        f"Old share: {inserted} rows inserted for {len(old_short)} groups, "
+        f"{deleted} rows removed from {len(old_extra)} groups"
+    )
+
+    # Step 2: top up / trim to cpm_sent (groups whose old share was already exact are left as is)
+    cur.execute(f"ANALYZE {args.src_table}")
+    counts = group_counts(cur, args.src_table)
+    touched = set(old_short) | set(old_extra)
+    deficits = {grp: cpm_sent[grp] - counts[grp][1] for grp in touched}
+
+    inserted, short = fill_groups(cur, args, columns, deficits, "DESC")
+    log_short_groups(quotas, short, "Totals")
+    deleted = trim_groups(
+        cur, args.src_table, {grp: -n for grp, n in deficits.items()}, "s.freq DESC, s.status"
+    )
+    conn.commit()
+    logger.info(f"Totals: {inserted} rows inserted, {deleted} rows removed")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Set-based SRC quota allocation")
+    parser.add_argument("request_id")
+    parser.add_argument("src_table")
+    parser.add_argument("trt_table")
+    parser.add_argument("old_data_table")
+    parser.add_argument("decile_file")
+    parser.add_argument("--priority", action="store_true",
+                        help="Break trt_freq ties on the TRT priority column")
+    parser.add_argument("--exclude-hards", metavar="HARDS_TABLE",
+                        help="Skip TRT emails found in this hards table")
+    parser.add_argument("--session-settings", default="",
+                        help="SET statements applied to the session first")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+
+    # Track this process
+    process_tracking.track_process(args.request_id, "SRC_ALLOCATION")
+
+    conn, cur = getPgConnection()
+    try:
+        if args.session_settings:
+            cur.execute(args.session_settings)
+        allocate(conn, cur, args)
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Quota allocation failed: {e}")
+        sys.exit(1)
+    finally:
+        cur.close()
+        conn.close()
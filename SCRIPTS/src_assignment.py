@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Delivered-date, unsub and soft-bounce assignment for SRC tables.
+
+Replaces the per (del_date, segment, subseg) loops of srcPreparation.sh,
+which counted, then ran an UPDATE ... ORDER BY random() LIMIT n for dates,
+again for unsubs and again for softs on every CPM report row.
+
+All targets are read from the report table once and the SRC rows once.
+Every step draws its own random key per row, so "n random rows of a group"
+is a rank within the group. The changed rows are then COPY-loaded into a
+temp table and applied with one UPDATE ... FROM. The selection rules are
+those of the loops:
+
+- del_date: dates holding more rows than DEL_COUNT drop the excess
+  (status 0-3, no flag; lowest status first). Dates short of DEL_COUNT
+  take random undated rows of their segment/subseg, in report order.
+- unsub: short dates promote rows with no flag (emails in the unsubs
+  table first, then lowest status) to status=2, unsub=1. Dates with too
+  many unsubs demote random unsub rows to status=2, unsub=0.
+- soft (with --softs): SOFT_COUNT rows per date without flag or unsub
+  (lowest status first) get flag='S'.
+
+Usage:
+    python3 src_assignment.py <request_id> <src_table> <report_table> <unsubs_table> [--softs]
+"""
+
+import io
+import logging
+import sys
+
+import numpy as np
+import pandas as pd
+
+from config_loader import get_config
+
+cfg = get_config()
+
+# Add python modules path and import DbConns
+sys.path.append(cfg.python_modules_path)
+from DbConns import *
+
+import process_tracking
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+GROUP = ["segment", "subseg", "del_date"]
+ASSIGNED_COLUMNS = ["del_date", "status", "unsub", "flag"]
+ASSIGNMENT_TABLE = "src_assignment_changes"
+
+
+def load_targets(cur, report_table) -> pd.DataFrame:
+    """Per (segment, subseg, del_date) DEL/UNSUB/SOFT targets, in report order."""
+    cur.execute(
+        f"SELECT segment, sub_seg, del_date, coalesce(sum(DEL_COUNT), 0), "
+        f"coalesce(sum(UNSUB_COUNT), 0), coalesce(sum(SOFT_COUNT), 0) "
+        f"FROM {report_table} GROUP BY 1, 2, 3 ORDER BY 1, 2, 3"
+    )
+    targets = pd.DataFrame(
+        cur.fetchall(), columns=GROUP + ["del_cnt", "unsub_cnt", "soft_cnt"]
+    )
+    targets[GROUP] = targets[GROUP].astype(str)
+    targets["report_order"] = np.arange(len(targets))
+    return targets
+
+
+def load_src(cur, src_table, unsubs_table) -> pd.DataFrame:
+    """The SRC columns the assignment reads or writes, streamed with COPY."""
+    buffer = io.StringIO()
+    cur.copy_expert(
+        f"COPY (SELECT s.id, s.segment, s.subseg, s.del_date, s.status, s.unsub, s.flag, "
+        f"EXISTS (SELECT 1 FROM {unsubs_table} u WHERE u.email = s.email) AS in_unsubs "
+        f"FROM {src_table} s WHERE s.email IS NOT NULL) TO STDOUT WITH CSV",
+        buffer,
+    )
+    buffer.seek(0)
+    return pd.read_csv(
+        buffer,
+        header=None,
+        names=["id", "segment", "subseg", "del_date", "status", "unsub", "flag", "in_unsubs"],
+        dtype={"id": "int64", "segment": str, "subseg": str, "del_date": object,
+               "status": "Int64", "unsub": "Int64", "flag": object, "in_unsubs": str},
+        keep_default_na=False,
+        na_values={"del_date": [""], "status": [""], "unsub": [""], "flag": [""]},
+    ).assign(in_unsubs=lambda df: df["in_unsubs"] == "t")
+
+
+def _pick(df, mask, group, order, counts):
+    """
+    Index of the first counts[group] rows of df[mask] per group, ordered by
+    the order columns (the equivalent of ORDER BY ... LIMIT n per group).
+    """
+    candidates = df.loc[mask.fillna(False)].sort_values(group + order)
+    rank = candidates.groupby(group, sort=False).cumcount()
+    limit = counts.reindex(pd.MultiIndex.from_frame(candidates[group])).to_numpy()
+    return candidates.index[rank.to_numpy() < np.nan_to_num(limit)]
+
+
+def _per_group(targets, column):
+    return targets.set_index(GROUP)[column]
+
+
+def _group_sizes(df, mask):
+    return df.loc[mask.fillna(False)].groupby(GROUP).size()
+
+
+def assign_del_dates(df, targets, rng):
+    # Trim dates above DEL_COUNT
+    excess = (_group_sizes(df, df["del_date"].notna()) - _per_group(targets, "del_cnt")).dropna()
+    excess = excess[excess > 0]
+    df["r"] = rng.random(len(df))
+    trim = _pick(df, df["del_date"].notna() & df["status"].isin([0, 1, 2, 3]) & df["flag"].isna(),
+                 GROUP, ["status", "r"], excess)
+    df.loc[trim, "del_date"] = np.nan
+
+    # Fill short dates from the undated rows of the segment/subseg, in report order
+    available = _group_sizes(df, df["del_date"].notna())
+    current = available.reindex(pd.MultiIndex.from_frame(targets[GROUP])).fillna(0).to_numpy()
+    needs = targets.assign(need=(targets["del_cnt"] - current).clip(lower=0)).sort_values("report_order")
+    undated = df.loc[df["del_date"].isna(), ["segment", "subseg"]]
+    pool = undated.assign(r=rng.random(len(undated))).sort_values(["segment", "subseg", "r"])
+    pool["rank"] = pool.groupby(["segment", "subseg"], sort=False).cumcount()
+
+    # Pool row k of a segment/subseg goes to the first date whose cumulative need exceeds k
+    pool_groups = pool.groupby(["segment", "subseg"], sort=False)
+    for key, dates in needs.groupby(["segment", "subseg"], sort=False):
+        if key not in pool_groups.groups:
+            continue
+        members = pool_groups.get_group(key)
+        slots = np.searchsorted(dates["need"].cumsum().to_numpy(), members["rank"].to_numpy(), side="right")
+        filled = slots < len(dates)
+        df.loc[members.index[filled], "del_date"] = dates["del_date"].to_numpy()[slots[filled]]
+
+
+def assign_unsubs(df, targets):
+    targets_unsub = _per_group(targets, "unsub_cnt")
+    req = targets_unsub - _group_sizes(df, df["unsub"] == 1).reindex(targets_unsub.index).fillna(0)
+
+    df["not_in_unsubs"] = ~df["in_unsubs"]
+    dated = df["del_date"].notna()
+    promote = _pick(df, dated & (df["unsub"] == 0) & df["flag"].isna(),
+                    GROUP, ["not_in_unsubs", "status", "r_unsub"], req[req > 0])
+    demote = _pick(df, dated & (df["unsub"] == 1), GROUP, ["r_unsub"], -req[req < 0])
+    df.loc[promote, ["status", "unsub"]] = [2, 1]
+    df.loc[demote, ["status", "unsub"]] = [2, 0]
+    return len(promote), len(demote)
+
+
+def assign_softs(df, targets):
+    softs = _per_group(targets, "soft_cnt")
+    picked = _pick(df, df["del_date"].notna() & df["flag"].isna() & (df["unsub"] == 0),
+                   GROUP, ["status", "r_soft"], softs[softs > 0])
+    df.loc[picked, "flag"] = "S"
+    return len(picked)
+
+
+def _changed(before, after):
+    same = (before == after).fillna(False) | (before.isna() & after.isna())
+    return ~same.astype(bool)
+
+
+def apply_changes(conn, cur, src_table, original, df):
+    """COPY the changed rows into a temp table and apply them with one UPDATE."""
+    changed = np.zeros(len(df), dtype=bool)
+    for column in ASSIGNED_COLUMNS:
+        changed |= _changed(original[column], df[column]).to_numpy()
+    changes = df.loc[changed, ["id"] + ASSIGNED_COLUMNS]
+    if changes.empty:
+        return 0
+
+    cur.execute(
+        f"CREATE TEMP TABLE {ASSIGNMENT_TABLE} (id int PRIMARY KEY, del_date varchar, "
+        f"status int, unsub int, flag varchar) ON COMMIT DROP"
+    )
+    buffer = io.StringIO()
+    changes.to_csv(buffer, header=False, index=False, na_rep="")
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {ASSIGNMENT_TABLE} FROM STDIN WITH CSV", buffer)
+    cur.execute(f"ANALYZE {ASSIGNMENT_TABLE}")
+    cur.execute(
+        f"UPDATE {src_table} s SET del_date = c.del_date, status = c.status, "
+        f"unsub = c.unsub, flag = c.flag FROM {ASSIGNMENT_TABLE} c WHERE s.id = c.id"
+    )
+    updated = cur.rowcount
+    conn.commit()
+    return updated
+
+
+def assign(conn, cur, src_table, report_table, unsubs_table, softs):
+    rng = np.random.default_rng()
+    targets = load_targets(cur, report_table)
+    df = load_src(cur, src_table, unsubs_table)
+    original = df[ASSIGNED_COLUMNS].copy()
+    logger.info(f"Loaded {len(targets)} report rows and {len(df)} SRC rows")
+
+    assign_del_dates(df, targets, rng)
+    df["r_unsub"] = rng.random(len(df))
+    promoted, demoted = assign_unsubs(df, targets)
+    soft_count = 0
+    if softs:
+        df["r_soft"] = rng.random(len(df))
+        soft_count = assign_softs(df, targets)
+
+    updated = apply_changes(conn, cur, src_table, original, df)
+    logger.info(
+        f"{updated} SRC rows updated ({promoted} unsubs added, {demoted} removed, "
+        f"{soft_count} softs)"
+    )
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--softs"]
+    if len(args) != 4:
+        logger.error(
+            "Usage: python3 src_assignment.py <request_id> <src_table> <report_table> "
+            "<unsubs_table> [--softs]"
+        )
+        sys.exit(1)
+
+    request_id, src_table, report_table, unsubs_table = args
+
+    # Track this process
+    process_tracking.track_process(request_id, "SRC_ASSIGNMENT")
+
+    conn, cur = getPgConnection()
+    try:
+        assign(conn, cur, src_table, report_table, unsubs_table, "--softs" in sys.argv)
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"SRC assignment failed: {e}")
+        sys.exit(1)
+    finally:
+        cur.close()
+        conn.close()
@@ -55,118 +55,166 @@ supp_path=`$CONNECTION_STRING -qtAX -c "select SUPP_PATH from  $REQUEST_TABLE wh
 request_id_supp=`$CONNECTION_STRING -qtAX -c "select REQUEST_ID_SUPP from  $REQUEST_TABLE where REQUEST_ID=$REQUEST_ID"`
 
 
-if [[ $supp_path != '' ]]
-then
-
-dos2unix $supp_path
+#==== SUPPRESSION SOURCES ====#
+# Every source is registered as REASON=table:column and applied to the TRT
+# in one pass per partition by suppression_engine.py
 
-email_cnt=`head -5 $supp_path | grep '@' | wc -l`
+supp_sources=""
 
+offerid_unsub_supp=`$CONNECTION_STRING -qtAX -c "select upper(OFFERID_UNSUB_SUPP) from  $REQUEST_TABLE where REQUEST_ID=$REQUEST_ID"`
 
-if [[ $email_cnt -gt 0 ]]
+if [[ $offerid_unsub_supp == "Y" ]]
 then
 
+        # deliveredScript.sh drops the offer id unsubs: rebuilt from the report when Suppression is rerun after it
 
-        $CONNECTION_STRING -vv -c "create table $SUPP_TABLE(EMAIL VARCHAR)"
-        $CONNECTION_STRING -vv -c "\copy $SUPP_TABLE from '$supp_path'"
-        if [[ $? -ne 0 ]]
+        total_unsubs_exists=`$CONNECTION_STRING -qtAX -c "select to_regclass('$GREEN_TOTAL_UNSUBS_TEMP') is not null"`
+
+        if [[ $total_unsubs_exists != "t" ]]
         then
 
-                                error_fun "3" "Unable to copy suppression data file to the table"
-                exit
+                OFFERIDS=`$CONNECTION_STRING -qtAX -c "select DISTINCT trim(OFFERID)   from $REPORT_TABLE  " `
 
+                RANGE=`$CONNECTION_STRING -qtAX -F',' -c "select max(del_date),min(del_date)  from $REPORT_TABLE  " `
 
-        else
+                IFS=$',' read -r max_date_1 min_date <<< "$RANGE"
 
-                $CONNECTION_STRING -vv -c "update $REQUEST_TABLE set  REQUEST_DESC='SuppressionTable Created' where REQUEST_ID=$REQUEST_ID "
+                max_date=`date -d "$max_date_1 1 days" +%Y-%m-%d`
+
+                offers=`echo $OFFERIDS |sed "s/\b\([0-9]\+\)\b/'\1'/g"|tr ' ' ','`
+
+                python3 $SCRIPTPATH/green_responders.py "$REQUEST_ID" "$offers" "$min_date" "$max_date" --delivered-table "$GREEN_DELIVERED_TEMP" --opens-table "$GREEN_OPENS_TEMP" --clicks-table "$GREEN_CLICKS_TEMP" --total-unsubs-table "$GREEN_TOTAL_UNSUBS_TEMP" --unsubs-table "$GREEN_UNSUBS_TEMP" --final-table "$GREEN_FINAL_TEMP" --only green_total_unsubs
+
+                if [[ $? -ne 0 ]]
+                then
+
+                        error_fun "3" "Unable to rebuild offer id unsubs table"
+                        exit
+
+                fi
 
         fi
 
-        supp_index="supp_email_$REQUEST_ID"
-        $CONNECTION_STRING -vv -c "create index $supp_index on $SUPP_TABLE(EMAIL)"
+        supp_sources="$supp_sources OFFERID_UNSUB=$GREEN_TOTAL_UNSUBS_TEMP:email"
+
+fi
 
-        #suppressed_cnt=`$CONNECTION_STRING -qtAX -c "with cte as (delete from $TRT_TABLE a using $SUPP_TABLE b where a.email=b.email returning 1) select count(*) from cte"`
 
-        query="delete from $TRT_TABLE a using $SUPP_TABLE b where a.email=b.email "
-        suppressed_cnt=$(python3 "$SCRIPTPATH/delete_partitions.py" "$query" "$REQUEST_ID" 2>/dev/null)
+if [[ $supp_path != '' ]]
+then
 
+        # Cached per client and file content; only a changed file is reloaded (as a diff)
+        client_id=`$CONNECTION_STRING -qtAX -c "select CLIENT_ID from  $REQUEST_TABLE where REQUEST_ID=$REQUEST_ID"`
+
+        supp_list=$(python3 "$SCRIPTPATH/suppression_cache.py" "$client_id" "$supp_path" 2>/dev/null)
 
         if [[ $? -ne 0 ]]
         then
 
-                        error_fun "3" "Unable to perform suppression to the TRT"
-            exit
+                error_fun "3" "Unable to load suppression data file to the table"
+                exit
+
         else
 
-                $CONNECTION_STRING -vv -c "update $REQUEST_TABLE set   ERROR_CODE=0,REQUEST_STATUS='R',REQUEST_DESC='Client Suppression Performed' where REQUEST_ID=$REQUEST_ID "
-                $CONNECTION_STRING -vv -c "UPDATE $QA_TABLE SET SUPPRESSION_COUNT='$suppressed_cnt' WHERE REQUEST_ID=$REQUEST_ID "
+                $CONNECTION_STRING -vv -c "update $REQUEST_TABLE set  REQUEST_DESC='SuppressionTable Created' where REQUEST_ID=$REQUEST_ID "
 
         fi
 
-else
+        read supp_list_table supp_match_column supp_file_hash <<< "$supp_list"
 
+        # Read under a shared lock, checked against this request's file version
+        supp_sources="$supp_sources CLIENT_SUPP=$supp_list_table:$supp_match_column@$supp_file_hash"
 
-        $CONNECTION_STRING -vv -c "create table $SUPP_TABLE(MD5HASH VARCHAR)"
-        $CONNECTION_STRING -vv -c "\copy $SUPP_TABLE from '$supp_path'"
-        if [[ $? -ne 0 ]]
-        then
+fi
 
-                        error_fun "3" "Unable to copy suppression data to TRT on Md5hash"
-            exit
+request_id_supp_flag=""
 
+if [[ $request_id_supp != '' ]]
+then
 
-        else
+        request_id_supp_flag="--request-id-supp"
 
-                $CONNECTION_STRING -vv -c "update $REQUEST_TABLE set  REQUEST_DESC='SuppressionTable Created' where REQUEST_ID=$REQUEST_ID"
+fi
 
-        fi
-        supp_index="supp_md5_$REQUEST_ID"
-        $CONNECTION_STRING -vv -c "create index $supp_index on $SUPP_TABLE(MD5HASH)"
 
-        echo "MODULE3: SUPPRESSION START TIME: `date`"
-        #suppressed_cnt=`$CONNECTION_STRING -qtAX -c "SET enable_seqscan TO off;with cte as (delete from $TRT_TABLE a using $SUPP_TABLE b where a.md5hash=b.md5hash returning 1) select count(*) from cte"`
+#=== POSTED UNSUBS AND HARDS ===#
 
-        query="delete from $TRT_TABLE a using $SUPP_TABLE b where a.md5hash=b.md5hash "
-        suppressed_cnt=$(python3 "$SCRIPTPATH/delete_partitions.py" "$query" "$REQUEST_ID" 2>/dev/null)
+posted_unsub_table=`$CONNECTION_STRING -qtAX -c "select upper(POSTED_UNSUB_HARDS_TABLE) from $CLIENT_TABLE a join $REQUEST_TABLE b on a.CLIENT_ID=b.CLIENT_ID where REQUEST_ID=$REQUEST_ID"`
 
+LAST_WK_PB_TABLE=`$CONNECTION_STRING -qtAX -c "select upper(PREV_WEEK_PB_TABLE) from $CLIENT_TABLE a join $REQUEST_TABLE b on a.client_id=b.client_id where request_id=$REQUEST_ID"`
 
-        if [[ $? -ne 0 ]]
-        then
+client_name=`$CONNECTION_STRING -qtAX -c "select upper(CLIENT_NAME) from $CLIENT_TABLE a join $REQUEST_TABLE b on a.client_id=b.client_id where request_id=$REQUEST_ID"`
 
-                        error_fun "3" "Unable to perform suppression to the TRT on Md5hash"
-            exit
+if [[ $client_name == 'VERIZON' ]]
+then
 
+        $CONNECTION_STRING -vv -c "truncate table $posted_unsub_table"
 
-        else
+fi
 
-                $CONNECTION_STRING -vv -c "update $REQUEST_TABLE set   ERROR_CODE=0,REQUEST_STATUS='R',REQUEST_DESC='Client Suppressions Performed.' where REQUEST_ID=$REQUEST_ID "
 
-                $CONNECTION_STRING -vv -c "UPDATE $QA_TABLE SET SUPPRESSION_COUNT=$suppressed_cnt WHERE REQUEST_ID=$REQUEST_ID "
+#=== UNSUBS INSERT ===#
 
-        fi
+inserted_unsub_cnt=`$CONNECTION_STRING -qtAX -c " with cte as (select email,segment,del_date,unsub_date from $LAST_WK_PB_TABLE where unsub_date is not null ) , rows as (insert into $posted_unsub_table(email,segment,del_date,unsub_date) select * from cte on conflict do nothing returning 1) select count(*) from rows"`
+
+if [[ $? -ne 0 ]]
+then
 
-        echo "MODULE3: SUPPRESSION END TIME: `date`"
+error_fun "3" "Unable to insert last week unsubs into posted unsub table"
+exit
 
 fi
 
+
+$CONNECTION_STRING -vv -c "UPDATE $QA_TABLE SET LAST_WK_UNSUB_INSERT_CNT=$inserted_unsub_cnt WHERE REQUEST_ID=$REQUEST_ID "
+
+
+
+#== HARDS INSERTS ===#
+
+$CONNECTION_STRING -vv -c " with cte as (select email,segment,del_date,flag from $LAST_WK_PB_TABLE where flag='B') insert into $posted_unsub_table(email,segment,del_date,flag) select * from cte on conflict do nothing"
+
+if [[ $? -ne 0 ]]
+then
+
+error_fun "3" "Unable to insert last week hards into posted unsub table"
+exit
+
 fi
 
-if [[ $request_id_supp != '' ]]
+supp_sources="$supp_sources POSTED_UNSUB_HARDS=$posted_unsub_table:email"
+
+
+#==== SINGLE PASS SUPPRESSION ====#
+
+echo "MODULE3: SUPPRESSION START TIME: `date`"
+
+# The TRT checkpoint no longer matches the TRT once rows are deleted: a TRT rerun rebuilds it
+$CONNECTION_STRING -vv -c "drop table if exists $TRT_CHECKPOINT_TABLE"
+
+suppressed_cnt=$(python3 "$SCRIPTPATH/suppression_engine.py" "$REQUEST_ID" "$TRT_TABLE" "$QA_TABLE" $supp_sources $request_id_supp_flag 2>/dev/null)
+
+if [[ $? -ne 0 ]]
 then
 
-        echo "MODULE3: REQUEST_ID SUPPRESSION START TIME: `date`"
+        error_fun "3" "Unable to perform suppression to the TRT"
+        exit
 
-        python3 $SCRIPTPATH/requestIdSuppression.py "$SCRIPTPATH" "$REQUEST_ID" "$TRT_TABLE" "$QA_TABLE"
+else
 
-        if [[ $? -ne 0 ]]
-        then
+        $CONNECTION_STRING -vv -c "update $REQUEST_TABLE set   ERROR_CODE=0,REQUEST_STATUS='R',REQUEST_DESC='Suppressions Performed.' where REQUEST_ID=$REQUEST_ID "
 
-                                        error_fun "3" "Unable to perform suppression to the TRT on Request_Id"
-                exit
+fi
 
-        fi
-        echo "MODULE3: REQUEST_ID SUPPRESSION END TIME: `date`"
+echo "MODULE3: SUPPRESSION END TIME: `date` ($suppressed_cnt rows suppressed)"
+
+if [[ $client_name == 'VERIZON' ]]
+then
+
+        $CONNECTION_STRING -vv -c "truncate table $posted_unsub_table"
 
 fi
 
+$CONNECTION_STRING -vv -c "vacuum analyze $TRT_TABLE"
+
 sh -x $SCRIPTPATH/srcPreparation.sh  $REQUEST_ID >>$HOMEPATH/LOGS/$REQUEST_ID.log 2>>$HOMEPATH/LOGS/$REQUEST_ID.log
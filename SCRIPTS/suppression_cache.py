@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Suppression List Cache Module
+Persistent per-client store of client suppression files.
+
+Every suppression file version is recorded in the cache table under
+(client_id, file_hash), where file_hash is the MD5 of the file content with
+CRLF line ends normalized (so dos2unix is not needed). The record holds the
+match column (email or md5hash), detected once from the first lines of the
+file, and the client's list table.
+
+Each client keeps one indexed list table per match column with the distinct
+keys of the current file version:
+- Unchanged file: the list table is reused as is.
+- Changed file: the file is copied into a temp table and applied to the list
+  table as a diff (keys gone from the file deleted, new keys inserted).
+- First file of a client / match column: the list table is built.
+
+The list table is shared by the client's requests: the loader holds an
+exclusive advisory lock on it, readers a shared one taken with
+lock_list_version(), which also checks that the table still holds the file
+version they were given.
+
+CLI (used by suppressionList.sh), prints "<list_table> <match_column> <file_hash>":
+    python3 suppression_cache.py <client_id> <supp_path>
+"""
+
+import hashlib
+import io
+import logging
+import sys
+
+from config_loader import get_config
+
+cfg = get_config()
+
+# Add python modules path and import DbConns
+sys.path.append(cfg.python_modules_path)
+from DbConns import *
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Lines sampled for email / md5 detection (same as the former head -5 check)
+DETECTION_LINES = 5
+
+READ_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+class _NormalizedReader(io.RawIOBase):
+    """Binary stream over a file with CRLF line ends turned into LF."""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._pending = b""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        chunk = self._file.read(READ_CHUNK_BYTES if size is None or size < 0 else size)
+        if not chunk:
+            data, self._pending = self._pending, b""
+            return data
+        data = self._pending + chunk
+        # A CR at the end of the chunk may pair with an LF in the next one
+        if data.endswith(b"\r"):
+            data, self._pending = data[:-1], b"\r"
+        else:
+            self._pending = b""
+        return data.replace(b"\r\n", b"\n")
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def file_fingerprint(path) -> str:
+    """MD5 of the file content, CRLF normalized."""
+    digest = hashlib.md5()
+    reader = _NormalizedReader(path)
+    try:
+        while True:
+            data = reader.read(READ_CHUNK_BYTES)
+            if not data:
+                break
+            digest.update(data)
+    finally:
+        reader.close()
+    return digest.hexdigest()
+
+
+def detect_match_column(path) -> str:
+    """'email' if any of the first lines holds an '@', else 'md5hash'."""
+    with open(path, "r", errors="replace") as handle:
+        for line_number, line in enumerate(handle):
+            if line_number >= DETECTION_LINES:
+                break
+            if "@" in line:
+                return "email"
+    return "md5hash"
+
+
+def ensure_cache_table(cursor, table: str) -> None:
+    """Create the cache table if needed."""
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            client_id     int,
+            file_hash     varchar,
+            supp_path     varchar,
+            match_column  varchar,
+            list_table    varchar,
+            row_count     bigint,
+            is_current    boolean DEFAULT false,
+            detected_at   timestamp DEFAULT now(),
+            loaded_at     timestamp,
+            PRIMARY KEY (client_id, file_hash)
+        )
+    """)
+
+
+def _lookup_version(cursor, table, client_id, file_hash):
+    cursor.execute(
+        f"SELECT match_column, list_table, is_current FROM {table} "
+        f"WHERE client_id = %s AND file_hash = %s",
+        (client_id, file_hash),
+    )
+    return cursor.fetchone()
+
+
+def _record_version(cursor, table, client_id, file_hash, supp_path, match_column, list_table):
+    cursor.execute(
+        f"INSERT INTO {table} (client_id, file_hash, supp_path, match_column, list_table) "
+        f"VALUES (%s, %s, %s, %s, %s) ON CONFLICT (client_id, file_hash) DO NOTHING",
+        (client_id, file_hash, supp_path, match_column, list_table),
+    )
+
+
+def lock_list_version(cursor, list_table, file_hash):
+    """
+    Take a session-level shared lock on a list table for reading and check
+    that it still holds the given file version (another request of the
+    client may have loaded a different file since). Released by
+    unlock_list().
+    """
+    cursor.execute("SELECT pg_advisory_lock_shared(hashtext(%s))", (list_table,))
+    cursor.execute(
+        f"SELECT 1 FROM {cfg.supp_list_cache_table} "
+        f"WHERE list_table = %s AND file_hash = %s AND is_current",
+        (list_table, file_hash),
+    )
+    if cursor.fetchone() is None:
+        unlock_list(cursor, list_table)
+        raise RuntimeError(
+            f"{list_table} no longer holds suppression file {file_hash}, "
+            f"it was reloaded by another request"
+        )
+
+
+def unlock_list(cursor, list_table):
+    cursor.execute("SELECT pg_advisory_unlock_shared(hashtext(%s))", (list_table,))
+
+
+def _table_exists(cursor, table) -> bool:
+    cursor.execute(f"SELECT to_regclass('{table}') IS NOT NULL")
+    return cursor.fetchone()[0]
+
+
+def _copy_file(cursor, supp_path, table, column):
+    reader = _NormalizedReader(supp_path)
+    try:
+        cursor.copy_expert(f"COPY {table} ({column}) FROM STDIN", reader)
+    finally:
+        reader.close()
+
+
+def get_supp_list(client_id, supp_path):
+    """
+    Return the client's indexed list table holding the given suppression
+    file, loading or diffing it only when the file changed.
+
+    Returns:
+        (list_table, match_column, file_hash)
+    """
+    client_id = int(client_id)
+    table = cfg.supp_list_cache_table
+    file_hash = file_fingerprint(supp_path)
+
+    conn, cur = getPgConnection()
+    try:
+        ensure_cache_table(cur, table)
+        version = _lookup_version(cur, table, client_id, file_hash)
+        match_column = version[0] if version else detect_match_column(supp_path)
+        list_table = cfg.get_supp_list_table(client_id, match_column)
+        _record_version(cur, table, client_id, file_hash, supp_path, match_column, list_table)
+        conn.commit()
+
+        # One loader per list table, and no reader while it loads (lock_list_version)
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (list_table,))
+        version = _lookup_version(cur, table, client_id, file_hash)
+        if version[2] and _table_exists(cur, list_table):
+            conn.commit()
+            logger.info(f"{list_table}: suppression file unchanged ({file_hash}), reusing")
+            return list_table, match_column, file_hash
+
+        stage_table = f"{list_table}_stage"
+        cur.execute(f"CREATE TEMP TABLE {stage_table} ({match_column} varchar) ON COMMIT DROP")
+        _copy_file(cur, supp_path, stage_table, match_column)
+
+        if _table_exists(cur, list_table):
+            cur.execute(
+                f"DELETE FROM {list_table} l WHERE NOT EXISTS "
+                f"(SELECT 1 FROM {stage_table} s WHERE s.{match_column} = l.{match_column})"
+            )
+            removed = cur.rowcount
+            cur.execute(
+                f"INSERT INTO {list_table} ({match_column}) "
+                f"SELECT DISTINCT {match_column} FROM {stage_table} "
+                f"WHERE {match_column} IS NOT NULL ON CONFLICT DO NOTHING"
+            )
+            logger.info(
+                f"{list_table}: suppression file changed, {cur.rowcount} keys added, "
+                f"{removed} removed"
+            )
+        else:
+            cur.execute(
+                f"CREATE TABLE {list_table} AS SELECT DISTINCT {match_column} "
+                f"FROM {stage_table} WHERE {match_column} IS NOT NULL"
+            )
+            cur.execute(
+                f"CREATE UNIQUE INDEX {list_table}_key_idx ON {list_table} ({match_column})"
+            )
+            logger.info(f"{list_table}: built with {cur.rowcount} keys")
+
+        cur.execute(f"SELECT count(*) FROM {list_table}")
+        row_count = cur.fetchone()[0]
+        cur.execute(
+            f"UPDATE {table} SET is_current = false WHERE list_table = %s AND is_current",
+            (list_table,),
+        )
+        cur.execute(
+            f"UPDATE {table} SET is_current = true, row_count = %s, loaded_at = now() "
+            f"WHERE client_id = %s AND file_hash = %s",
+            (row_count, client_id, file_hash),
+        )
+        conn.commit()
+        cur.execute(f"ANALYZE {list_table}")
+        conn.commit()
+        return list_table, match_column, file_hash
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python3 suppression_cache.py <client_id> <supp_path>", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        list_table, match_column, file_hash = get_supp_list(sys.argv[1], sys.argv[2])
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"{list_table} {match_column} {file_hash}")
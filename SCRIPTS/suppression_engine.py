@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Single-pass multi-source suppression for partitioned TRT tables.
+
+Every suppression source of a request (offer-id unsubs, the client
+suppression file, the postback tables of the request_id_supp requests,
+posted unsubs/hards) is registered up front with a reason code. The sources
+are merged into one deduplicated keys table per match column (email /
+md5hash), each key tagged with the highest-priority reason that listed it.
+Each TRT partition is then suppressed once against those keys, by DELETE or
+by rebuild (see delete_partitions.py), and the removed rows are counted per
+reason to fill the request's QA counters, and per source for the log.
+
+Usage:
+    python3 suppression_engine.py <request_id> <trt_table> <qa_table> \
+        [REASON=table:column[@file_hash] ...] [--request-id-supp]
+
+A source given with @file_hash is a client list table of suppression_cache.py:
+it is read under a shared lock, after checking it still holds that file.
+--request-id-supp registers the previous postback tables of the request's
+request_id_supp requests (see requestIdSuppression.py). The total number of
+suppressed rows is printed on stdout.
+"""
+
+import logging
+import sys
+from multiprocessing import Pool, cpu_count
+
+import psycopg2
+
+import process_tracking
+import suppression_cache
+from delete_partitions import choose_strategy, rebuild_partition, get_partition_names
+
+# Import configuration loader
+from config_loader import get_config
+
+# Load config
+cfg = get_config()
+
+# Add python modules path and import DbConns
+sys.path.append(cfg.python_modules_path)
+from DbConns import *
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+# Reason codes in priority order (a row matched by several sources, on any
+# match column, is attributed to the first one) and the QA column each one fills
+REASON_COUNT_COLUMNS = {
+    "OFFERID_UNSUB": "OFFERID_UNSUB_SUPP_COUNT",
+    "CLIENT_SUPP": "SUPPRESSION_COUNT",
+    "REQUEST_ID_SUPP": "REQUEST_ID_SUPP_COUNT",
+    "POSTED_UNSUB_HARDS": "POSTED_UNSUB_HARDS_SUPP_COUNT",
+}
+REASONS = tuple(REASON_COUNT_COLUMNS)
+
+# TRT columns a source can be matched on, in suppression order
+MATCH_COLUMNS = ("email", "md5hash")
+
+
+def parse_source(spec):
+    """
+    Parse a "REASON=table:column[@file_hash]" command line source.
+
+    Returns:
+        dict with reason, table and column (and file_hash when given); the
+        source label is the table
+    """
+    try:
+        reason, target = spec.split("=", 1)
+        table, column = target.split(":", 1)
+    except ValueError:
+        raise ValueError(f"Invalid source '{spec}', expected REASON=table:column")
+    column, _, file_hash = column.partition("@")
+
+    reason, column = reason.strip().upper(), column.strip().lower()
+    if reason not in REASON_COUNT_COLUMNS:
+        raise ValueError(f"Unknown suppression reason '{reason}'")
+    if column not in MATCH_COLUMNS:
+        raise ValueError(f"Unsupported match column '{column}'")
+    source = {"reason": reason, "table": table.strip(), "column": column, "label": table.strip()}
+    if file_hash.strip():
+        source["file_hash"] = file_hash.strip()
+    return source
+
+
+def build_key_tables(cur, trt_table, sources):
+    """
+    Merge the sources into one keys table per match column.
+
+    Each table holds (key, reason, source, priority, position) with one row
+    per distinct key, hash indexed on key; reason and source are those of the
+    highest-priority source that listed the key (registration order breaks
+    ties). priority and position rank the key against the keys of the other
+    match column. A source's label (default: its table) identifies it in the
+    per-source counts. Client list tables (sources with a file_hash) are held
+    under a shared lock until the keys are built, so a concurrent reload of
+    the client's list waits instead of being read half applied.
+
+    Returns:
+        {match column: keys table}, in MATCH_COLUMNS order
+    """
+    locked = []
+    try:
+        for s in sources:
+            if s.get("file_hash"):
+                suppression_cache.lock_list_version(cur, s["table"], s["file_hash"])
+                locked.append(s["table"])
+        return _build_key_tables(cur, trt_table, sources)
+    finally:
+        for table in locked:
+            suppression_cache.unlock_list(cur, table)
+
+
+def _build_key_tables(cur, trt_table, sources):
+    key_tables = {}
+    for column in MATCH_COLUMNS:
+        column_sources = [(position, s) for position, s in enumerate(sources) if s["column"] == column]
+        if not column_sources:
+            continue
+
+        keys_table = f"{trt_table}_supp_{column}".lower()
+        union = " UNION ALL ".join(
+            f"SELECT {column}::varchar AS key, '{s['reason']}'::varchar AS reason, "
+            f"'{s.get('label', s['table'])}'::varchar AS source, "
+            f"{REASONS.index(s['reason'])} AS priority, {position} AS position "
+            f"FROM {s['table']} WHERE {column} IS NOT NULL"
+            for position, s in column_sources
+        )
+        cur.execute(f"DROP TABLE IF EXISTS {keys_table}")
+        cur.execute(
+            f"CREATE UNLOGGED TABLE {keys_table} AS "
+            f"SELECT DISTINCT ON (key) key, reason, source, priority, position FROM ({union}) s "
+            f"ORDER BY key, priority, position"
+        )
+        logger.info(f"{keys_table}: {cur.rowcount} keys from {len(column_sources)} source(s)")
+        cur.execute(f"CREATE INDEX {keys_table}_key_idx ON {keys_table} USING hash (key)")
+        cur.execute(f"ANALYZE {keys_table}")
+        key_tables[column] = keys_table
+    return key_tables
+
+
+def drop_key_tables(cur, key_tables):
+    for keys_table in key_tables.values():
+        cur.execute(f"DROP TABLE IF EXISTS {keys_table}")
+
+
+def match_filter(key_tables):
+    """EXISTS clause matching the TRT rows (alias a) listed in any keys table."""
+    return " OR ".join(
+        f"EXISTS (SELECT 1 FROM {keys_table} k WHERE k.key = a.{column})"
+        for column, keys_table in key_tables.items()
+    )
+
+
+def attributed_matches(key_tables):
+    """
+    FROM-clause suffix for rows aliased a: joins every keys table and picks,
+    as m.reason / m.source, the matching key of the highest-priority source
+    over all match columns. Rows matching no key are left out.
+    """
+    joins = "".join(
+        f" LEFT JOIN {keys_table} k{i} ON k{i}.key = a.{column}"
+        for i, (column, keys_table) in enumerate(key_tables.items())
+    )
+    candidates = ", ".join(
+        f"(k{i}.priority, k{i}.position, k{i}.reason, k{i}.source)" for i in range(len(key_tables))
+    )
+    return (
+        f"{joins} CROSS JOIN LATERAL (SELECT reason, source FROM (VALUES {candidates}) "
+        f"v(priority, position, reason, source) WHERE reason IS NOT NULL "
+        f"ORDER BY priority, position LIMIT 1) m"
+    )
+
+
+def count_matches(cur, partition_name, key_tables):
+    """
+    Per (reason, source) count of the partition rows that match a keys table.
+
+    Run by rebuild_partition under the partition lock, in place of its row
+    count, so the rebuild adds no scan of its own for the counts.
+    """
+    cur.execute(
+        f"SELECT m.reason, m.source, count(*) "
+        f"FROM {partition_name} a{attributed_matches(key_tables)} GROUP BY 1, 2"
+    )
+    return {(reason, source): count for reason, source, count in cur.fetchall()}
+
+
+def delete_matches(cur, partition_name, key_tables):
+    """
+    Delete the matching rows of a partition in one statement.
+
+    Returns:
+        {(reason, source): deleted rows}
+    """
+    returned = ", ".join(f"a.{column}" for column in key_tables)
+    cur.execute(
+        f"WITH a AS (DELETE FROM {partition_name} a WHERE {match_filter(key_tables)} "
+        f"RETURNING {returned}) "
+        f"SELECT m.reason, m.source, count(*) FROM a{attributed_matches(key_tables)} GROUP BY 1, 2"
+    )
+    return {(reason, source): count for reason, source, count in cur.fetchall()}
+
+
+def suppress_partition(task):
+    """
+    Pool worker: suppress one partition against every keys table.
+
+    Returns:
+        {(reason, source): suppressed rows}, or None on failure
+    """
+    partition_name, parent, key_tables, request_id = task
+    try:
+        if request_id:
+            process_tracking.track_process(request_id, "SUPPRESSION_WORKER", worker=True)
+
+        conn, cur = getPgConnection()
+        conn.autocommit = True
+        try:
+            suppress_filter = match_filter(key_tables) if parent else None
+            if choose_strategy(cur, partition_name, "a", suppress_filter) == "rebuild":
+                try:
+                    counts = rebuild_partition(
+                        conn, cur, partition_name, parent, "a", f"NOT ({suppress_filter})",
+                        count_removed=lambda cur: count_matches(cur, partition_name, key_tables),
+                    )
+                    logger.info(f"{partition_name}: rebuilt, {sum(counts.values())} rows suppressed")
+                    return counts
+                except psycopg2.Error as e:
+                    logger.warning(f"Rebuild of {partition_name} failed, using DELETE: {e}")
+
+            counts = delete_matches(cur, partition_name, key_tables)
+            logger.info(f"{partition_name}: {sum(counts.values())} rows suppressed")
+            return counts
+        finally:
+            cur.close()
+            conn.close()
+
+    except psycopg2.Error as e:
+        logger.error(f"Error suppressing {partition_name}: {e}")
+        return None
+
+
+def run_suppression(request_id, trt_table, qa_table, sources):
+    """
+    Suppress the TRT against all sources and fill the QA counters.
+
+    Counts are collected per source over the single pass; every registered
+    reason then gets its QA column set once, to 0 if nothing matched.
+
+    Returns:
+        {reason: suppressed rows}
+    """
+    if not sources:
+        logger.info("No suppression sources registered")
+        return {}
+    for source in sources:
+        logger.info(
+            f"Source {source['reason']} [{source.get('label', source['table'])}]: "
+            f"{source['table']} on {source['column']}"
+        )
+
+    conn, cur = getPgConnection()
+    conn.autocommit = True
+    key_tables = {}
+    try:
+        key_tables = build_key_tables(cur, trt_table, sources)
+
+        partition_names = get_partition_names(trt_table)
+        if partition_names:
+            tasks = [(name, trt_table, key_tables, request_id) for name in partition_names]
+        else:
+            # Not partitioned: a plain DELETE on the table itself
+            tasks = [(trt_table, None, key_tables, request_id)]
+
+        pool = Pool(processes=min(cfg.suppression_max_processes, cpu_count(), len(tasks)))
+        try:
+            results = pool.map(suppress_partition, tasks)
+        finally:
+            pool.close()
+            pool.join()
+
+        if any(result is None for result in results):
+            raise RuntimeError("Suppression failed for at least one partition")
+
+        source_counts = {}
+        for result in results:
+            for key, count in result.items():
+                source_counts[key] = source_counts.get(key, 0) + count
+        for (reason, source), count in sorted(source_counts.items()):
+            logger.info(f"{reason} [{source}]: {count} rows suppressed")
+
+        totals = {reason: 0 for reason in REASONS if any(s["reason"] == reason for s in sources)}
+        for (reason, _), count in source_counts.items():
+            totals[reason] = totals.get(reason, 0) + count
+
+        for reason, count in totals.items():
+            logger.info(f"{reason}: {count} rows suppressed")
+            cur.execute(
+                f"UPDATE {qa_table} SET {REASON_COUNT_COLUMNS[reason]} = %s WHERE REQUEST_ID = %s",
+                (count, request_id),
+            )
+        return totals
+    finally:
+        drop_key_tables(cur, key_tables)
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    try:
+        args = [arg for arg in sys.argv[1:] if arg != "--request-id-supp"]
+        if len(args) < 3:
+            raise ValueError(
+                "Usage: python3 suppression_engine.py <request_id> <trt_table> <qa_table> "
+                "[REASON=table:column[@file_hash] ...] [--request-id-supp]"
+            )
+
+        request_id, trt_table, qa_table = args[:3]
+        sources = [parse_source(spec) for spec in args[3:]]
+
+        # Track main process
+        process_tracking.track_process(request_id, "SUPPRESSION_ENGINE")
+
+        if "--request-id-supp" in sys.argv:
+            import requestIdSuppression
+            sources.extend(requestIdSuppression.get_request_id_sources(request_id))
+
+        totals = run_suppression(request_id, trt_table, qa_table, sources)
+        total_suppressed = sum(totals.values())
+        logger.info(f"Total suppressed count across all sources: {total_suppressed}")
+
+        print(total_suppressed)
+
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        sys.exit(1)
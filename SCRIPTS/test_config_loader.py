@@ -33,6 +33,10 @@ def test_config():
         print(f"  Clients: {cfg.clients_table}")
         print(f"  QA Stats: {cfg.qa_stats_table}")
         print(f"  Tracking: {cfg.tracking_table}")
+        print(f"  Process Tracking: {cfg.process_tracking_table}")
+        print(f"  RLTP Metrics: {cfg.rltp_metrics_table}")
+        print(f"  Supp List Cache: {cfg.supp_list_cache_table}")
+        print(f"  Module Step Metrics: {cfg.module_step_metrics_table}")
 
         # Test dynamic table generation
         print("\n[DYNAMIC TABLES]")
@@ -41,6 +45,7 @@ def test_config():
         postback_table = cfg.get_postback_table("12345", "TestClient", "W01")
         print(f"  TRT Table: {trt_table}")
         print(f"  SRC Table: {src_table}")
+        print(f"  Supp List Table (12, email): {cfg.get_supp_list_table(12, 'email')}")
         print(f"  Postback Table: {postback_table}")
 
         # Test paths
@@ -57,6 +62,19 @@ def test_config():
         print(f"  Max Retries: {cfg.max_retries}")
         print(f"  Audit Clients: {cfg.audit_client_ids}")
 
+        print("\n[SUPPRESSION CONFIG]")
+        print(f"  Strategy: {cfg.suppression_strategy}")
+        print(f"  Rebuild Fraction: {cfg.suppression_rebuild_fraction}")
+        print(f"  Rebuild Min Rows: {cfg.suppression_rebuild_min_rows:,}")
+        print(f"  Max Processes: {cfg.suppression_max_processes}")
+
+        print("\n[RESPONDERS CONFIG]")
+        print(f"  Snowflake Dedup: {cfg.responders_snowflake_dedup}")
+        print(f"  Cache Enabled: {cfg.responder_cache_enabled}")
+        print(f"  Cache Path: {cfg.responder_cache_path}")
+        print(f"  Cache Settle Days: {cfg.responder_cache_settle_days}")
+        print(f"  Cache Retention Days: {cfg.responder_cache_retention_days}")
+
         # Test staging config
         print("\n[STAGING CONFIG]")
         print(f"  Enabled: {cfg.staging_enabled}")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Tests for green_responders.py: the pulls of each mode (raw GREEN_*_TEMP tables
+or the Snowflake-side dedup into the final table) and the events
+green_final_query keeps per email / per email and delivered date
+"""
+import os
+import sqlite3
+import sys
+import types
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+# Site connection modules (python_modules_path); no connection is opened here
+for name in ("DbConns", "DB_conns"):
+    sys.modules.setdefault(name, types.ModuleType(name))
+
+for package in ("pandas", "psycopg2", "pyarrow", "snowflake.connector"):
+    pytest.importorskip(package)
+green_responders = pytest.importorskip("green_responders")
+
+TABLES = {
+    "delivered_table": "green_delivered_temp",
+    "opens_table": "green_opens_temp",
+    "clicks_table": "green_clicks_temp",
+    "total_unsubs_table": "green_total_unsubs_temp",
+    "unsubs_table": "green_unsubs_temp",
+    "final_table": "green_final_temp",
+}
+
+
+def make_args(non_unique=False, only=None):
+    return SimpleNamespace(
+        request_id="1", offers="'11','12'", min_date="2026-03-01", max_date="2026-03-04",
+        non_unique=non_unique, only=only, **TABLES,
+    )
+
+
+def set_dedup(monkeypatch, enabled):
+    monkeypatch.setattr(green_responders, "cfg", SimpleNamespace(
+        responders_snowflake_dedup=enabled,
+        get_files_path=lambda request_id: f"/tmp/{request_id}",
+    ))
+
+
+def test_dedup_mode_loads_final_table_and_drops_raw_tables(monkeypatch):
+    set_dedup(monkeypatch, True)
+
+    pulls, dropped = green_responders.green_pulls(make_args(non_unique=True))
+
+    assert [pull["name"] for pull in pulls] == ["green_final", "green_total_unsubs"]
+    assert pulls[0]["table"] == "green_final_temp"
+    assert "PARTITION BY EMAIL,DEL_DATE ORDER BY EVENT_RANK" in pulls[0]["query"]
+    assert dropped == ["green_delivered_temp", "green_opens_temp", "green_clicks_temp", "green_unsubs_temp"]
+
+
+def test_raw_mode_loads_every_pull_and_drops_final_table(monkeypatch):
+    set_dedup(monkeypatch, False)
+
+    pulls, dropped = green_responders.green_pulls(make_args())
+
+    assert [pull["name"] for pull in pulls] == [
+        "green_delivered", "green_opens", "green_clicks", "green_total_unsubs", "green_unsubs",
+    ]
+    assert dropped == ["green_final_temp"]
+
+
+@pytest.mark.parametrize("only,expected_drops", [
+    (None, [["green_final_temp"]]),
+    # Single table rebuilds leave the other tables alone
+    (["green_total_unsubs"], []),
+])
+def test_load_green_responders_drops_the_unused_mode(monkeypatch, only, expected_drops):
+    set_dedup(monkeypatch, False)
+    drops, loaded = [], []
+    monkeypatch.setattr(green_responders, "drop_tables", drops.append)
+    monkeypatch.setattr(
+        green_responders, "load_pull",
+        lambda pull, spool_dir: loaded.append(pull["name"]) or (pull["name"], pull["name"] != "green_opens"),
+    )
+
+    failed = green_responders.load_green_responders(make_args(only=only))
+
+    assert drops == expected_drops
+    if only:
+        assert loaded == only and failed == []
+    else:
+        assert len(loaded) == 5 and failed == ["green_opens"]
+
+
+# Raw pull rows: delivered (email, del_date, subid, bouncecat), responders (email, date, subid)
+GREEN_ROWS = {
+    "delivered": [
+        ("a@x", "2026-03-01", "s1", "success"),
+        ("b@x", "2026-03-01", "s1", "success"),
+        ("b@x", "2026-03-02", "s2", "hard"),
+        ("c@x", "2026-03-01", "s1", "success"),
+        ("d@x", "2026-03-01", "s1", "success"),
+        ("e@x", "2026-03-01", "s1", "success"),
+        ("f@x", "2026-03-01", "s1", "success"),
+        ("f@x", "2026-03-02", "s2", "success"),
+    ],
+    "opens": [("a@x", "2026-03-02", "s1"), ("e@x", "2026-03-02", "s9"), ("f@x", "2026-03-02", "s1")],
+    "clicks": [("a@x", "2026-03-02", "s1"), ("c@x", "2026-03-02", "s1"), ("f@x", "2026-03-03", "s2")],
+    "unsubs": [("c@x", "2026-03-03", "s1")],
+}
+
+
+def run_final_query(non_unique):
+    """
+    (email, del_date, status, unsub) rows of green_final_query over GREEN_ROWS,
+    run in SQLite: the VARCHAR casts are dropped and QUALIFY becomes a filter
+    on the window column.
+    """
+    db = sqlite3.connect(":memory:")
+    queries = {}
+    for name, rows in GREEN_ROWS.items():
+        width = len(rows[0])
+        db.execute(f"CREATE TABLE src_{name} ({','.join(f'c{i}' for i in range(width))})")
+        db.executemany(f"INSERT INTO src_{name} VALUES ({','.join('?' * width)})", rows)
+        queries[name] = f"SELECT * FROM src_{name}"
+
+    query = green_responders.green_final_query(queries, non_unique).replace("::VARCHAR", "")
+    body, qualify = query.split(" QUALIFY ")
+    window = qualify.rsplit(" = 1", 1)[0]
+    body = body.replace(" FROM events", f",{window} RN FROM events")
+    rows = db.execute(f"SELECT EMAIL,DEL_DATE,STATUS,UNSUB FROM ({body}) WHERE RN = 1").fetchall()
+    return sorted(rows)
+
+
+def test_green_final_query_keeps_best_event_per_email():
+    assert run_final_query(non_unique=False) == [
+        ("a@x", "2026-03-01", 3, 0),   # click over open
+        ("b@x", "2026-03-02", -1, 0),  # bounce over everything
+        ("c@x", "2026-03-01", 2, 1),   # unsub over click
+        ("d@x", "2026-03-01", 1, 0),
+        ("e@x", "2026-03-01", 1, 0),   # open of another subid is not joined
+        ("f@x", "2026-03-02", 3, 0),
+    ]
+
+
+def test_green_final_query_keeps_best_event_per_email_and_date():
+    assert run_final_query(non_unique=True) == [
+        ("a@x", "2026-03-01", 3, 0),
+        ("b@x", "2026-03-01", 1, 0),
+        ("b@x", "2026-03-02", 1, 0),   # no bounce ranking in the non-unique module
+        ("c@x", "2026-03-01", 2, 1),
+        ("d@x", "2026-03-01", 1, 0),
+        ("e@x", "2026-03-01", 1, 0),
+        ("f@x", "2026-03-01", 2, 0),
+        ("f@x", "2026-03-02", 3, 0),
+    ]
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tests for responder_cache.py: date runs, the Snowflake source queries and the
+partition files written by SourceCache.fetch_missing
+"""
+import os
+import sys
+import types
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+# Site connection modules (python_modules_path); no connection is opened here
+for name in ("DbConns", "DB_conns"):
+    sys.modules.setdefault(name, types.ModuleType(name))
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+responder_cache = pytest.importorskip("responder_cache")
+
+from responder_cache import DATE_KEY, OFFER_KEY, RESPONDER_SOURCES, _date_runs, source_query
+
+
+def d(day):
+    return date(2026, 3, day)
+
+
+class FakeSnowflakeCursor:
+    """Records the executed query and returns the given Arrow batches."""
+
+    def __init__(self, batches):
+        self.batches = batches
+        self.queries = []
+
+    def execute(self, query):
+        self.queries.append(query)
+
+    def fetch_arrow_batches(self):
+        yield from self.batches
+
+
+def delivered_batch(rows):
+    """Arrow batch of pmta_delivered rows (toaddress, offer, date) with the partition keys."""
+    return pa.table({
+        "TOADDRESS": [email for email, _, _ in rows],
+        "DEL_DATE": [day for _, _, day in rows],
+        "SUBID": ["s1"] * len(rows),
+        "BOUNCECAT": ["success"] * len(rows),
+        OFFER_KEY: [offer for _, offer, _ in rows],
+        DATE_KEY: [day for _, _, day in rows],
+    })
+
+
+def test_date_runs():
+    assert _date_runs([]) == []
+    assert _date_runs([d(1)]) == [(d(1), d(2))]
+    assert _date_runs([d(1), d(2), d(3), d(5), d(7), d(8)]) == [
+        (d(1), d(4)), (d(5), d(6)), (d(7), d(9)),
+    ]
+
+
+def test_source_query_ranges_and_keys():
+    source = RESPONDER_SOURCES["pmta_delivered"]
+    query = source_query(source, [(["11", "12"], d(1), d(4)), (["13"], d(5), None)], with_keys=True)
+
+    assert query.startswith("SELECT DISTINCT TOADDRESS,")
+    assert ("(OFFERID IN ('11','12') AND TIMELOGGED_DATE>='20260301' "
+            "AND TIMELOGGED_DATE<'20260304')") in query
+    assert "(OFFERID IN ('13') AND TIMELOGGED_DATE>='20260305')) AND " in query
+    assert f"OFFERID::VARCHAR {OFFER_KEY}" in query
+    assert f"TO_CHAR(TO_DATE(TIMELOGGED_DATE, 'YYYYMMDD'), 'YYYY-MM-DD') {DATE_KEY}" in query
+    assert source["filter"] in query
+    assert query.endswith(f" ORDER BY {OFFER_KEY},{DATE_KEY}")
+
+
+def test_source_query_without_keys():
+    source = RESPONDER_SOURCES["green_opens"]
+    query = source_query(source, [(["11"], d(1), d(2))], with_keys=False)
+
+    assert query == (
+        "SELECT DISTINCT EMAILID,OPENDATE,SUBID FROM GREEN.GREEN_LPT.RAW_OPENS_FOLLOWUP "
+        "WHERE ((OFFERID IN ('11') AND OPENDATE>='2026-03-01' AND OPENDATE<'2026-03-02'))"
+    )
+
+
+def test_fetch_missing_writes_one_file_per_partition(tmp_path, monkeypatch):
+    monkeypatch.setattr(responder_cache, "cfg", SimpleNamespace(responder_cache_path=str(tmp_path)))
+    cache = responder_cache.SourceCache("pmta_delivered")
+
+    # 11 is missing 1-3 March, 12 only 2 March; 12 on 3 March was not asked for
+    missing = {("11", d(1)), ("11", d(2)), ("11", d(3)), ("12", d(2))}
+    cursor = FakeSnowflakeCursor([
+        delivered_batch([("a@x", "11", "2026-03-01"), ("b@x", "11", "2026-03-01"),
+                         ("c@x", "11", "2026-03-02")]),
+        # 11 on 2 March continues in the next batch
+        delivered_batch([("d@x", "11", "2026-03-02"), ("e@x", "12", "2026-03-02"),
+                         ("f@x", "12", "2026-03-03")]),
+    ])
+
+    entries, fetched_rows = cache.fetch_missing(cursor, missing)
+
+    assert fetched_rows == 6
+    assert len(cursor.queries) == 1
+    query = cursor.queries[0]
+    assert "OFFERID IN ('11') AND TIMELOGGED_DATE>='20260301' AND TIMELOGGED_DATE<'20260304'" in query
+    assert "OFFERID IN ('12') AND TIMELOGGED_DATE>='20260302' AND TIMELOGGED_DATE<'20260303'" in query
+
+    assert set(entries) == {cache.key(offer, day) for offer, day in missing}
+    assert entries[cache.key("11", d(3))]["rows"] == 0
+    assert entries[cache.key("11", d(3))]["file"] is None
+
+    expected = {("11", d(1)): ["a@x", "b@x"], ("11", d(2)): ["c@x", "d@x"], ("12", d(2)): ["e@x"]}
+    for (offer, day), emails in expected.items():
+        entry = entries[cache.key(offer, day)]
+        assert entry["rows"] == len(emails)
+        table = pq.read_table(os.path.join(cache.path, entry["file"]))
+        assert table.column_names == ["TOADDRESS", "DEL_DATE", "SUBID", "BOUNCECAT"]
+        assert table.column("TOADDRESS").to_pylist() == emails
+
+    assert not os.path.exists(os.path.join(cache.path, cache.partition_file("12", d(3))))
+    leftovers = [name for _, _, files in os.walk(cache.path) for name in files if not name.endswith(".parquet")]
+    assert leftovers == []
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, "-q"]))
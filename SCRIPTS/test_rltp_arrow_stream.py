@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the Arrow direct fetch CSV of rltpDataPulling.py: fields must load
+through COPY_SQL_TEMPLATE as the former csv.writer fallback did
+"""
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+# Site connection modules (python_modules_path); no connection is opened here
+for name in ("DbConns", "DB_conns"):
+    sys.modules.setdefault(name, types.ModuleType(name))
+
+for package in ("pandas", "psycopg2", "snowflake.connector"):
+    pytest.importorskip(package)
+pa = pytest.importorskip("pyarrow")
+rltpDataPulling = pytest.importorskip("rltpDataPulling")
+
+
+def read_all(stream):
+    return b"".join(iter(lambda: stream.read(5), b""))
+
+
+def test_empty_string_is_written_like_null():
+    table = pa.table({
+        "email": ["a@x", "", None, 'q"uote|d'],
+        "decile": pa.array(["1", "2", "", "3"], type=pa.large_string()),
+        "freq": [1, None, 3, 4],
+    })
+
+    stream = rltpDataPulling.ArrowBatchStream([table])
+
+    # Unquoted empty fields are NULL for COPY ... CSV; "" would be an empty string
+    assert read_all(stream) == b'"a@x"|"1"|1\n|"2"|\n||3\n"q""uote|d"|"3"|4\n'
+    assert stream.rows == 4
+
+
+def test_empty_strings_as_null_keeps_other_columns():
+    table = pa.table({"email": ["", "b@x"], "freq": [0, 1]})
+
+    result = rltpDataPulling.empty_strings_as_null(table)
+
+    assert result.column("email").to_pylist() == [None, "b@x"]
+    assert result.column("freq").to_pylist() == [0, 1]
+    assert result.schema == table.schema
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -28,12 +28,27 @@ def test_rltp_config():
         print(f"  Audit Client IDs: {cfg.audit_client_ids}")
         print(f"  Audit TRT Buffer: {cfg.audit_trt_buffer:,}")
 
+        # Test index build planning
+        print("\n[INDEX BUILD CONFIG]")
+        print(f"  Max Concurrent: {cfg.index_max_concurrent}")
+        print(f"  maintenance_work_mem: {cfg.index_mem_min_mb}-{cfg.index_mem_max_mb} MB")
+        print(f"  Max Parallel Workers: {cfg.index_max_parallel_workers}")
+        print(f"  Bytes Per Parallel Worker: {cfg.index_bytes_per_parallel_worker:,}")
+
         # Test staging configuration
         print("\n[STAGING CONFIG]")
         print(f"  Enabled: {cfg.staging_enabled}")
         print(f"  Prefix: {cfg.stage_prefix}")
         print(f"  Max File Size: {cfg.stage_max_file_size:,} bytes")
         print(f"  Compression: {cfg.stage_compression}")
+        print(f"  Load Mode: {cfg.stage_load_mode}")
+        print(f"  GET Parallel: {cfg.stage_get_parallel}")
+        print(f"  Load Connections: {cfg.stage_load_connections}")
+        print(f"  Target Parts: {cfg.stage_target_parts}")
+        print(f"  Min File Size: {cfg.stage_min_file_size:,} bytes")
+        print(f"  Bytes Per Row: {cfg.stage_bytes_per_row}")
+        print(f"  Preflight Count: {cfg.stage_preflight_count}")
+        print(f"  Partitioned Unload: {cfg.stage_partitioned_unload}")
 
         # Test file paths
         print("\n[FILE PATHS]")
@@ -51,6 +66,7 @@ def test_rltp_config():
         print(f"  Clients: {cfg.clients_table}")
         print(f"  QA Stats: {cfg.qa_stats_table}")
         print(f"  TRT Table (12345, TestClient, W01): {cfg.get_trt_table('12345', 'TestClient', 'W01')}")
+        print(f"  TRT Checkpoint (12345, TestClient, W01): {cfg.get_trt_checkpoint_table('12345', 'TestClient', 'W01')}")
 
         # Test index names
         print("\n[INDEX TEMPLATES]")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the (query, decile) task scheduling of rltpDataPulling.py: tasks
+behind a failed dependency are not started and fail the TRT import
+"""
+import logging
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+# Site connection modules (python_modules_path); no connection is opened here
+for name in ("DbConns", "DB_conns"):
+    sys.modules.setdefault(name, types.ModuleType(name))
+
+for package in ("pandas", "psycopg2", "pyarrow", "snowflake.connector"):
+    pytest.importorskip(package)
+rltpDataPulling = pytest.importorskip("rltpDataPulling")
+
+logger = logging.getLogger(__name__)
+
+
+class ImmediatePool:
+    """Pool stand-in running apply_async callbacks at once; args is the task key."""
+
+    def __init__(self, failing):
+        self.failing = failing
+        self.started = []
+
+    def apply_async(self, func, args, callback, error_callback):
+        key = args[0]
+        self.started.append(key)
+        if key in self.failing:
+            error_callback(RuntimeError(f"{key} failed"))
+        else:
+            callback((key, True))
+
+
+def make_tasks(dependencies):
+    return {
+        key: {"args": key, "size": 1, "depends_on": set(depends_on)}
+        for key, depends_on in dependencies.items()
+    }
+
+
+def test_failed_dependency_fails_its_dependents(monkeypatch):
+    dropped = []
+    monkeypatch.setattr(
+        rltpDataPulling, "drop_partitioned_stage", lambda stage, _: dropped.append(stage)
+    )
+    # Query 2 (the index creating one) waits for query 1 of the same decile
+    tasks = make_tasks({
+        (1, "1"): [], (2, "1"): [(1, "1")],
+        (1, "2"): [], (2, "2"): [(1, "2")],
+    })
+    pool = ImmediatePool(failing={(1, "1")})
+    partition_stages = {1: "stage_1", 2: "stage_2"}
+
+    results = rltpDataPulling.run_trt_tasks(pool, tasks, partition_stages, logger)
+
+    assert results == {(1, "1"): False, (2, "1"): False, (1, "2"): True, (2, "2"): True}
+    assert (2, "1") not in pool.started
+    assert sorted(dropped) == ["stage_1", "stage_2"]
+    assert partition_stages == {}
+    assert rltpDataPulling.trt_tasks_succeeded(results, logger) is False
+
+
+def test_all_tasks_completed(monkeypatch):
+    monkeypatch.setattr(rltpDataPulling, "drop_partitioned_stage", lambda stage, _: None)
+    tasks = make_tasks({(1, "1"): [], (2, "1"): [(1, "1")]})
+
+    results = rltpDataPulling.run_trt_tasks(ImmediatePool(failing=set()), tasks, {}, logger)
+
+    assert results == {(1, "1"): True, (2, "1"): True}
+    assert rltpDataPulling.trt_tasks_succeeded(results, logger) is True
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, "-q"]))
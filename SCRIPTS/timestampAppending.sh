@@ -1,4 +1,5 @@
 source /u1/techteam/PFM_CUSTOM_SCRIPTS/Campaign-Attribution-Management/REQUEST_PROCESSING/$1/ETC/config.properties
+source $TRACKING_HELPER
 
 echo "MODULE6 Start Time: `date`"
 
@@ -59,6 +60,16 @@ then
 
 
 	> $SPOOLPATH/combine_timestamps
+
+	load_group_counts "select 'pb_dels|'||del_date,count(id) from $PB_TABLE group by 1"
+
+	if [[ $? -ne 0 ]]
+	then
+
+			error_fun "6" "unable to get counts for delivered dates"
+			exit
+
+	fi
 	
 	while read timestamp
 	do
@@ -69,15 +80,7 @@ then
 		
 		t_date_1=`echo $t_date | awk -F' ' '{ print $1 }'  `
 		
-		cnt=`$CONNECTION_STRING -qtAX -c "select count(id) from $PB_TABLE where del_date='$t_date_1' "`
-		
-	    if [[ $? -ne 0 ]]
-	    then
-	    
-	    		error_fun "6" "unable to get count for delivered date"
-	    		exit
-	    
-	    fi	
+		cnt=`group_count "pb_dels|$t_date_1"`
 		
 		total_secs=`$CONNECTION_STRING -qtAX -c "select EXTRACT(EPOCH FROM (cast('$t_end' as timestamp) - cast('$t_start' as timestamp))) "`
 		
@@ -105,7 +108,7 @@ then
 	    
 	    fi		
 		
-		$CONNECTION_STRING -qtAX -c "select id from $PB_TABLE where del_date='$t_date_1' order by random() " > $SPOOLPATH/id_$t_date_1
+		$CONNECTION_STRING -qtAX -c "select id from $PB_TABLE where del_date='$t_date_1' " > $SPOOLPATH/id_$t_date_1
 		
 		if [[ $? -ne 0 ]]
 		then
@@ -115,6 +118,9 @@ then
 		
 		fi		
 		
+		# Random id order for the timestamps: shuffled in the spool instead of a server side ORDER BY random()
+		shuf -o $SPOOLPATH/id_$t_date_1 $SPOOLPATH/id_$t_date_1
+		
 		paste -d'|' $SPOOLPATH/TimeStamps.txt $SPOOLPATH/id_$t_date_1 >> $SPOOLPATH/combine_timestamps
 		
 		
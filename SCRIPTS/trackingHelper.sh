@@ -7,49 +7,14 @@ if [ -z "$CONNECTION_STRING" ]; then
     source ./config.properties
 fi
 
-# Function to append current process ID to tracking table
+# Function to record current process ID in the process tracking table
+# (one row per PID/module, see process_tracking.py)
 append_process_id() {
     local request_id=$1
     local module_name=$2
     local current_pid=$$
 
-    # Check if record exists - extract only the count number
-    existing_count=$($CONNECTION_STRING -qtAX -c "
-        SELECT COUNT(1)
-        FROM $TRACKING_TABLE
-        WHERE request_id=$request_id
-    " 2>/dev/null)
-
-    # Default to 0 if no number found
-    existing_count=${existing_count:-0}
-
-    if [ "$existing_count" -eq 0 ]; then
-        # Create new record
-        $CONNECTION_STRING -c "
-            INSERT INTO $TRACKING_TABLE
-            (request_id, process_ids, module_sequence, current_module, start_time, last_updated, status, created_by)
-            VALUES ($request_id, '$current_pid', '$module_name', '$module_name', NOW(), NOW(), 'RUNNING', '$USER')
-        " 2>/dev/null
-    else
-        # Update existing record - append PID
-        $CONNECTION_STRING -c "
-            UPDATE $TRACKING_TABLE
-            SET process_ids = CASE
-                    WHEN process_ids IS NULL OR process_ids = ''
-                    THEN '$current_pid'
-                    ELSE process_ids || ',$current_pid'
-                END,
-                module_sequence = CASE
-                    WHEN module_sequence IS NULL OR module_sequence = ''
-                    THEN '$module_name'
-                    ELSE module_sequence || ',$module_name'
-                END,
-                current_module = '$module_name',
-                last_updated = NOW(),
-                status = 'RUNNING'
-            WHERE request_id = $request_id
-        " 2>/dev/null
-    fi
+    python3 "$MAIN_SCRIPTS/process_tracking.py" "$request_id" "$module_name" "$current_pid" 2>/dev/null
 }
 
 # Function to clear and restart tracking for re-run requests
@@ -59,6 +24,11 @@ clear_and_restart_tracking() {
     local current_pid=$$
 
     # Clear existing PIDs and restart tracking
+    $CONNECTION_STRING -c "
+        DELETE FROM $PROCESS_TRACKING_TABLE WHERE request_id = $request_id
+    " 2>/dev/null
+    python3 "$MAIN_SCRIPTS/process_tracking.py" "$request_id" "$module_name" "$current_pid" 2>/dev/null
+
     $CONNECTION_STRING -c "
         UPDATE $TRACKING_TABLE
         SET process_ids = '$current_pid',
@@ -134,3 +104,54 @@ mark_request_failed() {
         WHERE request_id = $request_id
     " 2>/dev/null
 }
+
+# Function to run a block of SQL steps over one session (see module_runner.py)
+# Steps are read from stdin; a failed fatal step goes through the module's error_fun
+# Usage: run_module_steps <module_name> <error_code> [session_settings] <<EOF ... EOF
+run_module_steps() {
+    local module_name=$1
+    local error_code=$2
+    local session_settings="$3"
+    local error_file="$SPOOLPATH/${module_name}_step_error"
+
+    rm -f "$error_file"
+    python3 "$MAIN_SCRIPTS/module_runner.py" "$REQUEST_ID" "$module_name" - \
+        --error-code "$error_code" --error-file "$error_file" \
+        --session-settings "$session_settings"
+
+    if [[ $? -ne 0 ]]; then
+        if [[ -s "$error_file" ]]; then
+            error_fun "$(cut -d'|' -f1 "$error_file")" "$(cut -d'|' -f2- "$error_file")"
+        else
+            error_fun "$error_code" "Module runner failed in $module_name"
+        fi
+        exit
+    fi
+}
+
+# Group-count snapshot: per-group counts loaded from one GROUP BY into the group_counts
+# dictionary, so a module looks them up instead of issuing a count() per group.
+# The query returns "<key>|<count>" rows (the key may itself contain '|'); callers keep
+# the counts current by adding the row counts their own inserts/updates/deletes return.
+# Usage: load_group_counts "<sql>" ; group_count <key> ; add_group_count <key> <delta>
+declare -A group_counts
+
+load_group_counts() {
+    local spool="$SPOOLPATH/group_counts_$$"
+    local line
+
+    $CONNECTION_STRING -qtAX -c "$1" > "$spool" || return 1
+
+    while IFS= read -r line; do
+        group_counts["${line%|*}"]=${line##*|}
+    done < "$spool"
+    rm -f "$spool"
+}
+
+group_count() {
+    echo "${group_counts[$1]:-0}"
+}
+
+add_group_count() {
+    group_counts["$1"]=$(( ${group_counts[$1]:-0} + ${2:-0} ))
+}
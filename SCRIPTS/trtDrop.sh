@@ -33,6 +33,8 @@ then
 
                 TRT_TABLE=APT_CUSTOM_$REQUEST_ID\_$CLIENT_NAME\_$WEEK\_TRT_TABLE
 
+                TRT_CHECKPOINT_TABLE=APT_CUSTOM_$REQUEST_ID\_$CLIENT_NAME\_$WEEK\_TRT_CHECKPOINT
+
                 SUPP_TABLE=APT_CUSTOM_$REQUEST_ID\_$CLIENT_NAME\_SUPPRESSION_TABLE
 
                 REPORT_TABLE=APT_CUSTOM_$REQUEST_ID\_$CLIENT_NAME\_REPORT_TABLE
@@ -43,6 +45,8 @@ then
 
                                 $CONNECTION_STRING -c " DROP TABLE  IF EXISTS $TRT_TABLE "
 
+                                $CONNECTION_STRING -c " DROP TABLE  IF EXISTS $TRT_CHECKPOINT_TABLE "
+
                                 $CONNECTION_STRING -c " DROP TABLE  IF EXISTS $REPORT_TABLE "
 
                                 $CONNECTION_STRING -c " DROP TABLE  IF EXISTS $SRC_TABLE "
@@ -151,38 +151,7 @@ then
 
 fi
 
-#==== GENUINE OFFER ID UNSUB SUPPRESSION ====#
-
-
-
-offerid_unsub_supp_cnt=`$CONNECTION_STRING -qtAX -c "select upper(OFFERID_UNSUB_SUPP) from  $REQUEST_TABLE where REQUEST_ID=$REQUEST_ID"`
-
-
-if [[ $offerid_unsub_supp_cnt == "Y" ]]
-then
-
-
-        mindate=`$CONNECTION_STRING -qtAX -c "select min(del_date)  from $REPORT_TABLE  " `
-
-        echo " OFFERID SUPPRESSION START TIME: `date`"
-	#SET enable_seqscan TO off;
-        offerid_unsubs_supp_cnt=`$CONNECTION_STRING -qtAX -c "with cte as (delete from $TRT_TABLE a using $GREEN_TOTAL_UNSUBS_TEMP b where a.email=b.email  returning 1 ) select count(*) from cte"`
-
-        if [[ $? -ne 0 ]]
-        then
-
-                error_fun "1" "Unable to perform offer id unsub suppression to the TRT"
-                exit
-        else
-
-                $CONNECTION_STRING -vv -c "update $REQUEST_TABLE set REQUEST_DESC='OfferId Suppressions Completed' where REQUEST_ID=$REQUEST_ID  "
-
-                $CONNECTION_STRING -vv -c "update $QA_TABLE set  OFFERID_UNSUB_SUPP_COUNT=$offerid_unsubs_supp_cnt where REQUEST_ID=$REQUEST_ID"
-
-        fi
-        echo " OFFERID SUPPRESSION END TIME: `date`"
-
-fi
+#==== OFFER ID UNSUBS ARE SUPPRESSED WITH THE OTHER SOURCES IN suppressionList.sh ====#
 
 
 $CONNECTION_STRING -vv -c "vacuum analyze $TRT_TABLE"
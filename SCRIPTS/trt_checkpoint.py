@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+TRT Checkpoint Module
+Per-request checkpoint table for rltpDataPulling.py.
+
+One row per (query index, decile) records how far that slice of the TRT got:
+rows loaded, index state and ANALYZE state. A TRT rerun (error_code 1) reads
+it back and only re-pulls / re-indexes the slices that did not finish.
+
+The checkpoint only describes the TRT as loaded: suppressionList.sh drops it
+before deleting from the TRT, and a rerun then rebuilds the TRT.
+"""
+
+import hashlib
+import re
+
+# Slice states
+PENDING = "pending"
+LOADED = "loaded"
+FAILED = "failed"
+DONE = "done"
+SKIPPED = "skipped"
+
+# Worker actions decided by plan_decile
+ACTION_LOAD = "load"          # Pull from Snowflake, COPY, index, ANALYZE
+ACTION_FINALIZE = "finalize"  # Rows already loaded; index and ANALYZE only
+ACTION_SKIP = "skip"          # Nothing to do
+
+# reltuples may drift after ANALYZE sampling; beyond this an exact count is used
+RELTUPLES_TOLERANCE = 0.02
+
+
+def query_fingerprint(query: str) -> str:
+    """MD5 of a query with whitespace normalized, to detect edited queries."""
+    normalized = re.sub(r"\s+", " ", query.strip().rstrip(";")).lower()
+    return hashlib.md5(normalized.encode("utf-8")).hexdigest()
+
+
+def ensure_checkpoint_table(cursor, table: str) -> bool:
+    """
+    Create the checkpoint table if needed.
+
+    Returns:
+        True if the table already existed (i.e. this run is a resume)
+    """
+    cursor.execute(f"SELECT to_regclass('{table}') IS NOT NULL")
+    existed = cursor.fetchone()[0]
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            query_index   int,
+            decile        varchar,
+            query_hash    varchar,
+            rows_loaded   bigint,
+            load_state    varchar DEFAULT '{PENDING}',
+            index_state   varchar DEFAULT '{PENDING}',
+            analyze_state varchar DEFAULT '{PENDING}',
+            updated_at    timestamp DEFAULT now(),
+            PRIMARY KEY (query_index, decile)
+        )
+    """)
+    return existed
+
+
+def read_checkpoints(cursor, table: str) -> dict:
+    """Return {(query_index, decile): row dict} for every recorded slice."""
+    cursor.execute(
+        f"SELECT query_index, decile, query_hash, rows_loaded, load_state, "
+        f"index_state, analyze_state FROM {table}"
+    )
+    columns = [desc[0] for desc in cursor.description]
+    checkpoints = {}
+    for row in cursor.fetchall():
+        record = dict(zip(columns, row))
+        checkpoints[(record["query_index"], str(record["decile"]))] = record
+    return checkpoints
+
+
+def save_checkpoint(conn, table: str, query_index: int, decile, **fields) -> None:
+    """Upsert the given state columns for one (query index, decile) slice."""
+    columns = ["query_index", "decile"] + list(fields)
+    values = [query_index, str(decile)] + list(fields.values())
+    updates = ", ".join(f"{col} = EXCLUDED.{col}" for col in fields)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(values))}) "
+            f"ON CONFLICT (query_index, decile) DO UPDATE SET {updates}, updated_at = now()",
+            values,
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def reset_decile(cursor, table: str, decile) -> None:
+    """Forget every slice of a decile (its partition is being rebuilt)."""
+    cursor.execute(f"DELETE FROM {table} WHERE decile = %s", (str(decile),))
+
+
+def partition_row_count(cursor, partition_table: str, exact: bool) -> int:
+    """Row count of a partition: reltuples estimate, or an exact count(*)."""
+    if exact:
+        cursor.execute(f"SELECT count(*) FROM {partition_table}")
+    else:
+        cursor.execute(
+            f"SELECT reltuples::bigint FROM pg_class WHERE oid = '{partition_table}'::regclass"
+        )
+    return int(cursor.fetchone()[0])
+
+
+def plan_decile(decile, query_hashes: dict, checkpoints: dict, count_rows) -> tuple:
+    """
+    Decide what each query has to do for one decile partition.
+
+    A slice is trusted when its checkpoint is LOADED with the same query hash.
+    The partition must hold exactly the rows of the trusted slices: if every
+    slice is trusted a cheap reltuples check is tried first, otherwise (or if
+    that check fails) an exact count is used. A mismatch means rows of an
+    unrecorded load are present, so the whole decile is rebuilt.
+
+    Args:
+        decile: Decile identifier
+        query_hashes: {query_index: query_fingerprint} for this run
+        checkpoints: Output of read_checkpoints
+        count_rows: Callable(exact: bool) -> current partition row count
+
+    Returns:
+        ({query_index: action}, reset_partition)
+    """
+    last_index = max(query_hashes)
+    trusted = {}
+    for query_index, query_hash in query_hashes.items():
+        record = checkpoints.get((query_index, str(decile)))
+        if record and record["load_state"] == LOADED and record["query_hash"] == query_hash:
+            trusted[query_index] = record
+
+    if not trusted:
+        if any(key[1] == str(decile) for key in checkpoints):
+            return {query_index: ACTION_LOAD for query_index in query_hashes}, True
+        return {query_index: ACTION_LOAD for query_index in query_hashes}, count_rows(True) > 0
+
+    expected_rows = sum(record["rows_loaded"] or 0 for record in trusted.values())
+    verified = False
+    if len(trusted) == len(query_hashes):
+        estimate = count_rows(False)
+        verified = abs(estimate - expected_rows) <= RELTUPLES_TOLERANCE * max(expected_rows, 1)
+    if not verified:
+        verified = count_rows(True) == expected_rows
+    if not verified:
+        return {query_index: ACTION_LOAD for query_index in query_hashes}, True
+
+    actions = {}
+    for query_index in query_hashes:
+        record = trusted.get(query_index)
+        if record is None:
+            actions[query_index] = ACTION_LOAD
+            continue
+        index_ready = record["index_state"] == DONE or (
+            query_index != last_index and record["index_state"] == SKIPPED
+        )
+        if index_ready and record["analyze_state"] == DONE:
+            actions[query_index] = ACTION_SKIP
+        else:
+            actions[query_index] = ACTION_FINALIZE
+    return actions, False
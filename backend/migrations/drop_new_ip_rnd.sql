@@ -0,0 +1,11 @@
+-- Migration: Drop the rnd pick key from the new IP pool
+-- Description: ipAppending.sh briefly added an rnd column and index to the shared
+--              pool on the fly; it now draws a fresh sample per request and no
+--              longer uses them
+-- Author: CAM Application
+-- Date: 2026-10-17
+
+DROP INDEX IF EXISTS APT_CUSTOM_VERIZON_NEW_IPS_DND_rnd_idx;
+
+ALTER TABLE APT_CUSTOM_VERIZON_NEW_IPS_DND
+DROP COLUMN IF EXISTS rnd;
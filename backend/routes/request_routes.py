@@ -1282,3 +1282,81 @@ def get_week(request_id):
     except Exception as e:
         logger.error(f"Error fetching week: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@request_bp.route('/api/requests/<int:request_id>/trt-profile', methods=['GET'])
+def get_trt_profile(request_id):
+    """Get per-decile RLTP phase metrics (rows, bytes, seconds per phase) for a request"""
+    try:
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'success': False, 'error': 'Database connection failed'}), 500
+
+        cursor = conn.cursor()
+        metrics_table = config.get_table_name('rltp_metrics')
+
+        # Table is created by rltpDataPulling.py on its first run
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (metrics_table,))
+        if not cursor.fetchone()[0]:
+            cursor.close()
+            release_db_connection(conn)
+            return jsonify({'success': True, 'request_id': request_id, 'phases': [], 'indexes': [], 'totals': {}})
+
+        query = f"""
+        SELECT query_index, decile, load_path, rows_loaded, bytes_compressed,
+               bytes_uncompressed, file_count, export_seconds, get_seconds,
+               merge_seconds, copy_seconds, index_seconds, analyze_seconds,
+               rows_per_second, index_name, index_wait_seconds, recorded_at
+        FROM {metrics_table}
+        WHERE request_id = %s
+        ORDER BY query_index, decile, index_name
+        """
+
+        cursor.execute(query, (request_id,))
+        columns = [desc[0] for desc in cursor.description]
+        results = cursor.fetchall()
+
+        cursor.close()
+        release_db_connection(conn)
+
+        # Per-slice rows have no index_name; per-index build rows are listed apart
+        # so their build times are not added to the slices' index phase again
+        phases = []
+        indexes = []
+        for row in results:
+            phase = dict(zip(columns, row))
+            for key, value in phase.items():
+                if key == 'recorded_at':
+                    phase[key] = value.isoformat() if value else None
+                elif key.endswith('_seconds') or key == 'rows_per_second':
+                    phase[key] = float(value) if value is not None else None
+            if phase['index_name']:
+                indexes.append({
+                    key: phase[key]
+                    for key in ('query_index', 'decile', 'index_name', 'index_seconds',
+                                'index_wait_seconds', 'recorded_at')
+                })
+            else:
+                phases.append(phase)
+
+        # Totals per phase across all deciles, to see where the time went
+        totals = {
+            key: round(sum(p[key] or 0 for p in phases), 2)
+            for key in ('export_seconds', 'get_seconds', 'merge_seconds',
+                        'copy_seconds', 'index_seconds', 'analyze_seconds')
+        }
+        totals['rows_loaded'] = sum(p['rows_loaded'] or 0 for p in phases)
+        totals['bytes_compressed'] = sum(p['bytes_compressed'] or 0 for p in phases)
+        totals['bytes_uncompressed'] = sum(p['bytes_uncompressed'] or 0 for p in phases)
+
+        return jsonify({
+            'success': True,
+            'request_id': request_id,
+            'phases': phases,
+            'indexes': indexes,
+            'totals': totals
+        })
+
+    except Exception as e:
+        logger.error(f"Error fetching TRT profile: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500